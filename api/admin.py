@@ -0,0 +1,9 @@
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bff.settings')
+# The admin and its static assets need the full profile; ``api/index.py`` serves the rest.
+os.environ.setdefault('BFF_RUNTIME', 'full')
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+app = get_wsgi_application()
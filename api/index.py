@@ -1,7 +1,9 @@
 import os
 
-from django.core.wsgi import get_wsgi_application
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bff.settings')
+# Serverless cold starts only boot what the public API needs; see ``BFF_RUNTIME``.
+os.environ.setdefault('BFF_RUNTIME', 'api')
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
 
 app = get_wsgi_application()
@@ -0,0 +1,154 @@
+"""Requests per second of one worker on the read endpoints: WSGI versus the async ASGI path.
+
+    python -m benchmarks.asgi [--restaurants 2000] [--latency-ms 5] [--requests 200]
+                              [--concurrency 20]
+
+Every SQL statement sleeps ``--latency-ms`` first, standing in for the round
+trip to a remote PostgreSQL server. Each endpoint is then driven three ways
+through Django's own handlers, without a network server in between:
+
+* ``wsgi``: one synchronous worker thread answering requests one at a time;
+* ``asgi-sync``: one ASGI event loop with ``--concurrency`` requests in
+  flight, served by the synchronous DRF views;
+* ``asgi-async``: the same, with ``async_reads()`` installed.
+"""
+import argparse
+import asyncio
+import time
+from io import BytesIO
+
+from benchmarks.utils import populate, setup_django, test_database
+
+# ``--restaurants`` rows are enough for every path below.
+ENDPOINTS = [
+    ('list', '/api/restaurants/', 'limit=20'),
+    ('list-filtered', '/api/restaurants/', 'feature=outdoor&ordering=price_tier'),
+    ('detail', None, ''),
+    ('districts', '/api/districts/', ''),
+    ('suggestions', '/api/search/suggestions/', 'q=res'),
+]
+# Module-level URLconf for the ``asgi-async`` runs, filled in by ``run()``.
+urlpatterns = []
+
+
+def simulate_latency(seconds):
+    """Delay every query on every connection, including ones opened later on other threads."""
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(connection, **kwargs):  # noqa: ARG001
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, delay)
+
+    connection_created.connect(install, weak=False)
+    for connection in connections.all():
+        install(connection)
+
+
+def wsgi_rps(path, query, requests):
+    from django.core.handlers.wsgi import WSGIHandler
+    from wsgiref.util import setup_testing_defaults
+
+    handler = WSGIHandler()
+    started = time.perf_counter()
+    for _ in range(requests):
+        environ = {'PATH_INFO': path, 'QUERY_STRING': query, 'wsgi.input': BytesIO()}
+        setup_testing_defaults(environ)
+        statuses = []
+        b''.join(handler(environ, lambda status, headers: statuses.append(status)))
+        assert statuses[0].startswith('200'), f'{path}: {statuses[0]}'
+    return requests / (time.perf_counter() - started)
+
+
+async def asgi_rps(path, query, requests, concurrency):
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [(b'host', b'localhost')],
+            'client': ('127.0.0.1', 50000),
+            'server': ('localhost', 80),
+        }
+        body = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        sent = []
+
+        async def receive():
+            if body:
+                return body.pop()
+            # The client never disconnects early.
+            await asyncio.Event().wait()
+
+        async def send(message):
+            sent.append(message)
+
+        async with slots:
+            await handler(scope, receive, send)
+        assert sent[0]['status'] == 200, f'{path}: {sent[0]["status"]}'
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+def run(restaurants, latency, requests, concurrency):
+    from django.test import override_settings
+    from django.urls import clear_url_caches
+
+    from bff.urls import urlpatterns as sync_urlpatterns
+    from restaurants.async_views import async_reads
+    from restaurants.models import Restaurant
+
+    urlpatterns[:] = async_reads(sync_urlpatterns)
+    populate(restaurants)
+    slug = Restaurant.objects.filter(is_active=True).values_list('slug', flat=True).first()
+    simulate_latency(latency / 1000)
+
+    print(
+        f'{latency:g}ms per query, {requests} requests per run, '
+        f'{concurrency} in flight under ASGI'
+    )
+    print(f'{"endpoint":>14} {"wsgi rps":>10} {"asgi-sync":>10} {"asgi-async":>11} {"speedup":>8}')
+    for name, path, query in ENDPOINTS:
+        path = path or f'/api/restaurants/{slug}/'
+        wsgi = wsgi_rps(path, query, requests)
+        asgi_sync = asyncio.run(asgi_rps(path, query, requests, concurrency))
+        with override_settings(ROOT_URLCONF=__name__):
+            clear_url_caches()
+            asgi_async = asyncio.run(asgi_rps(path, query, requests, concurrency))
+        clear_url_caches()
+        print(
+            f'{name:>14} {wsgi:>10.1f} {asgi_sync:>10.1f} {asgi_async:>11.1f} '
+            f'{asgi_async / wsgi:>7.1f}x'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--restaurants', type=int, default=2000)
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+    setup_django()
+    with test_database():
+        run(args.restaurants, args.latency_ms, args.requests, args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
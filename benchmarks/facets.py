@@ -0,0 +1,61 @@
+"""Facet counts cost versus taxonomy size.
+
+    python -m benchmarks.facets [--restaurants 5000]
+
+For each taxonomy size the script reports the number of SQL queries and the
+latency of ``GET /api/restaurants/facets/`` on the database path and on the
+in-memory facet index. Both query counts must stay flat as keys are added.
+"""
+import argparse
+
+from benchmarks.utils import (
+    count_queries,
+    populate,
+    setup_django,
+    summarize,
+    test_database,
+    timed,
+)
+
+TAXONOMY_SIZES = [(5, 5, 3), (20, 25, 10), (40, 100, 40), (80, 400, 150)]
+
+
+def run(restaurants):
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    from restaurants.facets import facet_index
+    from restaurants.models import AdditionalFilter, District, FeatureTag, Restaurant
+
+    client = APIClient()
+    print(f'{"taxonomy":>12} {"engine":>8} {"queries":>8} {"p50 ms":>8} {"p95 ms":>8}')
+    for districts, features, additional in TAXONOMY_SIZES:
+        Restaurant.objects.all().delete()
+        for model in (District, FeatureTag, AdditionalFilter):
+            model.objects.all().delete()
+        populate(restaurants, districts, features, additional)
+        facet_index.rebuild()
+        params = {'feature': ['feature-0', 'feature-1'], 'district': 'district-0'}
+        for engine, enabled in (('database', False), ('index', True)):
+            with override_settings(RESTAURANT_FACET_INDEX=enabled):
+                request = lambda: client.get('/api/restaurants/facets/', params)  # noqa: E731
+                queries = count_queries(request)
+                stats = summarize(timed(request))
+            label = f'{districts}/{features}/{additional}'
+            print(
+                f'{label:>12} {engine:>8} {queries:>8} '
+                f'{stats["p50"]:>8.2f} {stats["p95"]:>8.2f}'
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--restaurants', type=int, default=5000)
+    args = parser.parse_args()
+    setup_django()
+    with test_database():
+        run(args.restaurants)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Proximity search cost: geohash cells versus a full haversine scan.
+
+    python -m benchmarks.geo [--restaurants 50000]
+
+Restaurants are spread over an Istanbul-sized box. For each radius the script
+reports how many rows match and the latency of the geohash-backed
+``nearby()`` query against annotating every row with its haversine distance.
+"""
+import argparse
+
+from benchmarks.utils import populate, setup_django, summarize, test_database, timed
+
+ORIGIN = (41.0370, 28.9850)  # Taksim
+RADII_M = [500, 2000, 5000, 20000]
+
+
+def run(restaurants):
+    from restaurants.geo import distance_expression, nearby
+    from restaurants.models import Restaurant
+
+    populate(restaurants)
+    latitude, longitude = ORIGIN
+    print(f'{"radius m":>9} {"engine":>8} {"rows":>7} {"p50 ms":>8} {"p95 ms":>8}')
+    for radius in RADII_M:
+        engines = {
+            'geohash': lambda: nearby(Restaurant.objects.all(), latitude, longitude, radius),
+            'scan': lambda: Restaurant.objects.annotate(
+                distance=distance_expression(latitude, longitude)
+            ).filter(distance__lte=radius),
+        }
+        for engine, build in engines.items():
+            def query():
+                return list(build().order_by('distance').values_list('pk', 'distance'))  # noqa: B023
+
+            rows = len(query())
+            stats = summarize(timed(query, repeat=10))
+            print(
+                f'{radius:>9} {engine:>8} {rows:>7} {stats["p50"]:>8.2f} {stats["p95"]:>8.2f}'
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--restaurants', type=int, default=50000)
+    args = parser.parse_args()
+    setup_django()
+    with test_database():
+        run(args.restaurants)
+
+
+if __name__ == '__main__':
+    main()
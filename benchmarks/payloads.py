@@ -0,0 +1,68 @@
+"""Restaurant list serialization: DRF serializers versus the fast payload path.
+
+    python -m benchmarks.payloads [--restaurants 5000]
+
+For each page size the script times building and rendering a list page the
+old way (prefetching model instances, ``RestaurantListSerializer``,
+``JSONRenderer``) and the new way (``payloads.rows``/``payloads.payloads``,
+``FastJSONRenderer``), checks that both produce the same bytes, and then
+times the whole ``GET /api/restaurants/`` request with each path switched on.
+"""
+import argparse
+
+from benchmarks.utils import populate, setup_django, summarize, test_database, timed
+
+PAGE_SIZES = [10, 50, 200, 1000]
+
+
+def run(restaurants):
+    from django.test import override_settings
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.test import APIClient
+
+    from restaurants.payloads import payloads, rows
+    from restaurants.renderers import FastJSONRenderer
+    from restaurants.serializers import RestaurantListSerializer
+    from restaurants.views import RestaurantViewSet
+
+    populate(restaurants)
+    queryset = RestaurantViewSet.queryset.order_by('-rating', 'name', 'id')
+
+    def serializers(limit):
+        page = list(queryset.all()[:limit])
+        return JSONRenderer().render(RestaurantListSerializer(page, many=True).data)
+
+    def fast(limit):
+        return FastJSONRenderer().render(payloads(rows(queryset.all())[:limit]))
+
+    print(f'{"page":>6} {"engine":>12} {"p50 ms":>8} {"p95 ms":>8}')
+    for limit in PAGE_SIZES:
+        assert serializers(limit) == fast(limit), 'fast path output differs'
+        for engine, build in (('serializers', serializers), ('fast', fast)):
+            stats = summarize(timed(lambda: build(limit)))  # noqa: B023
+            print(f'{limit:>6} {engine:>12} {stats["p50"]:>8.2f} {stats["p95"]:>8.2f}')
+
+    client = APIClient()
+    json_only = {'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer']}
+    print()
+    print(f'{"endpoint":>18} {"p50 ms":>8} {"p95 ms":>8}')
+    for engine, overrides in (
+        ('serializers', {'RESTAURANT_FAST_PAYLOADS': False, 'REST_FRAMEWORK': json_only}),
+        ('fast', {'RESTAURANT_FAST_PAYLOADS': True}),
+    ):
+        with override_settings(**overrides):
+            stats = summarize(timed(lambda: client.get('/api/restaurants/', {'limit': 200})))
+        print(f'{engine:>18} {stats["p50"]:>8.2f} {stats["p95"]:>8.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--restaurants', type=int, default=5000)
+    args = parser.parse_args()
+    setup_django()
+    with test_database():
+        run(args.restaurants)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Cold-start cost of the serverless entry point in each runtime profile.
+
+    python -m benchmarks.startup [--runs 15] [--path /api/restaurants/]
+
+Every run starts a fresh interpreter that imports ``api/index.py`` (the
+module Vercel loads) with ``BFF_RUNTIME`` set to ``full`` or ``api``, then
+sends one WSGI request straight to the application. The table shows median
+and best milliseconds for the import, for the first response and for the
+whole process as seen from outside. The database is a migrated throwaway
+SQLite file unless ``DATABASE_URL`` is set.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.utils import ROOT
+
+RUNTIMES = ('full', 'api')
+
+# Runs in the child interpreter; prints one JSON object of timings in milliseconds.
+CHILD = """
+import json, sys, time
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+start = time.perf_counter()
+from api.index import app
+imported = time.perf_counter()
+environ = {'PATH_INFO': sys.argv[1], 'HTTP_HOST': 'localhost', 'wsgi.input': BytesIO()}
+setup_testing_defaults(environ)
+statuses = []
+body = b''.join(app(environ, lambda status, headers: statuses.append(status)))
+responded = time.perf_counter()
+print(json.dumps({
+    'status': statuses[0],
+    'import': (imported - start) * 1000,
+    'first_response': (responded - imported) * 1000,
+    'modules': len(sys.modules),
+}))
+"""
+
+
+def measure(runtime, path, database_url):
+    """Start one cold process and return its timings."""
+    env = {
+        **os.environ,
+        'BFF_RUNTIME': runtime,
+        'DATABASE_URL': database_url,
+        'DJANGO_DEBUG': '0',
+        'DJANGO_SETTINGS_MODULE': 'bff.settings',
+    }
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, path],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process'] = (time.perf_counter() - started) * 1000
+    if not result['status'].startswith('200'):
+        raise RuntimeError(f'{runtime}: {path} answered {result["status"]}')
+    return result
+
+
+def migrated_database():
+    handle, path = tempfile.mkstemp(suffix='.sqlite3')
+    os.close(handle)
+    url = f'sqlite:///{path}'
+    subprocess.run(
+        [sys.executable, 'manage.py', 'migrate', '--verbosity', '0'],
+        cwd=ROOT,
+        env={**os.environ, 'DATABASE_URL': url},
+        check=True,
+    )
+    return url, path
+
+
+def run(runs, path, database_url):
+    # One discarded run per profile so both start with warm bytecode caches.
+    for runtime in RUNTIMES:
+        measure(runtime, path, database_url)
+    samples = {runtime: [] for runtime in RUNTIMES}
+    for _ in range(runs):
+        for runtime in RUNTIMES:
+            samples[runtime].append(measure(runtime, path, database_url))
+
+    print(f'{"runtime":>8} {"metric":>15} {"median ms":>10} {"best ms":>10}')
+    for runtime, results in samples.items():
+        for metric in ('import', 'first_response', 'process'):
+            values = [result[metric] for result in results]
+            print(
+                f'{runtime:>8} {metric:>15} {statistics.median(values):>10.1f} '
+                f'{min(values):>10.1f}'
+            )
+        print(f'{runtime:>8} {"modules":>15} {results[0]["modules"]:>10}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=15)
+    parser.add_argument('--path', default='/api/restaurants/')
+    args = parser.parse_args()
+    database_url, database_path = os.environ.get('DATABASE_URL'), None
+    if not database_url:
+        database_url, database_path = migrated_database()
+    try:
+        run(args.runs, args.path, database_url)
+    finally:
+        if database_path:
+            os.unlink(database_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+"""End-to-end latency and query counts for every public endpoint on synthetic catalogues.
+
+    python -m benchmarks.suite [--restaurants 1000 10000] [--repeat 50] [--output run.json]
+    python -m benchmarks.suite --baseline before.json --output after.json
+    python -m benchmarks.suite --compare before.json after.json
+
+For each catalogue size a fresh test database is filled with
+``restaurants.synthetic.generate`` (the same rows for the same ``--seed``) and
+every scenario is run through the test client: one warm-up call, one call
+with the SQL queries counted, then ``--repeat`` timed calls. The table shows
+p50/p95/p99 latency in milliseconds per scenario; ``--output`` writes the same
+numbers as sorted, indented JSON so two runs can be diffed or compared with
+``--compare``. Runs on in-memory SQLite unless ``DATABASE_URL`` points at a
+(local) PostgreSQL server, where the test database is created and dropped.
+"""
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from benchmarks.utils import ROOT, count_queries, setup_django, summarize, test_database, timed
+
+SIZES = [1000, 10_000]
+STATS = ('p50', 'p95', 'p99', 'mean')
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # ``request(i)`` returns ``(path, data)`` for the i-th call.
+    request: object
+    editor: bool = False
+    # Caps ``--repeat`` for scenarios that walk the whole catalogue.
+    max_repeat: int = None
+
+
+def scenarios(fixtures):
+    slugs, ids = fixtures['slugs'], fixtures['ids']
+    district = fixtures['district']
+    latitude, longitude = fixtures['centre']
+    prefixes = ['ka', 'bal', 'moda', 'köf', 'eski ba', 'galata m']
+    queries = ['meyhane kadıköy', 'balikci', 'kofteci besiktas', 'bogaz kahv', 'galata']
+
+    def get(path, data=None):
+        return lambda i: (path, data)  # noqa: ARG005
+
+    return [
+        Scenario('list', 'get', get('/api/restaurants/')),
+        Scenario('list-district', 'get', get('/api/restaurants/', {'district': district})),
+        Scenario(
+            'list-sparse', 'get', get('/api/restaurants/', {'fields': 'id,name,slug,rating'})
+        ),
+        Scenario(
+            'filter-any', 'get', get('/api/restaurants/', {'feature': ['vegan', 'sea-view']})
+        ),
+        Scenario(
+            'filter-all',
+            'get',
+            get('/api/restaurants/', {'feature': ['coffee', 'outdoor'], 'feature_match': 'all'}),
+        ),
+        Scenario(
+            'filter-near',
+            'get',
+            get('/api/restaurants/', {'near': f'{latitude},{longitude}', 'radius_m': 1500}),
+        ),
+        Scenario('order-price', 'get', get('/api/restaurants/', {'ordering': 'price_tier'})),
+        Scenario('order-score', 'get', get('/api/restaurants/', {'ordering': '-score'})),
+        Scenario(
+            'paginate-offset',
+            'get',
+            get('/api/restaurants/', {'offset': fixtures['deep_offset'], 'limit': 50}),
+        ),
+        Scenario('paginate-cursor', 'get', get(fixtures['cursor'])),
+        Scenario('facets', 'get', get('/api/restaurants/facets/', {'feature': 'coffee'})),
+        Scenario('detail-slug', 'get', lambda i: (f'/api/restaurants/{slugs[i % 20]}/', None)),
+        Scenario('detail-id', 'get', lambda i: (f'/api/restaurants/{ids[i % 20]}/', None)),
+        Scenario('taxonomy-districts', 'get', get('/api/districts/')),
+        Scenario('taxonomy-features', 'get', get('/api/features/')),
+        Scenario(
+            'suggestions',
+            'get',
+            lambda i: ('/api/search/suggestions/', {'q': prefixes[i % len(prefixes)]}),
+        ),
+        Scenario(
+            'search', 'get', lambda i: ('/api/search/', {'q': queries[i % len(queries)]})
+        ),
+        Scenario('export', 'get', get('/api/restaurants/export/'), max_repeat=5),
+        Scenario(
+            'write-patch',
+            'patch',
+            lambda i: (f'/api/restaurants/{slugs[i % 20]}/', {'price_tier': i % 4 + 1}),
+            editor=True,
+        ),
+        Scenario(
+            'write-batch',
+            'patch',
+            lambda i: (
+                '/api/restaurants/batch/',
+                [{'lookup': slug, 'price_tier': i % 4 + 1} for slug in slugs[:50]],
+            ),
+            editor=True,
+        ),
+        Scenario(
+            'write-create',
+            'post',
+            lambda i: (
+                '/api/restaurants/',
+                {
+                    'name': f'Benchmark {i}',
+                    'slug': f'benchmark-{i}',
+                    'district': fixtures['district_id'],
+                    'feature_keys': ['coffee', 'outdoor'],
+                    'additional_keys': ['date-night'],
+                },
+            ),
+            editor=True,
+        ),
+    ]
+
+
+def fixtures():
+    """Request parameters picked from the generated catalogue."""
+    from django.db.models import Count
+    from rest_framework.test import APIClient
+
+    from restaurants.models import Restaurant
+    from restaurants.synthetic import DISTRICTS
+
+    active = Restaurant.objects.filter(is_active=True).order_by('slug')
+    sample = list(active.values_list('slug', 'id')[:50])
+    busiest = (
+        active.values('district__slug').annotate(n=Count('pk')).order_by('-n', 'district__slug')
+    )
+    district = busiest[0]['district__slug']
+    district_id = active.filter(district__slug=district).values_list('district', flat=True)[0]
+    centre = next((lat, lng) for slug, _, lat, lng, _ in DISTRICTS if slug == district)
+    first = APIClient().get('/api/restaurants/', {'cursor': ''}).json()
+    return {
+        'slugs': [slug for slug, _ in sample],
+        'ids': [str(pk) for _, pk in sample],
+        'district': district,
+        'district_id': district_id,
+        'centre': centre,
+        'deep_offset': max(0, active.count() // 2),
+        'cursor': first['next'] or '/api/restaurants/?cursor=',
+    }
+
+
+def run_scenario(scenario, repeat):
+    from django.contrib.auth.models import Group, User
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    if scenario.editor:
+        editor, _ = User.objects.get_or_create(username='benchmark-editor')
+        editor.groups.add(Group.objects.get_or_create(name='editors')[0])
+        client.force_authenticate(user=editor)
+    counter = itertools.count()
+
+    def call():
+        path, data = scenario.request(next(counter))
+        if scenario.method == 'get':
+            response = client.get(path, data)
+        else:
+            response = getattr(client, scenario.method)(path, data, format='json')
+        if response.streaming:
+            b''.join(response.streaming_content)
+        assert response.status_code < 300, f'{scenario.name}: HTTP {response.status_code}'
+
+    call()
+    queries = count_queries(call)
+    samples = timed(call, repeat=min(repeat, scenario.max_repeat or repeat))
+    stats = summarize(samples)
+    return {'queries': queries, **{key: round(stats[key], 3) for key in STATS}}
+
+
+def run(sizes, repeat, seed):
+    from django.db import connection
+
+    from restaurants.facets import facet_index
+    from restaurants.search import search_index
+    from restaurants.suggestions import suggestion_index
+    from restaurants.synthetic import generate
+
+    results = {}
+    for size in sizes:
+        with test_database():
+            generated = generate(size, seed=seed, replace=True)
+            print(
+                f'\n{size} restaurants on {connection.vendor} '
+                f'({generated.elapsed:.1f}s to generate)'
+            )
+            facet_index.invalidate()
+            suggestion_index.invalidate()
+            search_index.invalidate()
+            print(f'{"scenario":>20} {"queries":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+            results[str(size)] = {}
+            for scenario in scenarios(fixtures()):
+                row = run_scenario(scenario, repeat)
+                results[str(size)][scenario.name] = row
+                print(
+                    f'{scenario.name:>20} {row["queries"]:>8} {row["p50"]:>8.2f} '
+                    f'{row["p95"]:>8.2f} {row["p99"]:>8.2f}'
+                )
+    return results
+
+
+def metadata(repeat, seed):
+    import django
+    from django.db import connection
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'database': connection.vendor,
+        'django': django.get_version(),
+        'python': platform.python_version(),
+        'repeat': repeat,
+        'seed': seed,
+    }
+
+
+def compare(baseline, current):
+    """Print per-scenario changes between two result files' ``results``."""
+    print(f'\n{"size":>7} {"scenario":>20} {"queries":>9} {"p50 ms":>18} {"p95 ms":>18}')
+    for size, rows in current['results'].items():
+        for name, row in rows.items():
+            before = baseline['results'].get(size, {}).get(name)
+            if before is None:
+                continue
+            queries = f'{before["queries"]}->{row["queries"]}'
+            cells = []
+            for key in ('p50', 'p95'):
+                change = (row[key] - before[key]) / before[key] * 100 if before[key] else 0
+                cells.append(f'{row[key]:.2f} ({change:+.0f}%)')
+            print(f'{size:>7} {name:>20} {queries:>9} {cells[0]:>18} {cells[1]:>18}')
+
+
+def load(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--restaurants', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='Write the results to this JSON file.')
+    parser.add_argument('--baseline', help='Compare this run against an earlier results file.')
+    parser.add_argument(
+        '--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='Compare two results files.'
+    )
+    args = parser.parse_args()
+    if args.compare:
+        compare(load(args.compare[0]), load(args.compare[1]))
+        return
+
+    setup_django()
+    report = {
+        'meta': metadata(args.repeat, args.seed),
+        'results': run(args.restaurants, args.repeat, args.seed),
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True, ensure_ascii=False)
+            handle.write('\n')
+        print(f'\nWrote {args.output}', file=sys.stderr)
+    if args.baseline:
+        compare(load(args.baseline), report)
+
+
+if __name__ == '__main__':
+    main()
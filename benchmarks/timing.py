@@ -0,0 +1,58 @@
+"""Cost of ``Server-Timing`` phases and request metrics on the read endpoints.
+
+    python -m benchmarks.timing [--restaurants 5000] [--repeat 200]
+
+Each endpoint is timed with ``REQUEST_TIMING`` off and on, interleaving the
+two so drift affects both equally, and the p50/p95 difference is the
+instrumentation overhead per request.
+"""
+import argparse
+
+from benchmarks.utils import populate, setup_django, summarize, test_database, timed
+
+ENDPOINTS = [
+    ('list', '/api/restaurants/', {'limit': 50}),
+    ('list-filtered', '/api/restaurants/', {'feature': 'outdoor'}),
+    ('detail', None, None),
+    ('districts', '/api/districts/', None),
+]
+
+
+def run(restaurants, repeat):
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    from restaurants.models import Restaurant
+
+    populate(restaurants)
+    slug = Restaurant.objects.filter(is_active=True).values_list('slug', flat=True).first()
+    client = APIClient()
+    columns = ('off p50', 'on p50', 'off p95', 'on p95', 'delta')
+    print(f'{"endpoint":>14}', *(f'{column:>8}' for column in columns))
+    for name, path, params in ENDPOINTS:
+        path = path or f'/api/restaurants/{slug}/'
+        samples = {False: [], True: []}
+        for _ in range(repeat // 10):
+            for enabled in (False, True):
+                with override_settings(REQUEST_TIMING=enabled):
+                    call = lambda: client.get(path, params)  # noqa: B023, E731
+                    samples[enabled] += timed(call, repeat=10)
+        off, on = summarize(samples[False]), summarize(samples[True])
+        print(
+            f'{name:>14} {off["p50"]:>8.3f} {on["p50"]:>8.3f} {off["p95"]:>8.3f} '
+            f'{on["p95"]:>8.3f} {on["p50"] - off["p50"]:>+8.3f}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--restaurants', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    setup_django()
+    with test_database():
+        run(args.restaurants, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
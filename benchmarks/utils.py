@@ -0,0 +1,138 @@
+"""Shared helpers for the standalone benchmark scripts.
+
+Benchmarks run against a throwaway test database (in-memory SQLite unless
+``DATABASE_URL`` points elsewhere), so they never touch real data::
+
+    python -m benchmarks.facets
+"""
+import os
+import random
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bff.settings')
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+    os.environ.setdefault('DJANGO_DEBUG', '0')
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def timed(func, repeat=20):
+    """Run ``func`` ``repeat`` times and return per-call latencies in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def count_queries(func):
+    """Return the number of SQL queries ``func`` issues on the default database."""
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    reset_queries()
+    with CaptureQueriesContext(connection) as ctx:
+        func()
+    return len(ctx.captured_queries)
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'p50': statistics.median(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'p99': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+        'mean': statistics.fmean(ordered),
+    }
+
+
+# Roughly the built-up area of Istanbul.
+LATITUDE_RANGE = (40.8, 41.3)
+LONGITUDE_RANGE = (28.6, 29.4)
+
+
+def _restaurant(rng, i, district):
+    from decimal import Decimal
+
+    from restaurants.geo import geohash_for
+    from restaurants.models import Restaurant
+
+    latitude = Decimal(f'{rng.uniform(*LATITUDE_RANGE):.6f}')
+    longitude = Decimal(f'{rng.uniform(*LONGITUDE_RANGE):.6f}')
+    return Restaurant(
+        name=f'Restaurant {i}',
+        slug=f'restaurant-{i}',
+        district=district,
+        price_tier=rng.randint(1, 4),
+        rating=round(rng.uniform(2.5, 5.0), 1),
+        review_count=rng.randint(0, 3000),
+        latitude=latitude,
+        longitude=longitude,
+        # ``bulk_create`` skips ``save()``, which normally fills this in.
+        geohash=geohash_for(latitude, longitude),
+    )
+
+
+def populate(restaurants, districts=10, features=5, additional=3, seed=7):
+    """Create a synthetic catalogue with the given taxonomy sizes."""
+    from restaurants.models import AdditionalFilter, District, FeatureTag, Restaurant
+
+    rng = random.Random(seed)
+    district_rows = District.objects.bulk_create(
+        District(name=f'District {i}', slug=f'district-{i}') for i in range(districts)
+    )
+    feature_rows = FeatureTag.objects.bulk_create(
+        FeatureTag(key=f'feature-{i}', label=f'Feature {i}') for i in range(features)
+    )
+    additional_rows = AdditionalFilter.objects.bulk_create(
+        AdditionalFilter(key=f'additional-{i}', label=f'Additional {i}') for i in range(additional)
+    )
+    rows = [_restaurant(rng, i, rng.choice(district_rows)) for i in range(restaurants)]
+    for row in rows:
+        row.feature_keys = sorted(
+            tag.pk for tag in rng.sample(feature_rows, min(3, len(feature_rows)))
+        )
+        row.additional_keys = sorted(
+            tag.pk for tag in rng.sample(additional_rows, min(2, len(additional_rows)))
+        )
+    rows = Restaurant.objects.bulk_create(rows)
+    feature_links = Restaurant.features.through
+    additional_links = Restaurant.additional_filters.through
+    feature_links.objects.bulk_create(
+        feature_links(restaurant_id=row.pk, featuretag_id=key)
+        for row in rows
+        for key in row.feature_keys
+    )
+    additional_links.objects.bulk_create(
+        additional_links(restaurant_id=row.pk, additionalfilter_id=key)
+        for row in rows
+        for key in row.additional_keys
+    )
+    return rows
@@ -3,5 +3,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bff.settings')
+# Under ASGI the read endpoints run their queries concurrently; see ``ASYNC_READS``.
+os.environ.setdefault('ASYNC_READS', '1')
 
 application = get_asgi_application()
@@ -17,31 +17,52 @@ ALLOWED_HOSTS = [
     if host.strip()
 ]
 
-INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
-    'corsheaders',
-    'rest_framework',
-    'rest_framework_simplejwt',
-    'django_filters',
-    'restaurants.apps.RestaurantsConfig',
-]
+# ``api`` is the slim profile ``api/index.py`` boots for the public API: no
+# admin, sessions, messages, static files, CSRF or templates. Everything else
+# (``manage.py``, the admin entry point) runs the ``full`` profile.
+BFF_RUNTIME = os.getenv('BFF_RUNTIME', 'full')
+API_RUNTIME = BFF_RUNTIME == 'api'
 
-MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'corsheaders.middleware.CorsMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
-]
+if API_RUNTIME:
+    INSTALLED_APPS = [
+        'django.contrib.auth',
+        'django.contrib.contenttypes',
+        'corsheaders',
+        'rest_framework',
+        'restaurants.apps.RestaurantsConfig',
+    ]
+    MIDDLEWARE = [
+        'restaurants.timing.ServerTimingMiddleware',
+        'django.middleware.security.SecurityMiddleware',
+        'corsheaders.middleware.CorsMiddleware',
+        'django.middleware.common.CommonMiddleware',
+    ]
+else:
+    INSTALLED_APPS = [
+        'django.contrib.admin',
+        'django.contrib.auth',
+        'django.contrib.contenttypes',
+        'django.contrib.sessions',
+        'django.contrib.messages',
+        'django.contrib.staticfiles',
+        'corsheaders',
+        'rest_framework',
+        'rest_framework_simplejwt',
+        'django_filters',
+        'restaurants.apps.RestaurantsConfig',
+    ]
+    MIDDLEWARE = [
+        'restaurants.timing.ServerTimingMiddleware',
+        'django.middleware.security.SecurityMiddleware',
+        'restaurants.staticfiles.SnapshotWhiteNoiseMiddleware',
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'corsheaders.middleware.CorsMiddleware',
+        'django.middleware.common.CommonMiddleware',
+        'django.middleware.csrf.CsrfViewMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+        'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    ]
 
 ROOT_URLCONF = 'bff.urls'
 
@@ -77,12 +98,27 @@ DATABASES = {
     'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600, conn_health_checks=True),
 }
 
+# Optional read replicas (comma-separated URLs) serving the public catalogue
+# reads as ``replica_1``, ``replica_2``...; see ``restaurants.routers``.
+DATABASE_REPLICA_URLS = os.getenv('DATABASE_REPLICA_URLS', os.getenv('DATABASE_REPLICA_URL', ''))
+DATABASE_REPLICAS = []
+for index, url in enumerate(filter(None, map(str.strip, DATABASE_REPLICA_URLS.split(','))), 1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **dj_database_url.parse(url, conn_max_age=600, conn_health_checks=True),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['restaurants.routers.ReplicaRouter']
+# Seconds an editor's reads stay on the primary after a write (read-your-writes).
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'restaurants.authentication.JWTAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -91,14 +127,120 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 50,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'restaurants.renderers.FastJSONRenderer',
     ],
 }
 
+# Build restaurant list/detail payloads from column tuples instead of serializers.
+RESTAURANT_FAST_PAYLOADS = os.getenv('RESTAURANT_FAST_PAYLOADS', '1') == '1'
+
+# Largest accepted body for PATCH /api/restaurants/batch/.
+RESTAURANT_BATCH_MAX_ITEMS = int(os.getenv('RESTAURANT_BATCH_MAX_ITEMS', '500'))
+# Most ids and slugs accepted by GET /api/restaurants/batch/.
+RESTAURANT_BATCH_MAX_LOOKUPS = int(os.getenv('RESTAURANT_BATCH_MAX_LOOKUPS', '100'))
+
+# Ranking score behind ``ordering=score``: ratings are pulled towards the
+# catalogue mean by a prior worth this many reviews. Saves reuse each worker's
+# copy of the mean for ``_TTL`` seconds; ``manage.py recompute_scores`` refreshes all.
+RESTAURANT_SCORE_PRIOR_WEIGHT = int(os.getenv('RESTAURANT_SCORE_PRIOR_WEIGHT', '25'))
+RESTAURANT_SCORE_PRIOR_TTL = int(os.getenv('RESTAURANT_SCORE_PRIOR_TTL', '3600'))
+
+# GET /api/sync/: restaurants per page, seconds a change waits before it is
+# reported (covers commit delays and clock skew) and days tombstones are kept.
+SYNC_PAGE_SIZE = int(os.getenv('SYNC_PAGE_SIZE', '500'))
+SYNC_SETTLE_SECONDS = int(os.getenv('SYNC_SETTLE_SECONDS', '2'))
+SYNC_TOMBSTONE_DAYS = int(os.getenv('SYNC_TOMBSTONE_DAYS', '30'))
+
+# Static JSON snapshots of the hot anonymous reads (``manage.py publish_snapshots``).
+# SNAPSHOTS=1 also republishes them in the background after writes, which needs
+# a writable STATIC_ROOT. ``SNAPSHOT_BASE_URL`` is the public API origin used
+# in their pagination links; publishing refuses to guess it.
+SNAPSHOTS = os.getenv('SNAPSHOTS', '0') == '1'
+SNAPSHOT_BASE_URL = os.getenv('SNAPSHOT_BASE_URL', '')
+if SNAPSHOTS and not SNAPSHOT_BASE_URL:
+    raise ValueError('SNAPSHOTS=1 requires SNAPSHOT_BASE_URL, the public API origin.')
+SNAPSHOT_KEEP_SECONDS = int(os.getenv('SNAPSHOT_KEEP_SECONDS', '3600'))
+SNAPSHOT_MANIFEST_MAX_AGE = int(os.getenv('SNAPSHOT_MANIFEST_MAX_AGE', '60'))
+
+# Optional in-memory bitset index answering ``feature``/``additional`` filters.
+RESTAURANT_FACET_INDEX = os.getenv('RESTAURANT_FACET_INDEX', '0') == '1'
+RESTAURANT_FACET_INDEX_TTL = int(os.getenv('RESTAURANT_FACET_INDEX_TTL', '300'))
+
+# Optional Turkish-folded prefix/trigram index serving /api/search/suggestions/,
+# off by default since each process builds it on the first lookup.
+RESTAURANT_SUGGESTION_INDEX = os.getenv('RESTAURANT_SUGGESTION_INDEX', '0') == '1'
+RESTAURANT_SUGGESTION_INDEX_TTL = int(os.getenv('RESTAURANT_SUGGESTION_INDEX_TTL', '3600'))
+RESTAURANT_SUGGESTION_SYNC_INTERVAL = int(os.getenv('RESTAURANT_SUGGESTION_SYNC_INTERVAL', '30'))
+
+# Optional stemmed, typo-tolerant inverted index serving /api/search/. Off by
+# default: each process builds it on the first search (seconds at 100k rows).
+# The rating weight scales how much the stored ``score`` lifts the relevance.
+RESTAURANT_SEARCH_INDEX = os.getenv('RESTAURANT_SEARCH_INDEX', '0') == '1'
+RESTAURANT_SEARCH_INDEX_TTL = int(os.getenv('RESTAURANT_SEARCH_INDEX_TTL', '3600'))
+RESTAURANT_SEARCH_SYNC_INTERVAL = int(os.getenv('RESTAURANT_SEARCH_SYNC_INTERVAL', '30'))
+RESTAURANT_SEARCH_RATING_WEIGHT = float(os.getenv('RESTAURANT_SEARCH_RATING_WEIGHT', '0.5'))
+
+# Versioned response cache for the public read endpoints. Payloads sit in an
+# in-process LRU backed by the ``RESPONSE_CACHE_ALIAS`` cache, which also holds
+# the per-resource version counters and must be shared between processes.
+RESPONSE_CACHE = os.getenv('RESPONSE_CACHE', '0') == '1'
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512'))
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '300'))
+
+# Identical concurrent anonymous reads of the cached endpoints share one
+# build per process; while one request rebuilds, the others get the previous
+# payload if it is at most COALESCE_STALE_SECONDS old.
+REQUEST_COALESCING = os.getenv('REQUEST_COALESCING', '1') == '1'
+COALESCE_WAIT_SECONDS = float(os.getenv('COALESCE_WAIT_SECONDS', '10'))
+COALESCE_STALE_SECONDS = float(os.getenv('COALESCE_STALE_SECONDS', '60'))
+COALESCE_MAX_ENTRIES = int(os.getenv('COALESCE_MAX_ENTRIES', '512'))
+
+# Seconds a worker trusts its cached set of active editors; bounds how long a
+# removed editor's token keeps write access in other processes.
+EDITOR_ROLES_TTL = int(os.getenv('EDITOR_ROLES_TTL', '60'))
+
+# Serve the public read endpoints from async views (``bff/asgi.py`` turns this on).
+ASYNC_READS = os.getenv('ASYNC_READS', '0') == '1'
+# Threads running their queries; each holds a database connection.
+ASYNC_READ_THREADS = int(os.getenv('ASYNC_READ_THREADS', '4'))
+
+# Per-request ``Server-Timing`` phases and the in-process metrics behind /metrics.
+REQUEST_TIMING = os.getenv('REQUEST_TIMING', '1') == '1'
+# /metrics requires ``Authorization: Bearer <METRICS_TOKEN>``; unset, it is a 404 unless DEBUG.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    RESPONSE_CACHE_ALIAS: {
+        'BACKEND': os.getenv(
+            'RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('RESPONSE_CACHE_LOCATION', 'bff-responses'),
+        'TIMEOUT': RESPONSE_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': RESPONSE_CACHE_MAX_ENTRIES * 4},
+    },
+}
+
+# The version counters are the only invalidation: a per-process backend would
+# never see writes made by other workers or by management commands.
+PER_PROCESS_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+if RESPONSE_CACHE and CACHES[RESPONSE_CACHE_ALIAS]['BACKEND'] in PER_PROCESS_CACHE_BACKENDS:
+    raise ValueError(
+        'RESPONSE_CACHE=1 requires a RESPONSE_CACHE_BACKEND shared between processes, '
+        'e.g. django.core.cache.backends.filebased.FileBasedCache or a Redis cache.'
+    )
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_OBTAIN_SERIALIZER': 'restaurants.tokens.EditorTokenObtainPairSerializer',
 }
 
 CORS_ALLOWED_ORIGINS = [
@@ -1,10 +1,41 @@
-from django.contrib import admin
+from django.conf import settings
 from django.urls import include, path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+
+from restaurants.views import metrics_view
+
+
+def lazy_view(dotted_path):
+    """A class-based view that is only imported when its route is first requested."""
+    view = None
+
+    @csrf_exempt
+    def dispatch(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view()
+        return view(request, *args, **kwargs)
+
+    return dispatch
+
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/', include('restaurants.urls')),
-    path('api/auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path(
+        'api/auth/token/',
+        lazy_view('rest_framework_simplejwt.views.TokenObtainPairView'),
+        name='token_obtain_pair',
+    ),
+    path(
+        'api/auth/token/refresh/',
+        lazy_view('rest_framework_simplejwt.views.TokenRefreshView'),
+        name='token_refresh',
+    ),
+    path('metrics', metrics_view, name='metrics'),
 ]
+
+if not settings.API_RUNTIME:
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
@@ -0,0 +1,263 @@
+"""Async GET handlers for the read endpoints, installed by ``async_reads()`` under ASGI.
+
+A synchronous worker sits idle while each query makes its round trip to the
+database. These handlers run a request's independent queries concurrently
+(validators, ``COUNT(*)`` and the page in one round, the page's tag keys in a
+second) on a small pool of worker threads with their own connections, so a slow database
+costs two round trips per list page instead of six, and the event loop keeps
+serving other requests meanwhile.
+
+Only the common case is handled here: an anonymous ``GET`` answered by the
+fast payload path. Writes, tokens, format suffixes, keyset cursors, the
+response cache, the facet index, invalid filters and missing rows all go to
+the synchronous DRF view, and both paths build their responses with the same
+views, paginators and validators, so the bytes on the wire are identical.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern, URLResolver
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from .cache import response_cache_enabled
+from .conditional import (
+    Validators,
+    not_modified_response,
+    row_stamp,
+    scored_stamp,
+    stamp,
+    taxonomy_stamps,
+)
+from .facets import facet_index_enabled
+from .models import District, Restaurant
+from .payloads import fast_payloads_enabled, payloads, rows, selected_tags, tag_keys
+from .routers import read_replica
+from .suggestions import suggestion_index, suggestion_index_enabled
+from .views import suggestion_payload, suggestion_querysets
+
+
+def async_reads_enabled() -> bool:
+    return getattr(settings, 'ASYNC_READS', False)
+
+
+# Every thread that queries keeps its own connection, so the pool size bounds
+# the connections this process opens for async reads (per database alias).
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'ASYNC_READ_THREADS', 4), thread_name_prefix='async-reads'
+)
+
+
+async def gather(*calls):
+    """Run blocking ORM callables concurrently on the async read threads."""
+    run = sync_to_async(_query, thread_sensitive=False, executor=_executor)
+    return await asyncio.gather(*(run(call) for call in calls))
+
+
+def _query(call):
+    # Worker threads keep their connections between calls, like request threads do.
+    close_old_connections()
+    return call()
+
+
+def _prepare(sync_view, request, args, kwargs):
+    """A DRF view instance past ``initial()`` for ``request``, or None to use ``sync_view``."""
+    if request.method != 'GET' or kwargs.get('format') or 'HTTP_AUTHORIZATION' in request.META:
+        return None
+    view = sync_view.cls(**sync_view.initkwargs)
+    actions = getattr(sync_view, 'actions', None)
+    if actions is not None:
+        view.action_map = actions
+        for method, action in actions.items():
+            setattr(view, method, getattr(view, action))
+    view.args, view.kwargs = args, kwargs
+    drf_request = view.initialize_request(request, *args, **kwargs)
+    view.request = drf_request
+    view.headers = view.default_response_headers
+    try:
+        # Anonymous authentication, permissions and content negotiation: no queries.
+        view.initial(drf_request, *args, **kwargs)
+    except APIException:
+        return None
+    return view
+
+
+def _finalize(view, response, current=None):
+    if current is not None and response.status_code == 200:
+        current.apply(response)
+    return view.finalize_response(view.request, response)
+
+
+async def _offset_page(view, queryset, *calls):
+    """Run ``calls`` alongside ``queryset``'s ``COUNT(*)`` and page; set up the paginator."""
+    paginator = view.paginator
+    request = view.request
+    paginator.request = request
+    paginator.limit = paginator.get_limit(request)
+    paginator.offset = paginator.get_offset(request)
+    window = queryset[paginator.offset : paginator.offset + paginator.limit]
+    *results, paginator.count, page = await gather(*calls, queryset.count, partial(list, window))
+    if paginator.count == 0 or paginator.offset > paginator.count:
+        page = []
+    return results, page
+
+
+async def _page_tags(page, fields=None):
+    pks = [row.id for row in page]
+    names = selected_tags(fields)
+    keys = await gather(*(partial(tag_keys, name, pks) for name in names))
+    return dict(zip(names, keys))
+
+
+async def restaurant_list(view):
+    request = view.request
+    if (
+        view.paginator.is_cursor_request(request)
+        or response_cache_enabled()
+        or facet_index_enabled()
+        or not fast_payloads_enabled()
+    ):
+        return None
+    try:
+        fields = view.selected_fields()
+        queryset = view.filter_queryset(view.get_queryset())
+    except APIException:
+        return None
+    (list_stamp, taxonomy), page = await _offset_page(
+        view, rows(queryset, fields=fields), partial(scored_stamp, queryset), taxonomy_stamps
+    )
+    current = Validators(request, list_stamp, *taxonomy.values())
+    not_modified = not_modified_response(request, current)
+    if not_modified is not None:
+        return _finalize(view, not_modified)
+    tags = await _page_tags(page, fields) if page else None
+    response = view.paginator.get_paginated_response(payloads(page, tags=tags, fields=fields))
+    return _finalize(view, response, current)
+
+
+async def restaurant_detail(view):
+    if response_cache_enabled() or not fast_payloads_enabled():
+        return None
+    request = view.request
+    try:
+        fields = view.selected_fields()
+    except APIException:
+        return None
+    queryset = Restaurant.objects.filter(**view.get_lookup())
+    row, taxonomy, found = await gather(
+        partial(row_stamp, queryset),
+        taxonomy_stamps,
+        partial(list, rows(queryset, detail=True, fields=fields)[:1]),
+    )
+    if row is None or not found:
+        # The sync view renders the 404.
+        return None
+    current = Validators(request, row, *taxonomy.values())
+    not_modified = not_modified_response(request, current)
+    if not_modified is not None:
+        return _finalize(view, not_modified)
+    tags = await _page_tags(found, fields)
+    data = payloads(found, detail=True, tags=tags, fields=fields)[0]
+    return _finalize(view, Response(data), current)
+
+
+async def taxonomy_list(view):
+    if response_cache_enabled():
+        return None
+    request = view.request
+    model = view.queryset.model
+    try:
+        queryset = view.filter_queryset(view.get_queryset())
+    except APIException:
+        return None
+    (stamps,), page = await _offset_page(view, queryset, partial(taxonomy_stamps, (model,)))
+    current = Validators(request, stamps[model])
+    not_modified = not_modified_response(request, current)
+    if not_modified is not None:
+        return _finalize(view, not_modified)
+    data = view.get_serializer(page, many=True).data
+    return _finalize(view, view.paginator.get_paginated_response(data), current)
+
+
+async def suggestions(view):
+    request = view.request
+    query = request.query_params.get('q', '').strip()
+    with read_replica(request):
+        if suggestion_index_enabled():
+            # The index may refresh itself from the database, so it runs off the loop too.
+            [(restaurants, districts)] = await gather(partial(suggestion_index.search, query))
+            payload = {'query': query, 'restaurants': restaurants, 'districts': districts}
+            current = Validators(request, content=payload)
+        else:
+            restaurant_matches, district_matches = suggestion_querysets(query)
+            restaurant_stamp, district_stamps, restaurants, districts = await gather(
+                partial(stamp, Restaurant.objects.all()),
+                partial(taxonomy_stamps, (District,)),
+                partial(list, restaurant_matches),
+                partial(list, district_matches),
+            )
+            current = Validators(request, restaurant_stamp, district_stamps[District])
+            payload = None
+    not_modified = not_modified_response(request, current)
+    if not_modified is not None:
+        return _finalize(view, not_modified)
+    if payload is None:
+        payload = suggestion_payload(query, restaurants, districts)
+    return _finalize(view, Response(payload), current)
+
+
+# URL name -> async handler. A handler returns None to hand the request to the sync view.
+HANDLERS = {
+    'restaurant-list': restaurant_list,
+    'restaurant-detail': restaurant_detail,
+    'district-list': taxonomy_list,
+    'feature-list': taxonomy_list,
+    'additional-filter-list': taxonomy_list,
+    'search-suggestions': suggestions,
+}
+
+
+def async_view(sync_view, handler):
+    """An async view answering with ``handler`` and falling back to ``sync_view``."""
+    fallback = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        prepared = _prepare(sync_view, request, args, kwargs)
+        response = None if prepared is None else await handler(prepared)
+        if response is None:
+            if prepared is not None and hasattr(prepared, 'release_replica'):
+                prepared.release_replica()
+            response = await fallback(request, *args, **kwargs)
+        return response
+
+    view.csrf_exempt = True
+    view.cls = sync_view.cls
+    view.initkwargs = sync_view.initkwargs
+    return view
+
+
+def async_reads(patterns):
+    """``patterns`` with the read endpoints in ``HANDLERS`` served by async views."""
+    wrapped = []
+    for entry in patterns:
+        if isinstance(entry, URLResolver):
+            entry = URLResolver(
+                entry.pattern,
+                async_reads(entry.url_patterns),
+                entry.default_kwargs,
+                entry.app_name,
+                entry.namespace,
+            )
+        elif isinstance(entry, URLPattern) and entry.name in HANDLERS:
+            entry = URLPattern(
+                entry.pattern,
+                async_view(entry.callback, HANDLERS[entry.name]),
+                entry.default_args,
+                entry.name,
+            )
+        wrapped.append(entry)
+    return wrapped
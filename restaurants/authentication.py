@@ -0,0 +1,32 @@
+"""Request authentication for the API."""
+from functools import cache
+
+from django.conf import settings
+from rest_framework.authentication import BaseAuthentication
+
+
+class JWTAuthentication(BaseAuthentication):
+    """``rest_framework_simplejwt``'s stateless JWT authentication, imported on first use.
+
+    Anonymous reads never need it, so a cold process serving public traffic
+    skips loading the JWT stack until a request actually carries a token.
+    Signed tokens are trusted without loading the user row: ``request.user``
+    is a ``TokenUser`` built from the claims, and ``IsRestaurantEditor``
+    handles role revocation.
+    """
+
+    def authenticate(self, request):
+        header = getattr(settings, 'SIMPLE_JWT', {}).get('AUTH_HEADER_NAME', 'HTTP_AUTHORIZATION')
+        if not request.META.get(header):
+            return None
+        return _jwt_authentication().authenticate(request)
+
+    def authenticate_header(self, request):
+        return _jwt_authentication().authenticate_header(request)
+
+
+@cache
+def _jwt_authentication():
+    from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+
+    return JWTStatelessUserAuthentication()
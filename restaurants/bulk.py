@@ -0,0 +1,227 @@
+"""Set-based restaurant writes shared by ``import_restaurants`` and the batch endpoint.
+
+Both validate many rows with ``RestaurantWriteSerializer``'s rules against
+taxonomy maps loaded once, write the restaurant rows with one bulk statement
+and diff the tag through tables per batch instead of per restaurant.
+"""
+import uuid
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers, status
+
+from .geo import geohash_for
+from .models import TAG_KEY_COLUMNS, AdditionalFilter, District, FeatureTag, Restaurant
+from .serializers import RestaurantWriteSerializer
+from .signals import refresh_restaurants
+
+# Write serializer field (also the denormalized key column) -> many-to-many field.
+TAG_FIELDS = {column: name for name, column in TAG_KEY_COLUMNS.items()}
+
+
+class PreloadedRelatedField(serializers.Field):
+    """Resolve a related object by any of its keys from an in-memory map."""
+
+    default_error_messages = {'does_not_exist': 'Unknown {label} "{value}".'}
+
+    def __init__(self, mapping, **kwargs):
+        self.mapping = mapping
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            return self.mapping[str(data)]
+        except KeyError:
+            self.fail('does_not_exist', label=self.field_name, value=data)
+
+    def to_representation(self, value):
+        return value.pk
+
+
+class PreloadedWriteSerializer(RestaurantWriteSerializer):
+    """``RestaurantWriteSerializer`` validation without per-row queries.
+
+    ``district`` accepts a slug or id and taxonomy keys are checked against
+    the preloaded maps. ``slug`` uniqueness is left to the caller, which can
+    check a whole batch at once.
+    """
+
+    slug = serializers.SlugField(max_length=50)
+
+    def __init__(self, *args, districts, features, additional, **kwargs):
+        self.features = features
+        self.additional = additional
+        super().__init__(*args, **kwargs)
+        self.fields['district'] = PreloadedRelatedField(districts)
+
+    def validate_feature_keys(self, keys):
+        return self._known(keys, self.features)
+
+    def validate_additional_keys(self, keys):
+        return self._known(keys, self.additional)
+
+    def _known(self, keys, known):
+        unique_keys = list(dict.fromkeys(keys))
+        missing = [key for key in unique_keys if key not in known]
+        if missing:
+            raise serializers.ValidationError(f'Unknown keys: {", ".join(missing)}')
+        return unique_keys
+
+
+def preloaded_write_serializer(**kwargs):
+    """A ``PreloadedWriteSerializer`` over the current taxonomy (three queries)."""
+    districts = {}
+    for district in District.objects.all():
+        districts[district.slug] = district
+        districts[str(district.pk)] = district
+    return PreloadedWriteSerializer(
+        districts=districts,
+        features=set(FeatureTag.objects.values_list('key', flat=True)),
+        additional=set(AdditionalFilter.objects.values_list('key', flat=True)),
+        **kwargs,
+    )
+
+
+def replace_links(name, keys_by_pk):
+    """Make each restaurant's ``name`` links equal the given keys, touching only the diff."""
+    if not keys_by_pk:
+        return
+    field = Restaurant._meta.get_field(name)
+    through = field.remote_field.through
+    target = f'{field.m2m_reverse_field_name()}_id'
+    wanted = {(pk, key) for pk, keys in keys_by_pk.items() for key in keys}
+    current = {
+        (restaurant_id, key): link_id
+        for link_id, restaurant_id, key in through.objects.filter(
+            restaurant_id__in=list(keys_by_pk)
+        ).values_list('id', 'restaurant_id', target)
+    }
+    stale = [link_id for pair, link_id in current.items() if pair not in wanted]
+    if stale:
+        through.objects.filter(id__in=stale).delete()
+    through.objects.bulk_create(
+        through(restaurant_id=restaurant_id, **{target: key})
+        for restaurant_id, key in wanted
+        if (restaurant_id, key) not in current
+    )
+
+
+def _normalize(lookup):
+    """A UUID for id lookups, the slug otherwise (as ``RestaurantViewSet.get_lookup`` does)."""
+    try:
+        return uuid.UUID(lookup)
+    except ValueError:
+        return lookup
+
+
+class BatchUpdate:
+    """Partial updates to many restaurants, applied with a fixed number of queries.
+
+    Each item is ``{"lookup": <slug or id>, <write fields>...}``. Invalid or
+    unknown items are reported and skipped; the valid ones are written in one
+    transaction. ``results`` follows the order of ``items``.
+    """
+
+    LOOKUP = 'lookup'
+
+    def __init__(self, items):
+        self.items = items
+        self.results = [None] * len(items)
+        self.updated = {}
+
+    def run(self):
+        restaurants = self._load()
+        serializer = preloaded_write_serializer(partial=True)
+        changes = {}
+        for index, item in enumerate(self.items):
+            lookup = item.get(self.LOOKUP) if isinstance(item, dict) else None
+            if not isinstance(lookup, str) or not lookup:
+                self._fail(index, lookup, {self.LOOKUP: ['This field is required.']})
+                continue
+            restaurant = restaurants.get(_normalize(lookup))
+            if restaurant is None:
+                self._fail(index, lookup, {'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+                continue
+            if restaurant.pk in changes:
+                self._fail(index, lookup, {self.LOOKUP: ['Restaurant appears more than once.']})
+                continue
+            data = {key: value for key, value in item.items() if key != self.LOOKUP}
+            try:
+                changes[restaurant.pk] = (index, restaurant, serializer.run_validation(data))
+            except serializers.ValidationError as exc:
+                self._fail(index, lookup, exc.detail)
+        self._check_slugs(changes)
+        if changes:
+            self._apply(changes.values())
+        return self.results
+
+    def _load(self):
+        """``{slug or id: restaurant}`` for every restaurant the batch mentions, in one query."""
+        slugs, pks = set(), set()
+        for item in self.items:
+            lookup = item.get(self.LOOKUP) if isinstance(item, dict) else None
+            if isinstance(lookup, str):
+                key = _normalize(lookup)
+                (pks if isinstance(key, uuid.UUID) else slugs).add(key)
+        found = {}
+        for restaurant in Restaurant.objects.filter(Q(slug__in=slugs) | Q(pk__in=pks)):
+            found[restaurant.slug] = restaurant
+            found[restaurant.pk] = restaurant
+        return found
+
+    def _check_slugs(self, changes):
+        renamed = {
+            pk: data['slug']
+            for pk, (_, restaurant, data) in changes.items()
+            if data.get('slug', restaurant.slug) != restaurant.slug
+        }
+        if not renamed:
+            return
+        taken = dict(
+            Restaurant.objects.filter(slug__in=renamed.values()).values_list('slug', 'pk')
+        )
+        claimed = {}
+        for pk, slug in renamed.items():
+            if taken.get(slug, pk) != pk or claimed.setdefault(slug, pk) != pk:
+                index, _, _ = changes.pop(pk)
+                self._fail(
+                    index,
+                    self.items[index][self.LOOKUP],
+                    {'slug': ['restaurant with this slug already exists.']},
+                )
+
+    @transaction.atomic
+    def _apply(self, changes):
+        now = timezone.now()
+        fields = {'geohash', 'updated_at'}
+        tags = {field: {} for field in TAG_FIELDS}
+        restaurants = []
+        for _, restaurant, data in changes:
+            data = dict(data)
+            for field in TAG_FIELDS:
+                keys = data.pop(field, None)
+                if keys is not None:
+                    tags[field][restaurant.pk] = keys
+                    setattr(restaurant, field, sorted(keys))
+                    fields.add(field)
+            for name, value in data.items():
+                setattr(restaurant, name, value)
+            fields.update(data)
+            # Bulk writes skip ``Restaurant.save()``, which normally sets these.
+            restaurant.geohash = geohash_for(restaurant.latitude, restaurant.longitude)
+            restaurant.updated_at = now
+            restaurants.append(restaurant)
+        Restaurant.objects.bulk_update(restaurants, sorted(fields))
+        for field, keys_by_pk in tags.items():
+            replace_links(TAG_FIELDS[field], keys_by_pk)
+        refresh_restaurants(restaurant.pk for restaurant in restaurants)
+        for index, restaurant, _ in changes:
+            self.results[index] = {
+                self.LOOKUP: self.items[index][self.LOOKUP],
+                'status': status.HTTP_200_OK,
+            }
+            self.updated[restaurant.pk] = index
+
+    def _fail(self, index, lookup, errors, code=status.HTTP_400_BAD_REQUEST):
+        self.results[index] = {self.LOOKUP: lookup, 'status': code, 'errors': errors}
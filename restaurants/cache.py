@@ -0,0 +1,220 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .coalesce import BUILT, STALE, coalescer, coalescing_enabled
+from .timing import metrics
+
+RESTAURANTS = 'restaurants'
+DISTRICTS = 'districts'
+FEATURES = 'features'
+ADDITIONAL_FILTERS = 'additional-filters'
+# Bumped by ``recompute_scores()``, which reorders rows without touching ``updated_at``.
+SCORES = 'scores'
+
+KEY_PREFIX = 'bff:response'
+# Request META flag of internal renders (``snapshots.render()``): they must
+# see the database, not a cached or coalesced payload.
+UNCACHED = 'bff.uncached'
+
+
+class ResponseCache:
+    """Versioned cache of read-endpoint response payloads.
+
+    Every entry key embeds the current version of each resource the response
+    was built from, so bumping ``restaurants`` makes only the restaurant list
+    and detail entries unreachable while taxonomy entries keep hitting.
+    Versions live in the configured Django cache (shared between processes for
+    file-based or networked backends); payloads are kept in a size-bounded
+    in-process LRU backed by the same Django cache.
+    """
+
+    def __init__(self, alias='default', max_entries=512, timeout=300):
+        self.alias = alias
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()
+        self.reset_stats()
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._lru),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+
+    # -- versions --------------------------------------------------------
+
+    def _version_key(self, resource):
+        return f'{KEY_PREFIX}:version:{resource}'
+
+    def versions(self, resources):
+        keys = [self._version_key(resource) for resource in resources]
+        found = self.backend.get_many(keys)
+        versions = []
+        for key in keys:
+            version = found.get(key)
+            if version is None:
+                # A missing counter must never restart at an old value, or
+                # entries cached before it was evicted would come back.
+                self.backend.add(key, time.time_ns(), timeout=None)
+                version = self.backend.get(key)
+            versions.append(version)
+        return versions
+
+    def bump(self, *resources):
+        for resource in resources:
+            key = self._version_key(resource)
+            try:
+                self.backend.incr(key)
+            except ValueError:
+                self.backend.set(key, time.time_ns(), timeout=None)
+
+    # -- entries ---------------------------------------------------------
+
+    def make_key(self, scope, resources, params):
+        versions = '.'.join(str(version) for version in self.versions(resources))
+        return f'{KEY_PREFIX}:{scope}:{versions}:{self._digest(params)}'
+
+    def base_key(self, scope, params):
+        """``make_key()`` without the versions: the same read across writes."""
+        return f'{KEY_PREFIX}:{scope}:{self._digest(params)}'
+
+    @staticmethod
+    def _digest(params):
+        normalized = '&'.join(
+            f'{name}={",".join(sorted(params.getlist(name)))}' for name in sorted(params)
+        )
+        return hashlib.sha1(normalized.encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            value = self._lru.get(key)
+            if value is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return value
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, value)
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value, timeout=self.timeout)
+        with self._lock:
+            self._remember(key, value)
+
+    def _remember(self, key, value):
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            self.evictions += 1
+
+
+response_cache = ResponseCache(
+    alias=getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default'),
+    max_entries=getattr(settings, 'RESPONSE_CACHE_MAX_ENTRIES', 512),
+    timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300),
+)
+
+
+def response_cache_enabled() -> bool:
+    return getattr(settings, 'RESPONSE_CACHE', False)
+
+
+class CachedResponseMixin:
+    """Serve the actions listed in ``cache_resources`` from ``response_cache``.
+
+    ``cache_resources`` maps an action to the resources its payload is built
+    from; writes to any of them (see ``signals``) retire the cached entries.
+    Anonymous reads of those actions that miss the cache are also coalesced
+    with identical concurrent ones (see ``coalesce``).
+    """
+
+    cache_resources = {}
+
+    def get_response_keys(self, request):
+        """``(base key, versioned key)`` of this read, or None when the action is not cached."""
+        resources = self.cache_resources.get(self.action)
+        if not resources:
+            return None
+        if getattr(self, '_response_keys', None) is None:
+            scope = ':'.join([self.basename, self.action, *map(str, self.kwargs.values())])
+            params = request.query_params
+            self._response_keys = (
+                response_cache.base_key(scope, params),
+                response_cache.make_key(scope, resources, params),
+            )
+        return self._response_keys
+
+    def get_cache_key(self, request):
+        """Versioned key for this request, or None when it is not cached."""
+        if not response_cache_enabled() or request.META.get(UNCACHED):
+            return None
+        keys = self.get_response_keys(request)
+        return None if keys is None else keys[1]
+
+    def get_flight_keys(self, request):
+        """``get_response_keys()`` when this read may share another request's work."""
+        # Editors can be pinned to the primary after a write; keep them to themselves.
+        if not coalescing_enabled() or 'HTTP_AUTHORIZATION' in request.META:
+            return None
+        if request.META.get(UNCACHED):
+            return None
+        return self.get_response_keys(request)
+
+    def shared_validators(self):
+        """``get_validators()``, computed once for identical concurrent reads."""
+        keys = self.get_flight_keys(self.request)
+        if keys is None:
+            return self.get_validators()
+        validators, _ = coalescer.share(f'{keys[1]}:validators', self.get_validators)
+        return validators
+
+    def cached_response(self, request, build):
+        key = self.get_cache_key(request)
+        if key is not None:
+            data = response_cache.get(key)
+            if data is not None:
+                return Response(data, headers={'X-Cache': 'HIT'})
+        outcome = BUILT
+        flight = self.get_flight_keys(request)
+        if flight is None:
+            response = build()
+        else:
+            response, outcome = coalescer.respond(*flight, build)
+            if outcome != BUILT:
+                metrics.coalesced(request.resolver_match.view_name, outcome)
+        if outcome == STALE:
+            response['X-Cache'] = 'STALE'
+        elif key is not None:
+            # Joined responses were cached by their leader.
+            if outcome == BUILT and response.status_code == 200:
+                response_cache.set(key, response.data)
+            response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,125 @@
+"""Single-flight coalescing of identical concurrent reads, with stale-while-revalidate.
+
+After a deploy or a version bump, hundreds of identical anonymous reads can
+arrive before the first of them has finished. ``Coalescer.share()`` lets the
+first caller of a key (the leader) run the computation while the others wait
+for its result instead of repeating the same queries and serialization.
+
+``Coalescer.respond()`` does the same for whole responses and remembers the
+last payload built for each endpoint and parameter set. While a leader is
+rebuilding it, requests that would otherwise wait get that payload straight
+away if it is at most ``stale_seconds`` old: one worker pays for the refresh
+and nobody queues behind it. Those responses are always marked ``stale``, so
+that ``conditional_response()`` does not label them with the current
+validators: matching versions do not prove the payload is current, since
+writes from other processes and management commands never bump them here.
+
+Flights are per process and only as fresh as the versions in their keys: a
+request that starts after a write has committed (and bumped the version)
+never joins a flight that started before it.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.response import Response
+
+BUILT = 'built'
+JOINED = 'joined'
+STALE = 'stale'
+
+
+class _Flight:
+    __slots__ = ('done', 'ok', 'value')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = False
+        self.value = None
+
+
+class Coalescer:
+    def __init__(self, wait=10, stale_seconds=60, max_entries=512):
+        self.wait = wait
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._flights = {}
+        # Base key (endpoint and params, without versions) -> (payload, built at).
+        self._latest = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            self._latest.clear()
+
+    def share(self, key, compute, stale=None):
+        """``(result, outcome)`` of ``compute()``, run once for concurrent callers of ``key``.
+
+        Callers that find the computation running get ``stale`` right away
+        when it is not None, else wait up to ``wait`` seconds for the
+        leader's result. If the leader fails or is too slow they compute it
+        themselves.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if leader:
+            try:
+                flight.value = compute()
+                flight.ok = True
+                return flight.value, BUILT
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+        if stale is not None:
+            return stale, STALE
+        if flight.done.wait(self.wait) and flight.ok:
+            return flight.value, JOINED
+        return compute(), BUILT
+
+    def respond(self, base, key, build):
+        """``(response, outcome)`` for ``build()``, shared between identical requests."""
+        stale = self._recent(base)
+        response, outcome = self.share(key, build, stale=stale)
+        if outcome == BUILT:
+            if response.status_code == 200:
+                self._remember(base, response.data)
+            return response, outcome
+        if outcome == STALE:
+            response = Response(stale)
+            response.stale = True
+            return response, outcome
+        # Followers get their own response; the leader's is rendered for its request.
+        return Response(response.data, status=response.status_code), outcome
+
+    def _recent(self, base):
+        with self._lock:
+            entry = self._latest.get(base)
+        if entry is None:
+            return None
+        payload, built_at = entry
+        if time.monotonic() - built_at > self.stale_seconds:
+            return None
+        return payload
+
+    def _remember(self, base, payload):
+        with self._lock:
+            self._latest[base] = (payload, time.monotonic())
+            self._latest.move_to_end(base)
+            while len(self._latest) > self.max_entries:
+                self._latest.popitem(last=False)
+
+
+coalescer = Coalescer(
+    wait=getattr(settings, 'COALESCE_WAIT_SECONDS', 10),
+    stale_seconds=getattr(settings, 'COALESCE_STALE_SECONDS', 60),
+    max_entries=getattr(settings, 'COALESCE_MAX_ENTRIES', 512),
+)
+
+
+def coalescing_enabled() -> bool:
+    return getattr(settings, 'REQUEST_COALESCING', True)
@@ -0,0 +1,99 @@
+import hashlib
+
+from django.db.models import CharField, Count, Max, Value
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import AdditionalFilter, District, FeatureTag
+
+TAXONOMY_MODELS = (District, FeatureTag, AdditionalFilter)
+
+
+def stamp(queryset):
+    """``(max(updated_at), count)`` of ``queryset`` in one aggregate query."""
+    result = queryset.order_by().aggregate(last=Max('updated_at'), count=Count('pk'))
+    return result['last'], result['count']
+
+
+def scored_stamp(queryset):
+    """``stamp()`` of restaurants that also moves when ``recompute_scores()`` reorders them."""
+    result = queryset.order_by().aggregate(
+        last=Max('updated_at'), scored=Max('scored_at'), count=Count('pk')
+    )
+    last = max(filter(None, (result['last'], result['scored'])), default=None)
+    return last, result['count']
+
+
+def taxonomy_stamps(models=TAXONOMY_MODELS):
+    """``{model: (max(updated_at), count)}`` for every taxonomy table in one UNION query."""
+    queries = [
+        model.objects.order_by()
+        .values(table=Value(model._meta.label_lower, output_field=CharField()))
+        .annotate(last=Max('updated_at'), count=Count('pk'))
+        .values_list('table', 'last', 'count')
+        for model in models
+    ]
+    rows = queries[0].union(*queries[1:], all=True) if len(queries) > 1 else queries[0]
+    by_label = {label: (last, count) for label, last, count in rows}
+    return {model: by_label.get(model._meta.label_lower, (None, 0)) for model in models}
+
+
+class Validators:
+    """A strong ETag and a Last-Modified time derived from row stamps.
+
+    ``content`` can stand in for stamps when the payload is already at hand
+    without touching the database.
+    """
+
+    def __init__(self, request, *stamps, content=None):
+        parts = [request.path, sorted(request.query_params.lists()), content]
+        last_modified = None
+        for last, count in stamps:
+            parts.append((last.isoformat() if last else None, count))
+            if last and (last_modified is None or last > last_modified):
+                last_modified = last
+        self.etag = '"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()
+        self.last_modified = int(last_modified.timestamp()) if last_modified else None
+
+    def apply(self, response):
+        response['ETag'] = self.etag
+        if self.last_modified is not None:
+            response['Last-Modified'] = http_date(self.last_modified)
+        return response
+
+
+def conditional_response(request, validators, build):
+    """Return a 304 when the request's validators match, else ``build()`` with validators set.
+
+    ``validators`` is called first so that a matching request never reaches
+    the serializers. Stale responses (``response.stale``, see ``coalesce``)
+    get no validators, so clients do not keep them under the current ones.
+    """
+    if request.method not in {'GET', 'HEAD'}:
+        return build()
+    current = validators()
+    if current is None:
+        return build()
+    not_modified = not_modified_response(request, current)
+    if not_modified is not None:
+        return not_modified
+    response = build()
+    if response.status_code == 200 and not getattr(response, 'stale', False):
+        current.apply(response)
+    return response
+
+
+def not_modified_response(request, current):
+    """The 304 for ``request`` when it already holds the ``current`` validators, else None."""
+    not_modified = get_conditional_response(
+        request, etag=current.etag, last_modified=current.last_modified
+    )
+    return None if not_modified is None else current.apply(not_modified)
+
+
+def row_stamp(queryset):
+    """Stamp of the single row in ``queryset``, or None when it does not exist."""
+    last = queryset.order_by().values_list('updated_at', flat=True).first()
+    if last is None:
+        return None
+    return last, 1
@@ -0,0 +1,38 @@
+"""Full-catalogue NDJSON export behind ``GET /api/restaurants/export/`` and ``export_restaurants``.
+
+Active restaurants are read with ``iterator(chunk_size=...)`` (a server-side
+cursor on Postgres) and turned into detail payloads a chunk at a time, so a
+chunk is the most that is ever held in memory. Each line is the same JSON the
+detail endpoint returns.
+"""
+import zlib
+from itertools import islice
+
+from .models import Restaurant
+from .payloads import payloads, rows
+from .renderers import FastJSONRenderer
+
+CONTENT_TYPE = 'application/x-ndjson'
+CHUNK_SIZE = 2000
+
+
+def export_queryset():
+    return Restaurant.objects.filter(is_active=True).order_by('slug')
+
+
+def ndjson_lines(queryset=None, chunk_size=CHUNK_SIZE):
+    """Yield one encoded chunk of NDJSON lines per ``chunk_size`` restaurants."""
+    queryset = export_queryset() if queryset is None else queryset
+    renderer = FastJSONRenderer()
+    records = rows(queryset, detail=True).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(records, chunk_size)):
+        yield b''.join(renderer.render(item) + b'\n' for item in payloads(chunk, detail=True))
+
+
+def gzipped(chunks, level=6):
+    """Gzip a stream of byte chunks incrementally, flushing after each one."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        # A sync flush lets clients decode every chunk as soon as it arrives.
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
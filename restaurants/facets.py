@@ -0,0 +1,324 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count
+
+from .models import AdditionalFilter, District, FeatureTag, Restaurant
+from .pagination import TIE_BREAKERS
+from .routers import primary_reads
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+
+FACET_PARAMS = {'feature': 'features', 'additional': 'additional'}
+
+
+def _sort_key(ordering):
+    """Key of ``(slot, row)``; slots stand in for the ``name``/``id`` tie-breakers."""
+    if ordering == '-rating':
+        return lambda slot, row: (-row[1], slot)
+    if ordering == 'rating':
+        return lambda slot, row: (row[1], slot)
+    if ordering == 'price_tier':
+        return lambda slot, row: (row[3], slot)
+    if ordering == '-price_tier':
+        return lambda slot, row: (-row[3], slot)
+    raise KeyError(ordering)
+
+
+class FacetIndex:
+    """Per-process bitset index over active restaurants.
+
+    Every restaurant gets a stable slot; each district slug, feature key and
+    additional filter key maps to a Python int whose set bits are the slots of
+    the active restaurants carrying it. Filter combinations become bitwise
+    AND/OR and pagination walks a pre-sorted slot order, so only the PKs of the
+    requested page have to be loaded from the database.
+
+    Slots are handed out in the database's ``name``, ``id`` order, so ties
+    sort by slot exactly as the SQL tie-breakers do under the database
+    collation. New and renamed restaurants would break that order and trigger
+    a rebuild instead of a refresh.
+    """
+
+    ORDERINGS = ('-rating', 'rating', 'price_tier', '-price_tier')
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._dirty = set()
+        self._built_at = None
+        self._reset()
+
+    def _reset(self):
+        self._slots = {}
+        self._rows = []
+        self._active = 0
+        self._districts = {}
+        self._features = {}
+        self._additional = {}
+        self._orders = {}
+
+    # -- maintenance -----------------------------------------------------
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def mark_dirty(self, pk):
+        with self._lock:
+            self._dirty.add(pk)
+
+    def ensure_fresh(self):
+        with self._lock, primary_reads():
+            expired = self._built_at is None or time.monotonic() - self._built_at > self.ttl
+            if expired:
+                self.rebuild()
+            elif self._dirty:
+                self._refresh(self._dirty)
+            self._dirty = set()
+
+    def rebuild(self):
+        with self._lock, primary_reads():
+            self._reset()
+            self._load(Restaurant.objects.filter(is_active=True).order_by(*TIE_BREAKERS))
+            self._built_at = time.monotonic()
+            self._dirty = set()
+
+    def _refresh(self, pks):
+        pks = set(pks)
+        names = {}
+        for pk in pks:
+            slot = self._slots.get(pk)
+            if slot is None or self._rows[slot] is None:
+                continue
+            names[pk] = self._rows[slot][2]
+            mask = ~(1 << slot)
+            self._active &= mask
+            for bitmap in (self._districts, self._features, self._additional):
+                for key in bitmap:
+                    bitmap[key] &= mask
+            self._rows[slot] = None
+        loaded = self._load(Restaurant.objects.filter(is_active=True, pk__in=pks).order_by())
+        self._orders = {}
+        if any(names.get(pk) != name for pk, name in loaded.items()):
+            self.rebuild()
+
+    def _load(self, queryset):
+        """Index the rows of ``queryset``, in its order; return their names by pk."""
+        rows = queryset.values_list('pk', 'rating', 'name', 'price_tier', 'district__slug')
+        loaded = {}
+        for pk, rating, name, price_tier, district in rows:
+            slot = self._slots.get(pk)
+            if slot is None:
+                slot = len(self._rows)
+                self._slots[pk] = slot
+                self._rows.append(None)
+            self._rows[slot] = (pk, rating, name, price_tier)
+            bit = 1 << slot
+            self._active |= bit
+            self._districts[district] = self._districts.get(district, 0) | bit
+            loaded[pk] = name
+        if not loaded:
+            return loaded
+        self._load_tags(Restaurant.features.through, 'featuretag_id', self._features, queryset)
+        self._load_tags(
+            Restaurant.additional_filters.through,
+            'additionalfilter_id',
+            self._additional,
+            queryset,
+        )
+        return loaded
+
+    def _load_tags(self, through, key_field, bitmap, queryset):
+        links = through.objects.filter(restaurant__in=queryset.order_by().values('pk'))
+        for restaurant_id, key in links.values_list('restaurant_id', key_field):
+            slot = self._slots.get(restaurant_id)
+            if slot is None:
+                continue
+            bitmap[key] = bitmap.get(key, 0) | (1 << slot)
+
+    # -- queries ---------------------------------------------------------
+
+    def match(
+        self,
+        district=None,
+        features=(),
+        additional=(),
+        feature_match=MATCH_ANY,
+        additional_match=MATCH_ANY,
+    ):
+        self.ensure_fresh()
+        with self._lock:
+            return self._match(district, features, additional, feature_match, additional_match)
+
+    def _match(self, district, features, additional, feature_match, additional_match):
+        bits = self._active
+        if district:
+            bits &= self._districts.get(district, 0)
+        bits &= self._combine(self._features, features, feature_match)
+        bits &= self._combine(self._additional, additional, additional_match)
+        return bits
+
+    def facet_counts(
+        self,
+        district=None,
+        features=(),
+        additional=(),
+        feature_match=MATCH_ANY,
+        additional_match=MATCH_ANY,
+    ):
+        """Count matches per district/feature/additional key if that option were also picked.
+
+        Returns ``(count, {'district': {...}, 'feature': {...}, 'additional': {...}})``.
+        """
+        self.ensure_fresh()
+        params = (district, features, additional, feature_match, additional_match)
+        with self._lock:
+            current = self._match(*params)
+            base = self._match(None, *params[1:])
+            counts = {
+                'district': {
+                    slug: (base & bits).bit_count() for slug, bits in self._districts.items()
+                },
+            }
+            base = self._match(district, (), additional, feature_match, additional_match)
+            counts['feature'] = self._tag_counts(
+                self._features, current, base, features, feature_match
+            )
+            base = self._match(district, features, (), feature_match, additional_match)
+            counts['additional'] = self._tag_counts(
+                self._additional, current, base, additional, additional_match
+            )
+            return current.bit_count(), counts
+
+    def _tag_counts(self, bitmap, current, base, selected, mode):
+        selected = [key for key in selected if key]
+        if mode == MATCH_ALL or not selected:
+            return {key: (current & bits).bit_count() for key, bits in bitmap.items()}
+        chosen = self._combine(bitmap, selected, MATCH_ANY)
+        return {key: (base & (chosen | bits)).bit_count() for key, bits in bitmap.items()}
+
+    def _combine(self, bitmap, keys, mode):
+        keys = [key for key in keys if key]
+        if not keys:
+            return self._active
+        if mode == MATCH_ALL:
+            bits = self._active
+            for key in keys:
+                bits &= bitmap.get(key, 0)
+            return bits
+        bits = 0
+        for key in keys:
+            bits |= bitmap.get(key, 0)
+        return bits
+
+    def page(self, bits, ordering='-rating', offset=0, limit=None):
+        """Return the PKs of ``bits`` in ``ordering`` order, sliced."""
+        with self._lock:
+            order = self._order(ordering)
+            mask = bits.to_bytes((len(self._rows) + 7) // 8 or 1, 'little')
+            rows = self._rows
+        pks = []
+        seen = 0
+        for slot in order:
+            if not mask[slot >> 3] >> (slot & 7) & 1:
+                continue
+            if seen >= offset:
+                pks.append(rows[slot][0])
+                if limit is not None and len(pks) >= limit:
+                    break
+            seen += 1
+        return pks
+
+    def _order(self, ordering):
+        order = self._orders.get(ordering)
+        if order is None:
+            key = _sort_key(ordering)
+            live = [slot for slot, row in enumerate(self._rows) if row is not None]
+            order = sorted(live, key=lambda slot: key(slot, self._rows[slot]))
+            self._orders[ordering] = order
+        return order
+
+
+facet_index = FacetIndex(ttl=getattr(settings, 'RESTAURANT_FACET_INDEX_TTL', 300))
+
+
+def facet_index_enabled() -> bool:
+    return getattr(settings, 'RESTAURANT_FACET_INDEX', False)
+
+
+def _without(filterset, name):
+    data = filterset.data.copy()
+    data.pop(name, None)
+    narrowed = type(filterset)(data, queryset=filterset.queryset, request=filterset.request)
+    return narrowed.qs.order_by().values('pk')
+
+
+def _grouped(queryset, field, count_field):
+    rows = queryset.order_by().values(field).annotate(n=Count(count_field))
+    return {row[field]: row['n'] for row in rows}
+
+
+def _widens(params, facet):
+    """True when ticking another ``facet`` key widens the result ("any of" with a selection)."""
+    return params[f'{facet}_match'] != MATCH_ALL and bool(params[FACET_PARAMS[facet]])
+
+
+def _database_facet_counts(filterset, params):
+    current = filterset.qs.order_by().values('pk')
+    count = Restaurant.objects.filter(pk__in=current).count()
+    counts = {
+        'district': _grouped(
+            Restaurant.objects.filter(pk__in=_without(filterset, 'district')),
+            'district__slug',
+            'pk',
+        ),
+    }
+    for facet, through, key_field in (
+        ('feature', Restaurant.features.through, 'featuretag_id'),
+        ('additional', Restaurant.additional_filters.through, 'additionalfilter_id'),
+    ):
+        if not _widens(params, facet):
+            links = through.objects.filter(restaurant__in=current)
+            counts[facet] = _grouped(links, key_field, 'restaurant_id')
+            continue
+        # Ticking X adds the rows tagged X that only the other filters already allow.
+        links = through.objects.filter(restaurant__in=_without(filterset, facet)).exclude(
+            restaurant__in=current
+        )
+        grouped = _grouped(links, key_field, 'restaurant_id')
+        counts[facet] = {key: count + n for key, n in grouped.items()}
+    return count, counts
+
+
+def facet_counts(filterset):
+    """Per-option match counts for the filter sidebar, in a fixed number of queries."""
+    params = filterset.facet_params()
+    if facet_index_enabled() and filterset.index_answerable():
+        count, counts = facet_index.facet_counts(**params)
+    else:
+        count, counts = _database_facet_counts(filterset, params)
+    feature_default = count if _widens(params, 'feature') else 0
+    additional_default = count if _widens(params, 'additional') else 0
+    return {
+        'count': count,
+        'districts': [
+            {'slug': slug, 'name': name, 'count': counts['district'].get(slug, 0)}
+            for slug, name in District.objects.values_list('slug', 'name')
+        ],
+        'features': [
+            {'key': key, 'label': label, 'count': counts['feature'].get(key, feature_default)}
+            for key, label in FeatureTag.objects.values_list('key', 'label')
+        ],
+        'additional_filters': [
+            {
+                'key': key,
+                'label': label,
+                'emoji': emoji,
+                'count': counts['additional'].get(key, additional_default),
+            }
+            for key, label, emoji in AdditionalFilter.objects.values_list('key', 'label', 'emoji')
+        ],
+    }
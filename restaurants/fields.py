@@ -0,0 +1,100 @@
+"""Model fields shared by the restaurant schema."""
+import json
+
+from django.db import NotSupportedError, models
+from django.db.models import Lookup
+
+
+class TagKeysField(models.Field):
+    """A list of tag keys: ``varchar[]`` on PostgreSQL, a JSON array in text elsewhere.
+
+    Supports ``overlap`` (any of the given keys) and ``contains`` (all of them)
+    lookups, which PostgreSQL answers from a GIN index and SQLite by probing
+    the JSON text.
+    """
+
+    description = 'List of tag keys'
+
+    def __init__(self, *args, key_length=32, **kwargs):
+        self.key_length = key_length
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.key_length != 32:
+            kwargs['key_length'] = self.key_length
+        return name, path, args, kwargs
+
+    def db_type(self, connection):
+        if connection.vendor == 'postgresql':
+            return f'varchar({self.key_length})[]'
+        return 'text'
+
+    def to_python(self, value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return json.loads(value)
+        return list(value)
+
+    def from_db_value(self, value, expression, connection):  # noqa: ARG002
+        return self.to_python(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):  # noqa: ARG002
+        value = self.to_python(value)
+        if connection.vendor == 'postgresql':
+            return value
+        return json.dumps(value)
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj))
+
+
+class TagKeysLookup(Lookup):
+    postgresql_operator = None
+    sqlite_connector = None
+    # Result for an empty key list (as PostgreSQL's array operators answer it).
+    matches_empty = False
+
+    def get_db_prep_lookup(self, value, connection):
+        return '%s', [self.lhs.output_field.get_db_prep_value(value, connection)]
+
+    def as_sql(self, compiler, connection):  # noqa: ARG002
+        raise NotSupportedError(f'{self.lookup_name} on tag keys needs PostgreSQL or SQLite.')
+
+    def as_postgresql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        db_type = self.lhs.output_field.db_type(connection)
+        return f'{lhs} {self.postgresql_operator} {rhs}::{db_type}', [*lhs_params, *rhs_params]
+
+    def as_sqlite(self, compiler, connection):
+        # The column holds the sorted keys as a JSON array, so a key is present
+        # exactly when its quoted JSON string is. ``instr()`` finds it without
+        # parsing the document, which ``json_each()`` would do for every row.
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        keys = list(dict.fromkeys(self.rhs))
+        if not keys:
+            return ('1 = 1' if self.matches_empty else '1 = 0'), []
+        probes = self.sqlite_connector.join(f'instr({lhs}, %s) > 0' for _ in keys)
+        params = [param for key in keys for param in (*lhs_params, json.dumps(key))]
+        return f'({probes})', params
+
+
+@TagKeysField.register_lookup
+class TagKeysOverlap(TagKeysLookup):
+    """Rows carrying at least one of the given keys."""
+
+    lookup_name = 'overlap'
+    postgresql_operator = '&&'
+    sqlite_connector = ' OR '
+
+
+@TagKeysField.register_lookup
+class TagKeysContains(TagKeysLookup):
+    """Rows carrying every one of the given keys."""
+
+    lookup_name = 'contains'
+    postgresql_operator = '@>'
+    sqlite_connector = ' AND '
+    matches_empty = True
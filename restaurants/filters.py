@@ -1,27 +1,113 @@
 import django_filters
+from django.core.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
 
+from .facets import MATCH_ALL, MATCH_ANY
+from .geo import nearby
 from .models import Restaurant
+from .pagination import TIE_BREAKERS
+
+MATCH_CHOICES = [(MATCH_ANY, 'Any of'), (MATCH_ALL, 'All of')]
+DEFAULT_RADIUS_M = 2000
+MAX_RADIUS_M = 50_000
+
+
+class LatLngFilter(django_filters.CharFilter):
+    """Parses ``lat,lng`` into a pair of floats."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.extra['validators'] = [self.validate]
+
+    @staticmethod
+    def validate(value):
+        try:
+            latitude, longitude = (float(part) for part in value.split(','))
+        except ValueError:
+            raise ValidationError('Expected "lat,lng".') from None
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError('Coordinates out of range.')
 
 
 class RestaurantFilter(django_filters.FilterSet):
     district = django_filters.CharFilter(field_name='district__slug')
     feature = django_filters.CharFilter(method='filter_feature')
     additional = django_filters.CharFilter(method='filter_additional')
+    feature_match = django_filters.ChoiceFilter(choices=MATCH_CHOICES, method='filter_match_mode')
+    additional_match = django_filters.ChoiceFilter(
+        choices=MATCH_CHOICES, method='filter_match_mode'
+    )
+    near = LatLngFilter(method='filter_near')
+    radius_m = django_filters.NumberFilter(
+        method='filter_match_mode', min_value=1, max_value=MAX_RADIUS_M
+    )
 
     class Meta:
         model = Restaurant
         fields = ['district']
 
     def filter_feature(self, queryset, name, value):
-        values = self.data.getlist(name) if hasattr(self.data, 'getlist') else [value]
-        cleaned = [v for v in values if v]
-        if not cleaned:
-            return queryset
-        return queryset.filter(features__key__in=cleaned).distinct()
+        return self._filter_tags(queryset, name, value, 'feature_keys')
 
     def filter_additional(self, queryset, name, value):
-        values = self.data.getlist(name) if hasattr(self.data, 'getlist') else [value]
-        cleaned = [v for v in values if v]
+        return self._filter_tags(queryset, name, value, 'additional_keys')
+
+    def filter_match_mode(self, queryset, name, value):  # noqa: ARG002
+        # Consumed by ``filter_feature`` / ``filter_additional`` / ``filter_near``.
+        return queryset
+
+    def filter_near(self, queryset, name, value):  # noqa: ARG002
+        latitude, longitude = (float(part) for part in value.split(','))
+        radius = self.form.cleaned_data.get('radius_m') or DEFAULT_RADIUS_M
+        return nearby(queryset, latitude, longitude, float(radius))
+
+    def get_values(self, name):
+        values = self.data.getlist(name) if hasattr(self.data, 'getlist') else [self.data.get(name)]
+        return [v for v in values if v]
+
+    def get_match_mode(self, name):
+        return self.form.cleaned_data.get(f'{name}_match') or MATCH_ANY
+
+    def _filter_tags(self, queryset, name, value, column):  # noqa: ARG002
+        # Matches against the denormalized key column: no join, so no ``distinct()``.
+        cleaned = list(dict.fromkeys(self.get_values(name)))
         if not cleaned:
             return queryset
-        return queryset.filter(additional_filters__key__in=cleaned).distinct()
+        lookup = 'contains' if self.get_match_mode(name) == MATCH_ALL else 'overlap'
+        return queryset.filter(**{f'{column}__{lookup}': cleaned})
+
+    def index_answerable(self):
+        """True when ``FacetIndex`` can answer this filter state on its own."""
+        return not self.form.cleaned_data.get('near')
+
+    def facet_params(self):
+        """Return the cleaned filter state as keyword arguments for ``FacetIndex.match``."""
+        return {
+            'district': self.form.cleaned_data.get('district') or None,
+            'features': self.get_values('feature'),
+            'additional': self.get_values('additional'),
+            'feature_match': self.get_match_mode('feature'),
+            'additional_match': self.get_match_mode('additional'),
+        }
+
+
+class RestaurantOrderingFilter(OrderingFilter):
+    """``OrderingFilter`` that orders by ``distance`` for ``?near=`` queries.
+
+    ``distance`` only exists as an annotation on proximity queries; it becomes
+    the default ordering there and is ignored everywhere else. Ties are broken
+    by the keyset ``TIE_BREAKERS``, as the facet index breaks them.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = self._get_ordering(request, queryset, view)
+        present = {term.lstrip('-') for term in ordering}
+        return [*ordering, *(field for field in TIE_BREAKERS if field not in present)]
+
+    def _get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if 'distance' not in queryset.query.annotations:
+            return [term for term in ordering if term.lstrip('-') != 'distance'] or view.ordering
+        if not request.query_params.get(self.ordering_param):
+            return ['distance']
+        return ordering
@@ -0,0 +1,128 @@
+"""Geohash cells and proximity queries that run on SQLite and plain Postgres.
+
+Every restaurant stores the geohash of its coordinates. A "near me" query
+covers the search circle's bounding box with the finest geohash cells that
+still keep the cover at ``MAX_COVERING_CELLS`` or fewer. Those cells become
+indexed range scans on ``geohash``, the box trims them further, and the exact
+haversine distance is only evaluated for the surviving rows.
+"""
+import math
+
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_M = 6_371_008.8
+GEOHASH_PRECISION = 9
+MAX_COVERING_CELLS = 16
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        rng, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if coordinate >= mid:
+            value = value << 1 | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def geohash_for(latitude, longitude):
+    if latitude is None or longitude is None:
+        return ''
+    return encode(float(latitude), float(longitude))
+
+
+def cell_size(precision):
+    """``(height, width)`` in degrees of a geohash cell at ``precision``."""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def bounding_box(latitude, longitude, radius_m):
+    """``(south, north, west, east)`` of the circle of ``radius_m`` around the point."""
+    angle = radius_m / EARTH_RADIUS_M
+    dlat = math.degrees(angle)
+    ratio = math.sin(angle) / max(math.cos(math.radians(latitude)), 1e-12)
+    dlng = 180.0 if ratio >= 1 else math.degrees(math.asin(ratio))
+    return (
+        max(latitude - dlat, -90.0),
+        min(latitude + dlat, 90.0),
+        max(longitude - dlng, -180.0),
+        min(longitude + dlng, 180.0),
+    )
+
+
+def _steps(low, high, step):
+    count = math.floor(high / step) - math.floor(low / step) + 1
+    return [min(low + i * step, high) for i in range(count)] + [high]
+
+
+def covering_cells(box, max_cells=MAX_COVERING_CELLS):
+    """Geohash prefixes whose cells cover ``box``, as fine as ``max_cells`` allows."""
+    south, north, west, east = box
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.floor(north / height) - math.floor(south / height) + 1
+        columns = math.floor(east / width) - math.floor(west / width) + 1
+        if rows * columns <= max_cells:
+            break
+    # Sampling every cell-sized step (plus the far edge) touches each cell once.
+    return sorted(
+        {
+            encode(lat, lng, precision)
+            for lat in _steps(south, north, height)
+            for lng in _steps(west, east, width)
+        }
+    )
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(1.0, a)))
+
+
+def distance_expression(latitude, longitude):
+    """Haversine distance in metres from ``(latitude, longitude)`` as a SQL expression."""
+    lat = Radians(Cast(F('latitude'), FloatField()))
+    lng = Radians(Cast(F('longitude'), FloatField()))
+    origin_lat = math.radians(latitude)
+    origin_lng = math.radians(longitude)
+    a = Power(Sin((lat - origin_lat) / 2), 2) + math.cos(origin_lat) * Cos(lat) * Power(
+        Sin((lng - origin_lng) / 2), 2
+    )
+    return 2 * EARTH_RADIUS_M * ASin(Sqrt(a))
+
+
+def nearby(queryset, latitude, longitude, radius_m):
+    """Restrict ``queryset`` to rows within ``radius_m`` and annotate ``distance`` (metres)."""
+    box = bounding_box(latitude, longitude, radius_m)
+    cells = Q()
+    for prefix in covering_cells(box):
+        cells |= Q(geohash__gte=prefix, geohash__lt=prefix + '~')
+    south, north, west, east = box
+    return (
+        queryset.filter(cells)
+        .filter(latitude__range=(south, north), longitude__range=(west, east))
+        .annotate(distance=distance_expression(latitude, longitude))
+        .filter(distance__lte=radius_m)
+    )
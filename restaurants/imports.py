@@ -0,0 +1,153 @@
+"""Streaming, batched restaurant catalogue import behind ``manage.py import_restaurants``.
+
+Rows are read one at a time from NDJSON or CSV, validated with the rules of
+``RestaurantWriteSerializer`` against taxonomy maps loaded once up front, and
+upserted on ``slug`` a batch at a time with ``bulk_create``/``bulk_update``
+and bulk through-table writes, so memory stays flat and the query count per
+batch is fixed regardless of catalogue size.
+"""
+import csv
+import json
+import time
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .bulk import TAG_FIELDS, preloaded_write_serializer, replace_links
+from .geo import geohash_for
+from .models import Restaurant
+from .scores import restaurant_score
+from .signals import refresh_restaurants
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+FORMATS = (NDJSON, CSV)
+LIST_SEPARATOR = '|'
+UPSERT_FIELDS = [
+    field.name
+    for field in Restaurant._meta.concrete_fields
+    if not field.primary_key and field.name not in {'slug', 'created_at'}
+]
+
+
+def read_ndjson(stream):
+    """Yield ``(line_number, row)``; unparsable lines yield their error message instead."""
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, f'Invalid JSON: {exc}'
+            continue
+        yield number, row if isinstance(row, dict) else 'Expected a JSON object.'
+
+
+def read_csv(stream, separator=LIST_SEPARATOR):
+    """Yield ``(line_number, row)``; empty cells are omitted, tag columns are split."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        cleaned = {key: value for key, value in row.items() if key and value not in ('', None)}
+        for field in TAG_FIELDS:
+            if field in cleaned:
+                cleaned[field] = [key for key in cleaned[field].split(separator) if key]
+        yield reader.line_num, cleaned
+
+
+class ImportStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.read = 0
+        self.created = 0
+        self.updated = 0
+        self.rejected = 0
+        self.batches = 0
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+
+class RestaurantImporter:
+    """Validate and upsert rows from ``read_ndjson``/``read_csv`` in batches of ``batch_size``.
+
+    ``on_reject(line, errors, row)`` is called for every invalid row and
+    ``on_batch(stats)`` after every committed batch.
+    """
+
+    def __init__(self, batch_size=1000, on_reject=None, on_batch=None):
+        self.batch_size = batch_size
+        self.on_reject = on_reject or (lambda line, errors, row: None)
+        self.on_batch = on_batch or (lambda stats: None)
+        self.serializer = preloaded_write_serializer()
+        self.stats = ImportStats()
+
+    def run(self, rows):
+        batch = {}
+        for line, row in rows:
+            self.stats.read += 1
+            data = self.validate(line, row)
+            if data is None:
+                continue
+            # A later row for the same slug replaces the earlier one.
+            batch[data['slug']] = data
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = {}
+        if batch:
+            self.flush(batch)
+        return self.stats
+
+    def validate(self, line, row):
+        if isinstance(row, str):
+            errors = {'non_field_errors': [row]}
+        else:
+            try:
+                return self.serializer.run_validation(row)
+            except serializers.ValidationError as exc:
+                errors = exc.detail
+        self.stats.rejected += 1
+        self.on_reject(line, errors, row)
+        return None
+
+    @transaction.atomic
+    def flush(self, batch):
+        existing = Restaurant.objects.in_bulk(list(batch), field_name='slug')
+        restaurants = []
+        tags = {field: {} for field in TAG_FIELDS}
+        for slug, data in batch.items():
+            data = dict(data)
+            restaurant = existing.get(slug) or Restaurant()
+            for field in TAG_FIELDS:
+                keys = data.pop(field, None)
+                if keys is not None:
+                    tags[field][slug] = keys
+                    setattr(restaurant, field, sorted(keys))
+            for name, value in data.items():
+                setattr(restaurant, name, value)
+            # Bulk writes skip ``Restaurant.save()``, which normally sets these.
+            restaurant.geohash = geohash_for(restaurant.latitude, restaurant.longitude)
+            restaurant.score = restaurant_score(restaurant)
+            restaurants.append(restaurant)
+
+        # Existing rows are loaded whole, so one INSERT ... ON CONFLICT (slug)
+        # DO UPDATE writes new and changed rows alike without clobbering
+        # fields a row left out.
+        Restaurant.objects.bulk_create(
+            restaurants, update_conflicts=True, unique_fields=['slug'], update_fields=UPSERT_FIELDS
+        )
+        pks = {restaurant.slug: restaurant.pk for restaurant in restaurants}
+        for field, keys_by_slug in tags.items():
+            replace_links(
+                TAG_FIELDS[field], {pks[slug]: keys for slug, keys in keys_by_slug.items()}
+            )
+        refresh_restaurants(pks.values())
+
+        self.stats.created += len(restaurants) - len(existing)
+        self.stats.updated += len(existing)
+        self.stats.batches += 1
+        self.on_batch(self.stats)
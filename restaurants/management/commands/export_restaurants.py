@@ -0,0 +1,37 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from restaurants.exports import CHUNK_SIZE, gzipped, ndjson_lines
+
+
+class Command(BaseCommand):
+    help = 'Stream every active restaurant as NDJSON (one detail payload per line).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help='Output file, or "-" for stdout.')
+        parser.add_argument('--gzip', action='store_true', help='Gzip-compress the output.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        started = time.monotonic()
+        chunks = ndjson_lines(chunk_size=options['chunk_size'])
+        if options['gzip']:
+            chunks = gzipped(chunks)
+        path = options['path']
+        output = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        written = 0
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+        if path != '-':
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Wrote {written} bytes to {path} in {time.monotonic() - started:.2f}s.'
+                )
+            )
@@ -0,0 +1,77 @@
+import json
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from restaurants.imports import (
+    CSV,
+    FORMATS,
+    LIST_SEPARATOR,
+    NDJSON,
+    RestaurantImporter,
+    read_csv,
+    read_ndjson,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream a restaurant catalogue from NDJSON or CSV and upsert it on slug in batches. '
+        'Districts may be given by slug or id; CSV tag columns (feature_keys, additional_keys) '
+        'are separated by "|".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON or CSV file, or "-" for stdin.')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--separator', default=LIST_SEPARATOR, help='CSV tag separator.')
+        parser.add_argument('--rejects', help='Write rejected rows to this NDJSON file.')
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        self.verbosity = options['verbosity']
+        path = options['path']
+        fmt = options['format'] or (CSV if path.lower().endswith('.csv') else NDJSON)
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        rejects = open(options['rejects'], 'w', encoding='utf-8') if options['rejects'] else None
+        stream = sys.stdin if path == '-' else None
+        try:
+            if stream is None:
+                try:
+                    stream = Path(path).open(encoding='utf-8-sig', newline='')
+                except OSError as exc:
+                    raise CommandError(f'Cannot read {path}: {exc}') from exc
+            rows = read_csv(stream, options['separator']) if fmt == CSV else read_ndjson(stream)
+            importer = RestaurantImporter(
+                batch_size=options['batch_size'],
+                on_reject=lambda line, errors, row: self.reject(rejects, line, errors, row),
+                on_batch=self.progress,
+            )
+            stats = importer.run(rows)
+        finally:
+            if stream is not None and stream is not sys.stdin:
+                stream.close()
+            if rejects is not None:
+                rejects.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Read {stats.read} rows: {stats.created} created, {stats.updated} updated, '
+                f'{stats.rejected} rejected in {stats.elapsed:.2f}s ({stats.rate:.0f} rows/s).'
+            )
+        )
+
+    def reject(self, rejects, line, errors, row):
+        if rejects is not None:
+            rejects.write(json.dumps({'line': line, 'errors': errors, 'row': row}) + '\n')
+        if self.verbosity >= 1:
+            self.stderr.write(f'Line {line}: {json.dumps(errors, ensure_ascii=False)}')
+
+    def progress(self, stats):
+        if self.verbosity >= 2:
+            self.stdout.write(
+                f'Batch {stats.batches}: {stats.read} rows read, {stats.rate:.0f} rows/s.'
+            )
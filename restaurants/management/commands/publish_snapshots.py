@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from restaurants.snapshots import snapshot_publisher, snapshot_root
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the taxonomy lists and the first restaurant pages (overall and per district) '
+        'to hashed, precompressed JSON files under STATIC_ROOT and update their manifest. '
+        'Run it after collectstatic, or periodically.'
+    )
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        started = time.monotonic()
+        manifest = snapshot_publisher.publish()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Published {len(manifest["snapshots"])} snapshots to {snapshot_root()} '
+                f'in {time.monotonic() - started:.2f}s.'
+            )
+        )
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+from restaurants.geo import geohash_for
+
+
+def backfill_geohash(apps, schema_editor):  # noqa: ARG001
+    Restaurant = apps.get_model('restaurants', 'Restaurant')
+    rows = Restaurant.objects.exclude(latitude=None).exclude(longitude=None)
+    batch = []
+    for restaurant in rows.only('pk', 'latitude', 'longitude').iterator(chunk_size=1000):
+        restaurant.geohash = geohash_for(restaurant.latitude, restaurant.longitude)
+        batch.append(restaurant)
+        if len(batch) >= 1000:
+            Restaurant.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        Restaurant.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('restaurants', '0002_taxonomy_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
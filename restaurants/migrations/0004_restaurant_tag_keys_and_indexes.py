@@ -0,0 +1,106 @@
+from collections import defaultdict
+
+from django.db import migrations, models
+
+import restaurants.fields
+
+TAG_COLUMNS = {
+    'features': ('feature_keys', 'featuretag_id'),
+    'additional_filters': ('additional_keys', 'additionalfilter_id'),
+}
+GIN_INDEXES = {
+    'restaurant_feature_keys_gin': 'feature_keys',
+    'restaurant_additional_keys_gin': 'additional_keys',
+}
+
+
+def backfill_tag_keys(apps, schema_editor):  # noqa: ARG001
+    Restaurant = apps.get_model('restaurants', 'Restaurant')
+    keys = defaultdict(dict)
+    for name, (column, target) in TAG_COLUMNS.items():
+        through = Restaurant._meta.get_field(name).remote_field.through
+        for restaurant_id, key in through.objects.values_list('restaurant_id', target):
+            keys[restaurant_id].setdefault(column, []).append(key)
+    batch = []
+    for restaurant in Restaurant.objects.only('pk').iterator(chunk_size=1000):
+        if restaurant.pk not in keys:
+            continue
+        for column, values in keys[restaurant.pk].items():
+            setattr(restaurant, column, sorted(values))
+        batch.append(restaurant)
+        if len(batch) >= 1000:
+            Restaurant.objects.bulk_update(batch, ['feature_keys', 'additional_keys'])
+            batch = []
+    if batch:
+        Restaurant.objects.bulk_update(batch, ['feature_keys', 'additional_keys'])
+
+
+def create_gin_indexes(apps, schema_editor):  # noqa: ARG001
+    # Arrays only exist on PostgreSQL; SQLite keeps JSON text and no index.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in GIN_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX {name} ON restaurants_restaurant USING gin ({column}) '
+            'WHERE is_active'
+        )
+
+
+def drop_gin_indexes(apps, schema_editor):  # noqa: ARG001
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in GIN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('restaurants', '0003_restaurant_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='feature_keys',
+            field=restaurants.fields.TagKeysField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='additional_keys',
+            field=restaurants.fields.TagKeysField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(backfill_tag_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(
+                condition=models.Q(('is_active', True)),
+                fields=['-rating', 'name', 'id'],
+                name='restaurant_active_rating_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(
+                condition=models.Q(('is_active', True)),
+                fields=['district', '-rating', 'name', 'id'],
+                name='restaurant_district_rating_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(
+                condition=models.Q(('is_active', True)),
+                fields=['price_tier', 'name', 'id'],
+                name='restaurant_active_price_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(
+                condition=models.Q(('is_active', True)),
+                fields=['updated_at'],
+                name='restaurant_active_updated_idx',
+            ),
+        ),
+        migrations.RunPython(create_gin_indexes, drop_gin_indexes),
+    ]
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg
+
+
+def bayesian_score(rating, review_count, mean, weight):
+    # Frozen copy of ``restaurants.scores.bayesian_score`` as of this migration.
+    total = weight + review_count
+    if not total:
+        return round(float(rating), 4)
+    return round((weight * mean + float(rating) * review_count) / total, 4)
+
+
+def backfill_scores(apps, schema_editor):  # noqa: ARG001
+    Restaurant = apps.get_model('restaurants', 'Restaurant')
+    mean = Restaurant.objects.filter(is_active=True, review_count__gt=0).aggregate(
+        mean=Avg('rating')
+    )['mean']
+    mean = float(mean or 0)
+    weight = getattr(settings, 'RESTAURANT_SCORE_PRIOR_WEIGHT', 25)
+    rows = Restaurant.objects.only('pk', 'rating', 'review_count')
+    batch = []
+    for restaurant in rows.iterator(chunk_size=1000):
+        restaurant.score = bayesian_score(
+            restaurant.rating, restaurant.review_count, mean, weight
+        )
+        batch.append(restaurant)
+        if len(batch) >= 1000:
+            Restaurant.objects.bulk_update(batch, ['score'])
+            batch = []
+    if batch:
+        Restaurant.objects.bulk_update(batch, ['score'])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('restaurants', '0004_restaurant_tag_keys_and_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(
+                condition=models.Q(('is_active', True)),
+                fields=['-score', 'name', 'id'],
+                name='restaurant_active_score_idx',
+            ),
+        ),
+    ]
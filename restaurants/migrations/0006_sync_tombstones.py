@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('restaurants', '0005_restaurant_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('resource', models.CharField(max_length=32)),
+                ('key', models.CharField(max_length=64)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['deleted_at'], name='tombstone_deleted_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(fields=['updated_at', 'id'], name='restaurant_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('restaurants', '0006_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='scored_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(fields=['scored_at'], name='restaurant_scored_idx'),
+        ),
+    ]
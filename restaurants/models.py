@@ -1,11 +1,20 @@
 import uuid
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
+
+from .fields import TagKeysField
+from .geo import geohash_for
+from .scores import restaurant_score
+
+# Tag many-to-many field -> its denormalized, sorted ``Restaurant`` key column.
+TAG_KEY_COLUMNS = {'features': 'feature_keys', 'additional_filters': 'additional_keys'}
 
 
 class District(models.Model):
     name = models.CharField(max_length=80, unique=True)
     slug = models.SlugField(unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['name']
@@ -13,10 +22,17 @@ class District(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args, **kwargs):
+        # A rename also touches the restaurants embedding it (see ``signals``);
+        # both land in one transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class FeatureTag(models.Model):
     key = models.CharField(primary_key=True, max_length=32)
     label = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['label']
@@ -29,6 +45,7 @@ class AdditionalFilter(models.Model):
     key = models.CharField(primary_key=True, max_length=32)
     label = models.CharField(max_length=64)
     emoji = models.CharField(max_length=8, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['label']
@@ -46,17 +63,85 @@ class Restaurant(models.Model):
     address = models.CharField(max_length=255, blank=True)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
     price_tier = models.PositiveSmallIntegerField(default=2)
     rating = models.DecimalField(max_digits=3, decimal_places=1, default=0)
     review_count = models.PositiveIntegerField(default=0)
+    # Bayesian average of ``rating`` and ``review_count``; see ``restaurants.scores``.
+    score = models.FloatField(default=0, editable=False)
+    # Set by ``recompute_scores()``, which rewrites ``score`` without touching ``updated_at``.
+    scored_at = models.DateTimeField(null=True, blank=True, editable=False)
     features = models.ManyToManyField(FeatureTag, blank=True, related_name='restaurants')
     additional_filters = models.ManyToManyField(AdditionalFilter, blank=True, related_name='restaurants')
+    # Sorted copies of the tag keys so ``feature``/``additional`` filters need no joins.
+    feature_keys = TagKeysField(default=list, blank=True, editable=False)
+    additional_keys = TagKeysField(default=list, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-rating', 'name']
+        # Shapes of ``RestaurantViewSet`` reads: active rows in each list ordering
+        # (with the keyset tie-breakers), per district, and the list validators.
+        indexes = [
+            models.Index(
+                fields=['-rating', 'name', 'id'],
+                condition=Q(is_active=True),
+                name='restaurant_active_rating_idx',
+            ),
+            models.Index(
+                fields=['district', '-rating', 'name', 'id'],
+                condition=Q(is_active=True),
+                name='restaurant_district_rating_idx',
+            ),
+            models.Index(
+                fields=['-score', 'name', 'id'],
+                condition=Q(is_active=True),
+                name='restaurant_active_score_idx',
+            ),
+            models.Index(
+                fields=['price_tier', 'name', 'id'],
+                condition=Q(is_active=True),
+                name='restaurant_active_price_idx',
+            ),
+            models.Index(
+                fields=['updated_at'],
+                condition=Q(is_active=True),
+                name='restaurant_active_updated_idx',
+            ),
+            models.Index(fields=['scored_at'], name='restaurant_scored_idx'),
+            # ``GET /api/sync/`` walks every change, deactivations included.
+            models.Index(fields=['updated_at', 'id'], name='restaurant_updated_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.name
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        derived = set()
+        if update_fields is None or {'latitude', 'longitude'} & set(update_fields):
+            self.geohash = geohash_for(self.latitude, self.longitude)
+            derived.add('geohash')
+        if update_fields is None or {'rating', 'review_count'} & set(update_fields):
+            self.score = restaurant_score(self)
+            derived.add('score')
+        if update_fields is not None and derived:
+            kwargs['update_fields'] = {*update_fields, *derived}
+        super().save(*args, **kwargs)
+
+
+class Tombstone(models.Model):
+    """A deleted catalogue row, reported to ``GET /api/sync/`` clients until pruned."""
+
+    # A ``restaurants.sync.RESOURCES`` name and the key clients know the row by.
+    resource = models.CharField(max_length=32)
+    key = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['deleted_at'], name='tombstone_deleted_idx')]
+
+    def __str__(self) -> str:
+        return f'{self.resource}:{self.key}'
@@ -0,0 +1,125 @@
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+TIE_BREAKERS = ('name', 'id')
+
+
+class RestaurantPagination(LimitOffsetPagination):
+    """Limit/offset pagination with an opt-in keyset (cursor) mode.
+
+    Passing ``?cursor=`` (empty for the first page) switches to keyset mode: the
+    queryset ordering is extended with ``name``/``id`` tie-breakers, each page
+    seeks past the last row of the previous one and the ``COUNT(*)`` is only
+    run when ``?count=1`` is given.
+    """
+
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+    cursor_mode = False
+
+    def is_cursor_request(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.is_cursor_request(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = self.get_keyset_ordering(queryset)
+        self.count = None
+        if request.query_params.get(self.count_query_param) in {'1', 'true'}:
+            self.count = queryset.count()
+
+        queryset = queryset.order_by(*self.ordering)
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            queryset = queryset.filter(self.seek_filter(queryset, self.decode_cursor(token)))
+
+        rows = list(queryset[: self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        self.page = rows[: self.limit]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        payload = {'next': self.get_next_link(), 'results': data}
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        values = [self._field_value(last, field.lstrip('-')) for field in self.ordering]
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        url = remove_query_param(url, self.count_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values))
+
+    # -- keyset helpers --------------------------------------------------
+
+    def get_keyset_ordering(self, queryset):
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        present = {field.lstrip('-') for field in ordering}
+        for field in TIE_BREAKERS:
+            if field not in present:
+                ordering.append(field)
+        return ordering
+
+    def encode_cursor(self, values):
+        payload = json.dumps({'o': self.ordering, 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            ordering, values = payload['o'], payload['v']
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if ordering != self.ordering or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def seek_filter(self, queryset, values):
+        """Build ``(a, b, c) > (x, y, z)`` honouring each field's direction."""
+        clauses = []
+        equal = Q()
+        for field, raw in zip(self.ordering, values):
+            name = field.lstrip('-')
+            try:
+                value = self._to_python(queryset, name, raw)
+            except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            clauses.append(equal & Q(**{f'{name}__{lookup}': value}))
+            equal &= Q(**{name: value})
+        return reduce(or_, clauses)
+
+    def _to_python(self, queryset, name, raw):
+        if name in queryset.query.annotations:
+            # Annotations such as ``distance`` are computed floats.
+            return None if raw is None else float(raw)
+        return queryset.model._meta.get_field(name).to_python(raw)
+
+    def _field_value(self, obj, name):
+        value = getattr(obj, name)
+        if isinstance(value, (int, float, str)) or value is None:
+            return value
+        return str(value)
@@ -0,0 +1,190 @@
+"""Restaurant list/detail payloads built from column tuples instead of serializers.
+
+``RestaurantListSerializer`` instantiates every row with its prefetched tags
+and walks a ``SlugRelatedField`` per tag. Here the page is fetched with one
+``values_list()`` query, the tag keys of the whole page with one query per
+through table, and each dict is assembled directly. Scalar values are still
+formatted by the serializers' own fields, so the output is identical.
+"""
+from collections import defaultdict
+from functools import cache
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+from .models import Restaurant
+from .pagination import TIE_BREAKERS
+from .serializers import RestaurantDetailSerializer, RestaurantListSerializer
+from .timing import phase
+
+# Payload key -> ``values_list()`` column (None for tag keys), in serializer field order.
+LIST_COLUMNS = {
+    'id': 'id',
+    'name': 'name',
+    'slug': 'slug',
+    'district': 'district__slug',
+    'district_name': 'district__name',
+    'price_tier': 'price_tier',
+    'rating': 'rating',
+    'review_count': 'review_count',
+    'features': None,
+    'additional_filters': None,
+}
+DETAIL_COLUMNS = {
+    **LIST_COLUMNS,
+    'description': 'description',
+    'address': 'address',
+    'latitude': 'latitude',
+    'longitude': 'longitude',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+TAG_FIELDS = ('features', 'additional_filters')
+# Values of these types are already what the serializer field would return.
+_NATIVE = (str, int, bool)
+# Added to list/detail payloads of ``near=`` queries.
+DISTANCE_FIELD = 'distance_m'
+
+
+def fast_payloads_enabled() -> bool:
+    return getattr(settings, 'RESTAURANT_FAST_PAYLOADS', True)
+
+
+def field_selection(query_params, detail=False):
+    """Payload keys picked by ``?fields=`` and ``?exclude=``, or None when neither is given.
+
+    Both take comma-separated (or repeated) payload keys; the result keeps
+    the serializer's field order.
+    """
+    available = [*(DETAIL_COLUMNS if detail else LIST_COLUMNS), DISTANCE_FIELD]
+    chosen = {}
+    for param in ('fields', 'exclude'):
+        values = query_params.getlist(param)
+        if not values:
+            continue
+        keys = {key.strip() for value in values for key in value.split(',')} - {''}
+        unknown = sorted(keys.difference(available))
+        if unknown:
+            raise ValidationError({param: [f'Unknown fields: {", ".join(unknown)}.']})
+        chosen[param] = keys
+    if not chosen:
+        return None
+    keys = chosen.get('fields', available)
+    excluded = chosen.get('exclude', ())
+    return tuple(key for key in available if key in keys and key not in excluded)
+
+
+def project(queryset, fields, detail=False):
+    """``queryset`` loading only the columns, join and prefetches that ``fields`` need."""
+    if fields is None:
+        return queryset
+    columns = _columns(detail, fields)
+    annotations = queryset.query.annotations
+    columns += [name for name in ordering_columns(queryset) if name not in annotations]
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if any(column.startswith('district__') for column in columns):
+        queryset = queryset.select_related('district')
+    return queryset.only(*columns).prefetch_related(
+        *(name for name in TAG_FIELDS if name in fields)
+    )
+
+
+def _columns(detail, fields=None):
+    """``values_list()`` columns for ``fields``, always including ``id`` for the tag lookups."""
+    columns = DETAIL_COLUMNS if detail else LIST_COLUMNS
+    return [
+        column
+        for key, column in columns.items()
+        if column and (fields is None or key in fields or column == 'id')
+    ]
+
+
+def rows(queryset, detail=False, fields=None):
+    """``queryset`` as named tuples carrying every column the payload needs.
+
+    ``fields`` (from ``field_selection()``) narrows the columns, and drops the
+    district join when no district key is wanted. The ordering columns are
+    always read, since keyset pagination takes its cursor from the last row.
+    """
+    columns = _columns(detail, fields)
+    if 'distance' in queryset.query.annotations and (fields is None or DISTANCE_FIELD in fields):
+        columns.append('distance')
+    columns += [name for name in ordering_columns(queryset) if name not in columns]
+    return queryset.select_related(None).prefetch_related(None).values_list(*columns, named=True)
+
+
+def payloads(page, detail=False, tags=None, fields=None):
+    """Serialize ``rows()`` output exactly like the list/detail serializers would.
+
+    ``tags`` maps each tag field to the page's ``tag_keys()`` when the caller
+    has already fetched them. ``fields`` limits the keys, and the tag queries,
+    to a ``field_selection()``.
+    """
+    page = list(page)
+    if not page:
+        return []
+    if tags is None:
+        pks = [row.id for row in page]
+        tags = {name: tag_keys(name, pks) for name in selected_tags(fields)}
+    with phase('serialize'):
+        columns = DETAIL_COLUMNS if detail else LIST_COLUMNS
+        if fields is not None:
+            columns = {key: column for key, column in columns.items() if key in fields}
+        formatters = _formatters(detail)
+        results = []
+        for row in page:
+            data = {}
+            for key, column in columns.items():
+                if column is None:
+                    data[key] = tags[key].get(row.id, [])
+                    continue
+                value = getattr(row, column)
+                if value is not None and not isinstance(value, _NATIVE):
+                    value = formatters[key](value)
+                data[key] = value
+            distance = getattr(row, 'distance', None)
+            if distance is not None and (fields is None or DISTANCE_FIELD in fields):
+                data[DISTANCE_FIELD] = round(distance)
+            results.append(data)
+        return results
+
+
+def ordering_columns(queryset):
+    """The columns ``queryset`` is ordered by, plus the keyset pagination tie-breakers."""
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    names = [term.lstrip('-') for term in ordering if isinstance(term, str)]
+    return [*names, *(name for name in TIE_BREAKERS if name not in names)]
+
+
+def selected_tags(fields=None):
+    """The ``TAG_FIELDS`` a ``field_selection()`` asks for."""
+    return tuple(name for name in TAG_FIELDS if fields is None or name in fields)
+
+
+@cache
+def _formatters(detail):
+    serializer_class = RestaurantDetailSerializer if detail else RestaurantListSerializer
+    fields = serializer_class().fields
+    columns = DETAIL_COLUMNS if detail else LIST_COLUMNS
+    return {key: fields[key].to_representation for key, column in columns.items() if column}
+
+
+def tag_keys(name, pks):
+    """``{restaurant_pk: [key, ...]}`` in the related model's default ordering."""
+    field = Restaurant._meta.get_field(name)
+    through = field.remote_field.through
+    target = field.m2m_reverse_field_name()
+    related = field.related_model
+    ordering = [
+        f'-{target}__{term[1:]}' if term.startswith('-') else f'{target}__{term}'
+        for term in related._meta.ordering
+    ]
+    links = (
+        through.objects.filter(restaurant_id__in=pks)
+        .order_by(*ordering)
+        .values_list('restaurant_id', f'{target}_id')
+    )
+    grouped = defaultdict(list)
+    for restaurant_id, key in links:
+        grouped[restaurant_id].append(key)
+    return grouped
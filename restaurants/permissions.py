@@ -1,10 +1,14 @@
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
+from .roles import EDITOR_CLAIM, editor_roles
+
 
 class IsRestaurantEditor(BasePermission):
-    """Allow safe methods to anyone, mutations only to editor group."""
+    """Allow safe methods to anyone, mutations only to editor group.
 
-    editor_group = 'editors'
+    Membership comes from ``editor_roles``, so no query runs per request. A
+    token whose ``editor`` claim is false is refused without any lookup.
+    """
 
     def has_permission(self, request, view):  # noqa: ARG002
         if request.method in SAFE_METHODS:
@@ -12,4 +16,7 @@ class IsRestaurantEditor(BasePermission):
         user = request.user
         if not user or not user.is_authenticated:
             return False
-        return user.groups.filter(name=self.editor_group).exists()
+        claims = request.auth
+        if hasattr(claims, 'get') and claims.get(EDITOR_CLAIM) is False:
+            return False
+        return editor_roles.is_editor(user.pk)
@@ -0,0 +1,33 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` that encodes with orjson when it is installed.
+
+    The output matches ``JSONRenderer``'s compact UTF-8 form byte for byte:
+    datetimes, decimals and anything else orjson does not handle natively go
+    through DRF's own encoder, and U+2028/U+2029 are escaped the same way.
+    Indented output, ints beyond 64 bits and non-string keys fall back to
+    ``JSONRenderer``. Floats below 1e-4 or from 1e16 up are written without
+    an exponent sign (``1e16`` rather than ``1e+16``); API payloads carry none.
+    """
+
+    _options = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS if orjson else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type or '', renderer_context or {})
+        fallback = orjson is None or data is None or self.ensure_ascii or not self.compact
+        if fallback or indent is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self._options)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -0,0 +1,49 @@
+"""Editor role lookups that mutating requests can afford to make on every call."""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+EDITOR_GROUP = 'editors'
+# Access and refresh token claim recording whether the user was an editor at sign-in.
+EDITOR_CLAIM = 'editor'
+
+
+class EditorRoles:
+    """Per-process set of active users in the editor group.
+
+    Tokens are trusted as signed, so a request carrying one costs no user or
+    group query. A token whose ``editor`` claim is true is still checked
+    against this set, reloaded with one query at most every ``ttl`` seconds:
+    users removed from the group or deactivated lose write access within
+    ``ttl`` everywhere, and at once in the process that made the change.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._user_ids = frozenset()
+        self._loaded_at = None
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def user_ids(self) -> frozenset:
+        with self._lock:
+            now = time.monotonic()
+            if self._loaded_at is None or now - self._loaded_at >= self.ttl:
+                self._user_ids = frozenset(
+                    get_user_model()
+                    .objects.filter(is_active=True, groups__name=EDITOR_GROUP)
+                    .values_list('pk', flat=True)
+                )
+                self._loaded_at = now
+            return self._user_ids
+
+    def is_editor(self, user_id) -> bool:
+        return user_id in self.user_ids()
+
+
+editor_roles = EditorRoles(ttl=getattr(settings, 'EDITOR_ROLES_TTL', 60))
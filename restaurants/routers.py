@@ -0,0 +1,153 @@
+"""Read-replica routing for the public catalogue reads.
+
+``DATABASE_REPLICA_URLS`` adds ``replica_1``, ``replica_2``... aliases, listed
+in ``DATABASE_REPLICAS``. ``ReplicaRouter`` only sends a read to one of them
+while a request has opted in (``ReplicaReadsMixin`` views and
+``read_replica()`` blocks). Writes, authentication, editor role checks and
+everything else stay on ``default``. Each request reads from a single
+replica, so its validators and payload come from the same snapshot.
+
+Replicas lag behind the primary. An editor who has just written is pinned
+to the primary for ``REPLICA_STICKY_SECONDS`` so they see their own change.
+The pin travels with the client as a short-lived signed cookie bound to the
+user, so it holds whichever worker or serverless instance the next request
+reaches.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+# Replica alias the current request reads from, if any.
+_replica = ContextVar('replica', default=None)
+# Set inside ``primary_reads()``: requests must not opt in to a replica.
+_primary_only = ContextVar('primary_only', default=False)
+
+PIN_COOKIE = 'bff_primary'
+PIN_SALT = 'restaurants.routers.pin'
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def _sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+
+def pin_to_primary(request, response):
+    """Send ``request.user``'s reads to the primary for the next ``REPLICA_STICKY_SECONDS``."""
+    user = request.user
+    if not replica_aliases() or _sticky_seconds() <= 0 or not user or not user.is_authenticated:
+        return
+    response.set_signed_cookie(
+        PIN_COOKIE,
+        str(user.pk),
+        salt=PIN_SALT,
+        max_age=_sticky_seconds(),
+        secure=request.is_secure(),
+        httponly=True,
+        samesite='Lax',
+    )
+
+
+def pinned_to_primary(request) -> bool:
+    user = request.user
+    if not user or not user.is_authenticated:
+        return False
+    pinned = request.get_signed_cookie(
+        PIN_COOKIE, default=None, salt=PIN_SALT, max_age=_sticky_seconds()
+    )
+    # Bound to the user: a pin copied to another account's requests does nothing.
+    return pinned == str(user.pk)
+
+
+def start_replica_reads(request):
+    """Route this request's reads to a replica; return the token for ``stop_replica_reads``."""
+    replicas = replica_aliases()
+    if not replicas or _primary_only.get() or request.method not in SAFE_METHODS:
+        return None
+    if pinned_to_primary(request):
+        return None
+    return _replica.set(random.choice(replicas))
+
+
+def stop_replica_reads(token):
+    if token is not None:
+        _replica.reset(token)
+
+
+@contextmanager
+def read_replica(request):
+    token = start_replica_reads(request)
+    try:
+        yield
+    finally:
+        stop_replica_reads(token)
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary in this block, even inside a replica request.
+
+    For reads that outlive the request, e.g. published snapshots and the
+    in-process indexes: built from a lagging replica, they would keep
+    serving the lag until their next rebuild.
+    """
+    primary_only, replica = _primary_only.set(True), _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(replica)
+        _primary_only.reset(primary_only)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):  # noqa: ARG002
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):  # noqa: ARG002
+        # Explicit, or Django would write instances back to the alias they were read from.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):  # noqa: ARG002
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):  # noqa: ARG002
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaReadsMixin:
+    """Serves ``replica_actions`` from a replica and pins editors to the primary after writes."""
+
+    replica_actions = frozenset({'list', 'retrieve'})
+    _replica_token = None
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # Unhandled errors skip ``finalize_response()``.
+            self.release_replica()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # After authentication, so that pinned editors are recognised.
+        if self.action in self.replica_actions:
+            self._replica_token = start_replica_reads(request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        self.release_replica()
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request, response)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def release_replica(self):
+        stop_replica_reads(self._replica_token)
+        self._replica_token = None
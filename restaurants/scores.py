@@ -0,0 +1,122 @@
+"""The ranking score stored on ``Restaurant.score``, behind ``ordering=score``.
+
+A 5.0 from two reviews should not outrank a 4.7 from three thousand, so the
+score is a Bayesian average: every rating is pulled towards the catalogue
+mean ``m`` by a prior worth ``RESTAURANT_SCORE_PRIOR_WEIGHT`` reviews::
+
+    score = (weight * m + rating * review_count) / (weight + review_count)
+
+``Restaurant.save()`` scores its own row with this process's cached mean.
+``recompute_scores()`` (``manage.py recompute_scores``) refreshes the mean and
+rewrites every score that moved, and is meant to run periodically. Scores are
+not part of any payload, so a recompute leaves ``updated_at`` (and with it
+``/api/sync/`` and the snapshots) alone and stamps ``scored_at`` instead. The
+list validators and the search index sync read that column, so they see a
+recompute run from any process; cached entries follow the ``SCORES`` version.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg
+from django.utils import timezone
+
+# Stored scores are rounded so that unchanged rows compare equal on recompute.
+SCORE_DIGITS = 4
+
+
+def prior_weight() -> int:
+    return getattr(settings, 'RESTAURANT_SCORE_PRIOR_WEIGHT', 25)
+
+
+def bayesian_score(rating, review_count, mean, weight) -> float:
+    total = weight + review_count
+    if not total:
+        return round(float(rating), SCORE_DIGITS)
+    return round((weight * mean + float(rating) * review_count) / total, SCORE_DIGITS)
+
+
+def catalogue_mean() -> float:
+    """Mean rating of the active restaurants that have reviews."""
+    # ``models`` imports this module for ``Restaurant.save()``.
+    from .models import Restaurant
+
+    mean = Restaurant.objects.filter(is_active=True, review_count__gt=0).aggregate(
+        mean=Avg('rating')
+    )['mean']
+    return float(mean or 0)
+
+
+class ScorePrior:
+    """Per-process copy of ``catalogue_mean()``, reloaded every ``ttl`` seconds.
+
+    The mean moves slowly, so single-row saves reuse it instead of running
+    an aggregate per write.
+    """
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._mean = None
+        self._loaded_at = None
+
+    def mean(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if self._loaded_at is None or now - self._loaded_at >= self.ttl:
+                self._mean = catalogue_mean()
+                self._loaded_at = now
+            return self._mean
+
+    def set(self, mean):
+        with self._lock:
+            self._mean = mean
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+
+score_prior = ScorePrior(ttl=getattr(settings, 'RESTAURANT_SCORE_PRIOR_TTL', 3600))
+
+
+def restaurant_score(restaurant) -> float:
+    return bayesian_score(
+        restaurant.rating, restaurant.review_count, score_prior.mean(), prior_weight()
+    )
+
+
+def recompute_scores(batch_size=1000):
+    """Rescore every restaurant against a fresh mean; return ``(scanned, changed)``.
+
+    The table is walked in primary key order, ``batch_size`` rows per query,
+    and only rows whose score moved are written, one transaction per batch.
+    """
+    from .models import Restaurant
+    from .signals import refresh_scores
+
+    mean = catalogue_mean()
+    score_prior.set(mean)
+    weight = prior_weight()
+    scanned = changed = 0
+    queryset = Restaurant.objects.order_by('pk').values_list(
+        'pk', 'rating', 'review_count', 'score'
+    )
+    batch = list(queryset[:batch_size])
+    while batch:
+        scanned += len(batch)
+        stale = []
+        now = timezone.now()
+        for pk, rating, review_count, score in batch:
+            new = bayesian_score(rating, review_count, mean, weight)
+            if new != score:
+                stale.append(Restaurant(pk=pk, score=new, scored_at=now))
+        if stale:
+            with transaction.atomic():
+                Restaurant.objects.bulk_update(stale, ['score', 'scored_at'])
+                refresh_scores(restaurant.pk for restaurant in stale)
+            changed += len(stale)
+        batch = list(queryset.filter(pk__gt=batch[-1][0])[:batch_size])
+    return scanned, changed
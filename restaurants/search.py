@@ -0,0 +1,430 @@
+"""Full-text restaurant search behind ``GET /api/search/``.
+
+``SearchIndex`` is a per-process inverted index over the name, district name,
+address and description of every active restaurant. Text is Turkish-folded
+(see ``suggestions.fold``) and reduced to stems by stripping common Turkish
+suffixes, so "meyhanesi", "meyhaneler" and "Meyhane" are one term. Results
+are ranked by BM25F over the weighted fields, scaled up by the stored
+Bayesian ``score`` so that better-rated places win close calls.
+
+Every query word must match (falling back to the restaurants matching the
+most words when none match all of them). The last word also matches as a
+prefix, so results keep up with typing, and a word that is not in the
+vocabulary is replaced by the terms sharing most of its trigrams, so "kadikoi"
+still finds Kadıköy.
+
+Local writes mark rows dirty and apply on the next search. Other processes'
+writes are picked up every ``sync_interval`` seconds from ``updated_at`` and
+the restaurant tombstones, and the whole index is rebuilt every ``ttl``
+seconds.
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from functools import lru_cache
+from operator import itemgetter
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .facets import MATCH_ALL
+from .models import District, Restaurant, Tombstone
+from .routers import primary_reads
+from .suggestions import fold
+
+WORD = re.compile(r'[^\W_]+')
+# Field -> weight of one occurrence; integral, so term frequencies stay small ints.
+FIELD_WEIGHTS = {'name': 3, 'district': 2, 'address': 1, 'description': 1}
+STOPWORDS = frozenset({
+    've', 'ile', 'bir', 'bu', 'su', 'da', 'de', 'ki', 'mi', 'icin', 'gibi', 'cok', 'en',
+    'the', 'and', 'of', 'in', 'at',
+})
+# Folded inflectional and derivational endings, longest first.
+SUFFIXES = tuple(sorted(
+    {
+        'lar', 'ler', 'lari', 'leri', 'larin', 'lerin', 'larda', 'lerde', 'lardan', 'lerden',
+        'nin', 'nun', 'in', 'un', 'si', 'su', 'sinda', 'sinde', 'sindan', 'sinden',
+        'da', 'de', 'ta', 'te', 'dan', 'den', 'tan', 'ten',
+        'ya', 'ye', 'yi', 'yu', 'a', 'e', 'i', 'u',
+        'li', 'lu', 'ci', 'cu',
+    },
+    key=len,
+    reverse=True,
+))
+MIN_STEM = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+MIN_PREFIX = 3
+PREFIX_EXPANSIONS = 20
+PREFIX_WEIGHT = 0.9
+FUZZY_EXPANSIONS = 3
+FUZZY_MIN_SIMILARITY = 0.4
+
+
+@lru_cache(maxsize=100_000)
+def stem(word):
+    """Strip up to three Turkish suffixes from a folded ``word``, keeping ``MIN_STEM`` letters."""
+    for _ in range(3):
+        for suffix in SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+                word = word[: -len(suffix)]
+                break
+        else:
+            break
+    return word
+
+
+def terms(text):
+    """Stems of the words in ``text``; stopwords and bare numbers are left out."""
+    return [
+        stem(word)
+        for word in WORD.findall(fold(text))
+        if len(word) > 1 and word not in STOPWORDS and not word.isdigit()
+    ]
+
+
+def _grams(term):
+    padded = f'${term}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """Per-process BM25F index over active restaurants; see the module docstring."""
+
+    sync_skew = timedelta(seconds=5)
+
+    def __init__(self, ttl=3600, sync_interval=30, rating_weight=0.5):
+        self.ttl = ttl
+        self.sync_interval = sync_interval
+        self.rating_weight = rating_weight
+        self._lock = threading.RLock()
+        self._built_at = None
+        self._synced_at = None
+        self._synced_wall = None
+        self._dirty_restaurants = set()
+        self._dirty_districts = set()
+        self._clear()
+
+    def _clear(self):
+        self.postings = {}
+        self.vocabulary = []
+        self.grams = {}
+        self.slots = {}
+        self.pks = []
+        self.lengths = []
+        self.boosts = []
+        self.attributes = []
+        self.doc_terms = []
+        self.free = []
+        # Fixed at each rebuild; the BM25 length norm is baked into the postings.
+        self.average_length = None
+        # Restaurants share a few hundred distinct filter attribute tuples.
+        self._shared_attributes = {}
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def mark_restaurant_dirty(self, pk):
+        with self._lock:
+            self._dirty_restaurants.add(pk)
+
+    def mark_district_dirty(self, pk):
+        with self._lock:
+            self._dirty_districts.add(pk)
+
+    def ensure_fresh(self):
+        with self._lock, primary_reads():
+            now = time.monotonic()
+            if self._built_at is None or now - self._built_at > self.ttl:
+                self.rebuild()
+                return
+            if now - self._synced_at > self.sync_interval:
+                self._sync()
+            if self._dirty_districts:
+                # District names are indexed with each of their restaurants.
+                districts = self._dirty_districts
+                self._dirty_districts = set()
+                self._load(Restaurant.objects.filter(district__in=districts))
+            if self._dirty_restaurants:
+                dirty = self._dirty_restaurants
+                self._dirty_restaurants = set()
+                self._load(Restaurant.objects.filter(pk__in=dirty), removed=dirty)
+
+    def rebuild(self):
+        with self._lock, primary_reads():
+            self._mark_synced()
+            self._clear()
+            self._load(Restaurant.objects.filter(is_active=True).order_by('pk'))
+            self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 1
+            for postings in self.postings.values():
+                for slot, frequency in postings.items():
+                    postings[slot] = self._impact(frequency, self.lengths[slot])
+            self._built_at = self._synced_at
+            self._dirty_restaurants = set()
+            self._dirty_districts = set()
+
+    def _mark_synced(self):
+        self._synced_at = time.monotonic()
+        self._synced_wall = timezone.now()
+
+    def _sync(self):
+        since = self._synced_wall - self.sync_skew
+        self._mark_synced()
+        deleted = Tombstone.objects.filter(resource='restaurants', deleted_at__gte=since)
+        self._load(
+            # ``scored_at``: rescoring changes the boosts without touching ``updated_at``.
+            Restaurant.objects.filter(Q(updated_at__gte=since) | Q(scored_at__gte=since)),
+            removed={self._parse_pk(key) for key in deleted.values_list('key', flat=True)},
+        )
+        districts = District.objects.filter(updated_at__gte=since).values_list('pk', flat=True)
+        self._dirty_districts.update(districts)
+
+    @staticmethod
+    def _parse_pk(key):
+        return Restaurant._meta.pk.to_python(key)
+
+    def _load(self, queryset, removed=()):
+        """Index the rows of ``queryset``; inactive ones and ``removed`` pks are dropped."""
+        districts = {
+            pk: (name, slug)
+            for pk, name, slug in District.objects.order_by().values_list('pk', 'name', 'slug')
+        }
+        columns = (
+            'pk', 'name', 'description', 'address', 'district_id', 'score',
+            'feature_keys', 'additional_keys', 'is_active',
+        )
+        seen = set()
+        for row in queryset.values_list(*columns).iterator(chunk_size=2000):
+            pk, name, description, address, district_id, score, features, additional, active = row
+            seen.add(pk)
+            self._remove(pk)
+            if not active:
+                continue
+            district_name, district_slug = districts.get(district_id, ('', None))
+            fields = {
+                'name': name,
+                'district': district_name,
+                'address': address,
+                'description': description,
+            }
+            attributes = (district_slug, tuple(features), tuple(additional))
+            attributes = self._shared_attributes.setdefault(attributes, attributes)
+            self._add(pk, fields, score, attributes)
+        for pk in set(removed) - seen:
+            self._remove(pk)
+
+    def _add(self, pk, fields, score, attributes):
+        frequencies = Counter()
+        length = 0
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS[field]
+            for term in terms(text or ''):
+                frequencies[term] += weight
+                length += weight
+        slot = self.free.pop() if self.free else len(self.pks)
+        if slot == len(self.pks):
+            for column in (self.pks, self.lengths, self.boosts, self.attributes, self.doc_terms):
+                column.append(None)
+        self.slots[pk] = slot
+        self.pks[slot] = pk
+        self.lengths[slot] = length
+        self.boosts[slot] = 1 + self.rating_weight * (score or 0) / 5
+        self.attributes[slot] = attributes
+        self.doc_terms[slot] = tuple(frequencies)
+        for term, frequency in frequencies.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                bisect.insort(self.vocabulary, term)
+                for gram in _grams(term):
+                    self.grams.setdefault(gram, set()).add(term)
+            # Raw frequencies until ``rebuild()`` knows the average length.
+            if self.average_length is None:
+                postings[slot] = frequency
+            else:
+                postings[slot] = self._impact(frequency, length)
+
+    def _impact(self, frequency, length):
+        """The BM25 term frequency component, without the idf."""
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (self.average_length or 1))
+        return frequency * (BM25_K1 + 1) / (frequency + norm)
+
+    def _remove(self, pk):
+        slot = self.slots.pop(pk, None)
+        if slot is None:
+            return
+        for term in self.doc_terms[slot]:
+            postings = self.postings[term]
+            del postings[slot]
+            if not postings:
+                del self.postings[term]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+                for gram in _grams(term):
+                    self.grams[gram].discard(term)
+                    if not self.grams[gram]:
+                        del self.grams[gram]
+        self.pks[slot] = self.attributes[slot] = self.doc_terms[slot] = None
+        self.free.append(slot)
+
+    # -- querying --------------------------------------------------------
+
+    def search(self, query, filters=None):
+        """``SearchResults`` of the active restaurants matching ``query``.
+
+        ``filters`` is a ``RestaurantFilter.facet_params()`` dict, applied to
+        the candidates before ranking.
+        """
+        words = list(dict.fromkeys(terms(query)))
+        if not words:
+            return SearchResults({})
+        self.ensure_fresh()
+        with self._lock:
+            if not self.slots:
+                return SearchResults({})
+            # The last word is still being typed unless the query ends with a space.
+            typing = not query[-1:].isspace()
+            groups = [
+                self._expand(word, prefix=typing and index == len(words) - 1)
+                for index, word in enumerate(words)
+            ]
+            scores = self._score([group for group in groups if group])
+            if filters is not None and not any(
+                filters[name] for name in ('district', 'features', 'additional')
+            ):
+                filters = None
+            pks, attributes = self.pks, self.attributes
+            return SearchResults({
+                pks[slot]: value
+                for slot, value in scores.items()
+                if filters is None or self._matches(attributes[slot], filters)
+            })
+
+    def _expand(self, word, prefix=False):
+        """``{term: weight}`` standing in for query ``word``."""
+        group = {word: 1.0} if word in self.postings else {}
+        if prefix and len(word) >= MIN_PREFIX:
+            start = bisect.bisect_left(self.vocabulary, word)
+            end = bisect.bisect_left(self.vocabulary, word + '\uffff', start)
+            completions = heapq.nlargest(
+                PREFIX_EXPANSIONS,
+                self.vocabulary[start:end],
+                key=lambda term: len(self.postings[term]),
+            )
+            for term in completions:
+                group.setdefault(term, PREFIX_WEIGHT)
+        if not group:
+            group = self._fuzzy(word)
+        return group
+
+    def _fuzzy(self, word):
+        grams = _grams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.grams.get(gram, ()))
+        similar = []
+        for term, common in shared.items():
+            similarity = common / (len(grams) + len(_grams(term)) - common)
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                similar.append((similarity, len(self.postings[term]), term))
+        best = heapq.nlargest(FUZZY_EXPANSIONS, similar)
+        return {term: similarity for similarity, _, term in best}
+
+    def _score(self, groups):
+        """``{slot: score}`` of the slots matching the most ``groups``."""
+        if not groups:
+            return {}
+        matching = []
+        for group in groups:
+            keys = [self.postings[term].keys() for term in group]
+            matching.append(set(keys[0]).union(*keys[1:]))
+        candidates = set.intersection(*matching)
+        if not candidates:
+            matched = Counter()
+            for slots in matching:
+                matched.update(slots)
+            most = max(matched.values())
+            candidates = {slot for slot, hits in matched.items() if hits == most}
+
+        count = len(self.slots)
+        scores = dict.fromkeys(sorted(candidates), 0.0)
+        for group in groups:
+            # A slot scores its best term of each group.
+            best = scores if len(group) == 1 else {}
+            for term, weight in group.items():
+                postings = self.postings[term]
+                scale = weight * math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                # Walk whichever side is shorter.
+                if len(postings) < len(candidates):
+                    pairs = [(slot, postings[slot]) for slot in postings if slot in scores]
+                else:
+                    pairs = [(slot, postings[slot]) for slot in candidates if slot in postings]
+                if best is scores:
+                    for slot, impact in pairs:
+                        scores[slot] += scale * impact
+                    continue
+                for slot, impact in pairs:
+                    value = scale * impact
+                    if value > best.get(slot, 0):
+                        best[slot] = value
+            if best is not scores:
+                for slot, value in best.items():
+                    scores[slot] += value
+        boosts = self.boosts
+        return {slot: boosts[slot] * value for slot, value in scores.items()}
+
+    @staticmethod
+    def _matches(attributes, filters):
+        district, features, additional = attributes
+        if filters['district'] and district != filters['district']:
+            return False
+        for wanted, keys, mode in (
+            (filters['features'], features, filters['feature_match']),
+            (filters['additional'], additional, filters['additional_match']),
+        ):
+            if wanted and not (all if mode == MATCH_ALL else any)(key in keys for key in wanted):
+                return False
+        return True
+
+
+class SearchResults:
+    """Matching pks, best first, sorted only as far as they are sliced.
+
+    Pagination takes ``len()`` and one slice, so a page of a broad query
+    costs a partial heap selection instead of a sort of every match. Ties
+    keep slot order, which is pk order after a rebuild.
+    """
+
+    def __init__(self, scores):
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        start, stop, step = index.indices(len(self.scores))
+        if stop < len(self.scores):
+            ranked = heapq.nlargest(stop, self.scores.items(), key=itemgetter(1))
+        else:
+            ranked = sorted(self.scores.items(), key=itemgetter(1), reverse=True)
+        return [pk for pk, _ in ranked[start:stop:step]]
+
+
+search_index = SearchIndex(
+    ttl=getattr(settings, 'RESTAURANT_SEARCH_INDEX_TTL', 3600),
+    sync_interval=getattr(settings, 'RESTAURANT_SEARCH_SYNC_INTERVAL', 30),
+    rating_weight=getattr(settings, 'RESTAURANT_SEARCH_RATING_WEIGHT', 0.5),
+)
+
+
+def search_index_enabled() -> bool:
+    return getattr(settings, 'RESTAURANT_SEARCH_INDEX', False)
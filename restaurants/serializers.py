@@ -42,6 +42,22 @@ class RestaurantListSerializer(serializers.ModelSerializer):
             'additional_filters',
         ]
 
+    def __init__(self, *args, fields=None, **kwargs):
+        # ``fields`` is a ``payloads.field_selection()``: serialize only those keys.
+        super().__init__(*args, **kwargs)
+        self.selected_fields = fields
+        if fields is not None:
+            for name in set(self.fields).difference(fields):
+                self.fields.pop(name)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        distance = getattr(instance, 'distance', None)
+        selected = self.selected_fields is None or 'distance_m' in self.selected_fields
+        if distance is not None and selected:
+            data['distance_m'] = round(distance)
+        return data
+
 
 class RestaurantDetailSerializer(RestaurantListSerializer):
     class Meta(RestaurantListSerializer.Meta):
@@ -85,29 +101,41 @@ class RestaurantWriteSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
-        feature_keys = validated_data.pop('feature_keys', [])
-        additional_keys = validated_data.pop('additional_keys', [])
-        restaurant = Restaurant.objects.create(**validated_data)
-        if feature_keys:
-            restaurant.features.set(self._get_related_features(feature_keys, 'feature_keys'))
-        if additional_keys:
-            restaurant.additional_filters.set(
-                self._get_related_additional(additional_keys, 'additional_keys')
-            )
+        features = self._get_related_features(
+            validated_data.pop('feature_keys', []), 'feature_keys'
+        )
+        additional = self._get_related_additional(
+            validated_data.pop('additional_keys', []), 'additional_keys'
+        )
+        restaurant = Restaurant.objects.create(
+            **validated_data,
+            feature_keys=sorted(tag.key for tag in features),
+            additional_keys=sorted(tag.key for tag in additional),
+        )
+        if features:
+            restaurant.features.set(features)
+        if additional:
+            restaurant.additional_filters.set(additional)
         return restaurant
 
     def update(self, instance, validated_data):
         feature_keys = validated_data.pop('feature_keys', None)
         additional_keys = validated_data.pop('additional_keys', None)
+        features = additional = None
+        if feature_keys is not None:
+            features = self._get_related_features(feature_keys, 'feature_keys')
+            instance.feature_keys = sorted(tag.key for tag in features)
+        if additional_keys is not None:
+            additional = self._get_related_additional(additional_keys, 'additional_keys')
+            instance.additional_keys = sorted(tag.key for tag in additional)
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
-        if feature_keys is not None:
-            instance.features.set(self._get_related_features(feature_keys, 'feature_keys'))
-        if additional_keys is not None:
-            instance.additional_filters.set(
-                self._get_related_additional(additional_keys, 'additional_keys')
-            )
+        # The key columns were saved above, so these only write the link rows.
+        if features is not None:
+            instance.features.set(features)
+        if additional is not None:
+            instance.additional_filters.set(additional)
         return instance
 
     def _get_related_features(self, keys, field_name):
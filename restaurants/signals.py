@@ -0,0 +1,245 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import cache, sync
+from .cache import response_cache
+from .facets import facet_index
+from .models import TAG_KEY_COLUMNS, AdditionalFilter, District, FeatureTag, Restaurant
+from .roles import editor_roles
+from .search import search_index
+from .snapshots import snapshot_publisher, snapshots_enabled
+from .suggestions import suggestion_index
+from .sync import RESTAURANTS, TAXONOMIES, record_tombstone
+
+
+TAXONOMY_CACHE_RESOURCES = {
+    District: cache.DISTRICTS,
+    FeatureTag: cache.FEATURES,
+    AdditionalFilter: cache.ADDITIONAL_FILTERS,
+}
+TAG_THROUGH_COLUMNS = {
+    Restaurant._meta.get_field(name).remote_field.through: column
+    for name, column in TAG_KEY_COLUMNS.items()
+}
+TAG_MODEL_COLUMNS = {FeatureTag: 'feature_keys', AdditionalFilter: 'additional_keys'}
+TAG_SNAPSHOTS = {FeatureTag: 'features', AdditionalFilter: 'additional-filters'}
+
+
+def _refresh_restaurant(pk):
+    def refresh():
+        facet_index.mark_dirty(pk)
+        suggestion_index.mark_restaurant_dirty(pk)
+        search_index.mark_restaurant_dirty(pk)
+        response_cache.bump(cache.RESTAURANTS)
+
+    transaction.on_commit(refresh)
+
+
+def refresh_restaurants(pks):
+    """``_refresh_restaurant`` for bulk writes, which bypass model signals."""
+    pks = list(pks)
+
+    def refresh():
+        for pk in pks:
+            facet_index.mark_dirty(pk)
+            suggestion_index.mark_restaurant_dirty(pk)
+            search_index.mark_restaurant_dirty(pk)
+        response_cache.bump(cache.RESTAURANTS)
+
+    transaction.on_commit(refresh)
+    if snapshots_enabled():
+        # Bulk writes do not say which districts the rows moved between.
+        snapshot_publisher.mark()
+
+
+def refresh_scores(pks):
+    """Like ``refresh_restaurants``, for score-only writes that no payload shows."""
+    pks = list(pks)
+
+    def refresh():
+        for pk in pks:
+            facet_index.mark_dirty(pk)
+            search_index.mark_restaurant_dirty(pk)
+        response_cache.bump(cache.SCORES)
+
+    transaction.on_commit(refresh)
+
+
+def _mark_snapshots(instance):
+    if snapshots_enabled():
+        districts = {instance.district_id, *getattr(instance, '_snapshot_districts', ())}
+        snapshot_publisher.mark('restaurants', *districts)
+
+
+def sync_tag_keys(restaurants):
+    """Recompute the tag key columns of ``restaurants`` from the link tables; return their pks."""
+    restaurants = list(restaurants.only('pk'))
+    if not restaurants:
+        return []
+    pks = [restaurant.pk for restaurant in restaurants]
+    keys = {pk: {column: [] for column in TAG_KEY_COLUMNS.values()} for pk in pks}
+    for name, column in TAG_KEY_COLUMNS.items():
+        field = Restaurant._meta.get_field(name)
+        target = f'{field.m2m_reverse_field_name()}_id'
+        links = field.remote_field.through.objects.filter(restaurant_id__in=pks)
+        for restaurant_id, key in links.order_by(target).values_list('restaurant_id', target):
+            keys[restaurant_id][column].append(key)
+    now = timezone.now()
+    for restaurant in restaurants:
+        for column, values in keys[restaurant.pk].items():
+            setattr(restaurant, column, values)
+        restaurant.updated_at = now
+    Restaurant.objects.bulk_update(restaurants, [*TAG_KEY_COLUMNS.values(), 'updated_at'])
+    return pks
+
+
+def _refresh_search(pks):
+    # The search index filters on tag keys; bulk key rewrites skip ``_refresh_restaurant``.
+    def refresh():
+        for pk in pks:
+            search_index.mark_restaurant_dirty(pk)
+
+    transaction.on_commit(refresh)
+
+
+def _fold_tag_change(instance, column, action, pk_set):
+    """Apply a forward link change to ``instance``'s key column without re-reading the links."""
+    current = getattr(instance, column)
+    if action == 'post_add':
+        keys = sorted(set(current) | pk_set)
+    elif action == 'post_remove':
+        keys = sorted(set(current) - pk_set)
+    else:
+        keys = []
+    # ``RestaurantWriteSerializer`` sets the column before linking, so this is
+    # usually a no-op; other callers (admin, shell) get the UPDATE here.
+    if keys != current:
+        setattr(instance, column, keys)
+        instance.updated_at = timezone.now()
+        Restaurant.objects.filter(pk=instance.pk).update(
+            **{column: keys}, updated_at=instance.updated_at
+        )
+
+
+@receiver(pre_save, sender=Restaurant)
+def restaurant_saving(sender, instance, **kwargs):  # noqa: ARG001
+    # Moving a restaurant changes its old district's snapshot too.
+    if snapshots_enabled() and not instance._state.adding:
+        old = Restaurant.objects.filter(pk=instance.pk).values_list('district_id', flat=True)
+        instance._snapshot_districts = set(old)
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+def restaurant_changed(sender, instance, **kwargs):  # noqa: ARG001
+    _refresh_restaurant(instance.pk)
+    _mark_snapshots(instance)
+
+
+@receiver(post_delete, sender=Restaurant)
+def restaurant_deleted(sender, instance, **kwargs):  # noqa: ARG001
+    record_tombstone(RESTAURANTS, instance.pk)
+
+
+@receiver(m2m_changed, sender=Restaurant.features.through)
+@receiver(m2m_changed, sender=Restaurant.additional_filters.through)
+def restaurant_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):  # noqa: ARG001
+    if not action.startswith('post_'):
+        return
+    column = TAG_THROUGH_COLUMNS[sender]
+    if not reverse:
+        _fold_tag_change(instance, column, action, pk_set)
+        _refresh_restaurant(instance.pk)
+        _mark_snapshots(instance)
+        return
+    # Changed from the tag side (e.g. ``feature.restaurants.add(...)``).
+    if pk_set is None:
+        pks = sync_tag_keys(Restaurant.objects.filter(**{f'{column}__overlap': [instance.pk]}))
+        _refresh_search(pks)
+        transaction.on_commit(facet_index.invalidate)
+        transaction.on_commit(lambda: response_cache.bump(cache.RESTAURANTS))
+    else:
+        sync_tag_keys(Restaurant.objects.filter(pk__in=pk_set))
+        for pk in pk_set:
+            _refresh_restaurant(pk)
+    if snapshots_enabled():
+        snapshot_publisher.mark()
+
+
+@receiver(post_save, sender=District)
+@receiver(post_delete, sender=District)
+@receiver(post_save, sender=FeatureTag)
+@receiver(post_delete, sender=FeatureTag)
+@receiver(post_save, sender=AdditionalFilter)
+@receiver(post_delete, sender=AdditionalFilter)
+def taxonomy_changed(sender, instance, **kwargs):  # noqa: ARG001
+    # Slug renames and cascaded tag deletes bypass m2m_changed; rebuild lazily.
+    transaction.on_commit(facet_index.invalidate)
+    resource = TAXONOMY_CACHE_RESOURCES[sender]
+    transaction.on_commit(lambda: response_cache.bump(resource))
+    if sender is District:
+        pk = instance.pk
+        transaction.on_commit(lambda: suggestion_index.mark_district_dirty(pk))
+        transaction.on_commit(lambda: search_index.mark_district_dirty(pk))
+    if snapshots_enabled():
+        # Restaurant payloads embed district names; tag deletes rewrite restaurants.
+        if sender is District or kwargs['signal'] is post_delete:
+            snapshot_publisher.mark()
+        else:
+            snapshot_publisher.mark(TAG_SNAPSHOTS[sender])
+
+
+@receiver(post_delete, sender=District)
+@receiver(post_delete, sender=FeatureTag)
+@receiver(post_delete, sender=AdditionalFilter)
+def taxonomy_deleted(sender, instance, **kwargs):  # noqa: ARG001
+    resource = sync.TAXONOMY_RESOURCES[sender]
+    record_tombstone(resource, getattr(instance, TAXONOMIES[resource][2]))
+
+
+@receiver(pre_save, sender=District)
+def district_renamed(sender, instance, **kwargs):  # noqa: ARG001
+    instance._renamed = False
+    if instance.pk is None:
+        return
+    old = District.objects.filter(pk=instance.pk).values_list('slug', 'name').first()
+    if old is None:
+        return
+    # Sync clients key districts by slug, so a new slug retires the old one.
+    if old[0] != instance.slug:
+        record_tombstone(sync.TAXONOMY_RESOURCES[District], old[0])
+    instance._renamed = old != (instance.slug, instance.name)
+
+
+@receiver(post_save, sender=District)
+def district_saved(sender, instance, **kwargs):  # noqa: ARG001
+    # Restaurant payloads embed ``district``/``district_name``; resend them on
+    # sync. Inactive rows are not in any client mirror.
+    if getattr(instance, '_renamed', False):
+        restaurants = Restaurant.objects.filter(district_id=instance.pk, is_active=True)
+        restaurants.update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=FeatureTag)
+@receiver(post_delete, sender=AdditionalFilter)
+def tag_deleted(sender, instance, **kwargs):  # noqa: ARG001
+    # The cascade already removed the links; drop the key from the columns too.
+    column = TAG_MODEL_COLUMNS[sender]
+    pks = sync_tag_keys(Restaurant.objects.filter(**{f'{column}__overlap': [instance.pk]}))
+    _refresh_search(pks)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def roles_changed(sender, **kwargs):  # noqa: ARG001
+    # Now, so this process stops trusting the old set, and again once the
+    # change is visible to the reload.
+    editor_roles.invalidate()
+    transaction.on_commit(editor_roles.invalidate)
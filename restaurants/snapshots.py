@@ -0,0 +1,243 @@
+"""Static JSON snapshots of the hottest anonymous reads.
+
+The taxonomy lists, the unfiltered first page of restaurants and each
+district's first page are rendered through their API views (so the bytes
+match the live responses) and written under ``STATIC_ROOT/snapshots/`` as
+content-hashed ``.json`` files next to ``.gz`` and, when the ``brotli``
+package is installed, ``.br`` variants. Hashed names never change, so
+WhiteNoise and CDNs can cache them forever; ``manifest.json`` maps each API
+URL to its current file and is served by ``GET /api/snapshots/``.
+
+``manage.py publish_snapshots`` publishes everything. With ``SNAPSHOTS=1``,
+committed writes queue the snapshots they touched for a background thread of
+the writing process, so the write request neither waits for the renders nor
+fails when ``STATIC_ROOT`` cannot be written (the error is logged). Files that
+drop out of the manifest are removed once they are ``SNAPSHOT_KEEP_SECONDS``
+old, so clients holding an older manifest still find them.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections, transaction
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from .cache import UNCACHED
+from .models import District
+from .routers import primary_reads
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = 'snapshots'
+MANIFEST = 'manifest.json'
+# Snapshot name -> URL name of the list it renders.
+LIST_SNAPSHOTS = {
+    'districts': 'district-list',
+    'features': 'feature-list',
+    'additional-filters': 'additional-filter-list',
+    'restaurants': 'restaurant-list',
+}
+
+
+def snapshots_enabled() -> bool:
+    return getattr(settings, 'SNAPSHOTS', False)
+
+
+def snapshot_root() -> Path:
+    return Path(settings.STATIC_ROOT) / SNAPSHOT_DIR
+
+
+def snapshot_url(filename):
+    return f'{settings.STATIC_URL}{SNAPSHOT_DIR}/{filename}'
+
+
+def render(path, params=None):
+    """The body ``GET path?params`` returns to an anonymous client, read from the primary.
+
+    The response cache and request coalescing are bypassed, so the body is
+    never an older payload that another request built.
+    """
+    base_url = getattr(settings, 'SNAPSHOT_BASE_URL', '')
+    if not base_url:
+        # Pagination links in the snapshots would point at the wrong host.
+        raise ImproperlyConfigured('Set SNAPSHOT_BASE_URL to the public API origin.')
+    base = urlsplit(base_url)
+    request = WSGIRequest(
+        {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': urlencode(params or {}),
+            'SERVER_NAME': base.hostname,
+            'SERVER_PORT': str(base.port or (443 if base.scheme == 'https' else 80)),
+            'HTTP_HOST': base.netloc,
+            'wsgi.url_scheme': base.scheme,
+            'wsgi.input': BytesIO(),
+            UNCACHED: True,
+        }
+    )
+    match = resolve(path)
+    view = match.func
+    if iscoroutinefunction(view):
+        view = async_to_sync(view)
+    with primary_reads():
+        response = view(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    if response.status_code != 200:
+        raise RuntimeError(f'GET {path} returned {response.status_code}.')
+    if response.get('X-Cache') in {'HIT', 'STALE'}:
+        raise RuntimeError(f'GET {path} was not rendered from the database.')
+    return response.content
+
+
+def _write(path, content):
+    """Write ``content`` to ``path`` atomically."""
+    handle, temporary = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            output.write(content)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def write_snapshot(name, content):
+    """Write ``content`` and its compressed variants under a hashed name; return the file name."""
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    filename = f'{name}.{digest}.json'
+    path = snapshot_root() / filename
+    if path.exists():
+        # Current again: restart its clock in ``SnapshotPublisher._prune()``.
+        os.utime(path)
+        return filename
+    # Variants first: WhiteNoise picks them up when it first sees the JSON.
+    _write(path.with_name(f'{filename}.gz'), gzip.compress(content, 9, mtime=0))
+    if brotli is not None:
+        _write(path.with_name(f'{filename}.br'), brotli.compress(content))
+    _write(path, content)
+    return filename
+
+
+class SnapshotPublisher:
+    """Renders snapshots and keeps ``manifest.json`` current.
+
+    Writes call ``mark()`` with the snapshots they touched (none for all of
+    them); once the transaction commits they are queued for the publishing
+    thread. Targets queued while it is busy are published together.
+    """
+
+    ALL = 'all'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._manifest = None
+        self._manifest_version = None
+        self._queue_lock = threading.Lock()
+        self._queued = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='snapshots')
+
+    def mark(self, *targets):
+        """Republish ``targets`` (``LIST_SNAPSHOTS`` names or district pks) after commit."""
+        pending = getattr(self._local, 'pending', set())
+        pending.update(targets or (self.ALL,))
+        self._local.pending = pending
+        # Cheap when the set is already flushed; rolled back marks ride on the next commit.
+        transaction.on_commit(self.flush)
+
+    def flush(self):
+        pending, self._local.pending = getattr(self._local, 'pending', set()), set()
+        if not pending:
+            return
+        with self._queue_lock:
+            scheduled = self._queued is not None
+            self._queued = (self._queued or set()) | pending
+        if not scheduled:
+            self._executor.submit(self._publish_queued)
+
+    def _publish_queued(self):
+        with self._queue_lock:
+            targets, self._queued = self._queued, None
+        # This thread keeps its connection between jobs, like request threads do.
+        close_old_connections()
+        try:
+            self.publish(None if self.ALL in targets else targets)
+        except Exception:
+            # Nobody waits for this thread; a read-only STATIC_ROOT ends up here.
+            logger.exception('Republishing snapshots failed.')
+
+    def publish(self, targets=None):
+        """Render ``targets`` (everything when None) and return the new manifest."""
+        with self._lock:
+            root = snapshot_root()
+            root.mkdir(parents=True, exist_ok=True)
+            if not self.manifest()['snapshots']:
+                targets = None
+            districts = dict(District.objects.order_by().values_list('pk', 'slug'))
+            current = {} if targets is None else dict(self.manifest()['snapshots'])
+            restaurants = reverse('restaurant-list')
+            for name, url_name in LIST_SNAPSHOTS.items():
+                if targets is None or name in targets:
+                    path = reverse(url_name)
+                    current[path] = snapshot_url(write_snapshot(name, render(path)))
+            for pk, slug in districts.items():
+                if targets is None or pk in targets:
+                    content = render(restaurants, {'district': slug})
+                    filename = write_snapshot(f'restaurants.district-{slug}', content)
+                    current[f'{restaurants}?district={slug}'] = snapshot_url(filename)
+            # Districts that are gone, or were renamed, leave the manifest.
+            pages = {f'{restaurants}?district={slug}' for slug in districts.values()}
+            current = {
+                path: url
+                for path, url in current.items()
+                if '?district=' not in path or path in pages
+            }
+            manifest = {'published_at': timezone.now().isoformat(), 'snapshots': current}
+            _write(root / MANIFEST, json.dumps(manifest, indent=2, sort_keys=True).encode())
+            self._prune(root, current.values())
+            return manifest
+
+    def manifest(self):
+        """The published manifest, re-read whenever ``manifest.json`` changes on disk."""
+        path = snapshot_root() / MANIFEST
+        try:
+            version = path, path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {'published_at': None, 'snapshots': {}}
+        if version != self._manifest_version:
+            self._manifest = json.loads(path.read_bytes())
+            self._manifest_version = version
+        return self._manifest
+
+    def _prune(self, root, urls):
+        keep = {url.rsplit('/', 1)[-1] for url in urls}
+        cutoff = time.time() - getattr(settings, 'SNAPSHOT_KEEP_SECONDS', 3600)
+        for path in root.glob('*.json'):
+            if path.name == MANIFEST or path.name in keep or path.stat().st_mtime >= cutoff:
+                continue
+            for suffix in ('.gz', '.br', ''):
+                path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+
+snapshot_publisher = SnapshotPublisher()
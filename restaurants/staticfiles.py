@@ -0,0 +1,41 @@
+"""WhiteNoise middleware that knows about ``restaurants.snapshots`` files."""
+import os
+import re
+
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .snapshots import SNAPSHOT_DIR
+
+# ``<name>.<12 hex digits>.json``, as written by ``snapshots.write_snapshot()``.
+SNAPSHOT_NAME = re.compile(r'^[\w.-]+\.[0-9a-f]{12}\.json$')
+
+
+class SnapshotWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that also serves snapshots published after startup, cached forever.
+
+    WhiteNoise only indexes ``STATIC_ROOT`` when the process starts (outside
+    ``DEBUG``); snapshot files are looked up on first request instead.
+    """
+
+    def __call__(self, request):
+        name = self.snapshot_name(request.path_info)
+        if name is not None and not self.autorefresh:
+            path = os.path.join(self.static_root, SNAPSHOT_DIR, name)
+            if os.path.isfile(path):
+                if request.path_info not in self.files:
+                    self.add_file_to_dictionary(request.path_info, path)
+            else:
+                # Pruned since it was indexed.
+                self.files.pop(request.path_info, None)
+        return super().__call__(request)
+
+    def snapshot_name(self, url):
+        prefix = f'{self.static_prefix}{SNAPSHOT_DIR}/'
+        if self.static_root and url.startswith(prefix):
+            name = url[len(prefix):]
+            if SNAPSHOT_NAME.match(name):
+                return name
+        return None
+
+    def immutable_file_test(self, path, url):
+        return self.snapshot_name(url) is not None or super().immutable_file_test(path, url)
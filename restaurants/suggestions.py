@@ -0,0 +1,339 @@
+import bisect
+import heapq
+import threading
+import time
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import District, Restaurant, Tombstone
+from .routers import primary_reads
+
+# Turkish-aware folding: dotted/dotless i and the Turkish letters collapse onto
+# ASCII so that "KADIKÖY", "Kadıköy" and "kadikoy" all match. Every character
+# folds to exactly one character, so offsets in the folded text are valid
+# offsets into the original string.
+_TURKISH_FOLD = str.maketrans({
+    'İ': 'i', 'I': 'i', 'ı': 'i',
+    'Ş': 's', 'ş': 's',
+    'Ğ': 'g', 'ğ': 'g',
+    'Ç': 'c', 'ç': 'c',
+    'Ö': 'o', 'ö': 'o',
+    'Ü': 'u', 'ü': 'u',
+})
+
+TOP_K = 10
+# Prefix ranges wider than this have their top results memoized.
+MEMO_MIN_RANGE = 64
+MEMO_MAX_SIZE = 50_000
+MATCH_NAME_PREFIX = 0
+MATCH_WORD_PREFIX = 1
+
+
+def _fold_char(char):
+    char = char.translate(_TURKISH_FOLD)
+    base = unicodedata.normalize('NFD', char)[0]
+    lowered = base.lower()
+    return lowered if len(lowered) == 1 else base
+
+
+def fold(text: str) -> str:
+    """Case- and accent-fold ``text`` with Turkish rules, preserving its length."""
+    return ''.join(_fold_char(char) for char in text)
+
+
+def _match_start(folded_name, folded_query):
+    if folded_name.startswith(folded_query):
+        return 0
+    start = folded_name.find(' ' + folded_query)
+    if start >= 0:
+        return start + 1
+    return folded_name.find(folded_query)
+
+
+def highlight(name: str, query: str):
+    """Return ``[start, end]`` of ``query`` in ``name``, preferring word starts."""
+    folded_query = fold(query).strip()
+    start = _match_start(fold(name), folded_query) if folded_query else -1
+    if start < 0:
+        return None
+    return [start, start + len(folded_query)]
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _Entry:
+    __slots__ = ('key', 'name', 'folded', 'rank', 'payload', 'tokens')
+
+    def __init__(self, key, name, rank, payload):
+        self.key = key
+        self.name = name
+        self.folded = fold(name)
+        self.rank = rank
+        self.payload = payload
+        # Every word start, so "kahve" finds "Moda Kahve Evi" and "moda ka" still prefixes it.
+        starts = [0] + [i + 1 for i, char in enumerate(self.folded) if char == ' ']
+        self.tokens = sorted({self.folded[i:] for i in starts if self.folded[i:].strip()})
+
+
+class _Section:
+    """Word-prefix and trigram index over one kind of entry."""
+
+    def __init__(self):
+        self.entries = {}
+        self.tokens = []
+        self.trigrams = {}
+        self.top = {}
+        self.substrings = {}
+
+    def bulk_load(self, entries):
+        for entry in entries:
+            self.entries[entry.key] = entry
+            self.tokens.extend((token, entry.key) for token in entry.tokens)
+            for gram in _trigrams(entry.folded):
+                self.trigrams.setdefault(gram, set()).add(entry.key)
+        self.tokens.sort()
+        self.top = {}
+        self.substrings = {}
+
+    def add(self, entry):
+        self.remove(entry.key)
+        self.substrings = {}
+        self.entries[entry.key] = entry
+        for token in entry.tokens:
+            bisect.insort(self.tokens, (token, entry.key))
+            self._forget(token)
+        for gram in _trigrams(entry.folded):
+            self.trigrams.setdefault(gram, set()).add(entry.key)
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.substrings = {}
+        for token in entry.tokens:
+            index = bisect.bisect_left(self.tokens, (token, key))
+            if index < len(self.tokens) and self.tokens[index] == (token, key):
+                del self.tokens[index]
+            self._forget(token)
+        for gram in _trigrams(entry.folded):
+            keys = self.trigrams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.trigrams[gram]
+
+    def _forget(self, token):
+        if self.top:
+            for length in range(1, len(token) + 1):
+                self.top.pop(token[:length], None)
+
+    def prefix_keys(self, query, limit):
+        """Best ``limit`` entries with a word starting with ``query``.
+
+        Wide prefix ranges ("k", "kebap") are ranked once and memoized until a
+        write touches a token starting with that prefix.
+        """
+        cached = self.top.get(query)
+        if cached is not None and limit <= TOP_K:
+            return cached[:limit]
+        start = bisect.bisect_left(self.tokens, (query,))
+        end = bisect.bisect_left(self.tokens, (query + '\uffff',), start)
+        keys = {key for _, key in self.tokens[start:end]}
+        best = heapq.nsmallest(max(limit, TOP_K), keys, key=lambda key: self._order(key, query))
+        if end - start >= MEMO_MIN_RANGE:
+            if len(self.top) >= MEMO_MAX_SIZE:
+                self.top = {}
+            self.top[query] = best
+        return best[:limit]
+
+    def substring_keys(self, query, limit, exclude):
+        memo_key = (query, limit, frozenset(exclude))
+        cached = self.substrings.get(memo_key)
+        if cached is None:
+            cached = self._scan_substring(query, limit, exclude)
+            if len(self.substrings) >= MEMO_MAX_SIZE:
+                self.substrings = {}
+            self.substrings[memo_key] = cached
+        return cached
+
+    def _scan_substring(self, query, limit, exclude):
+        grams = sorted(_trigrams(query), key=lambda gram: len(self.trigrams.get(gram, ())))
+        if not grams:
+            return []
+        candidates = set(self.trigrams.get(grams[0], ()))
+        for gram in grams[1:]:
+            candidates &= self.trigrams.get(gram, set())
+            if not candidates:
+                return []
+        matches = [
+            key for key in candidates
+            if key not in exclude and query in self.entries[key].folded
+        ]
+        return heapq.nsmallest(limit, matches, key=lambda key: self.entries[key].rank)
+
+    def _order(self, key, query):
+        entry = self.entries[key]
+        quality = MATCH_NAME_PREFIX if entry.folded.startswith(query) else MATCH_WORD_PREFIX
+        return (quality, entry.rank)
+
+    def search(self, query, limit):
+        keys = self.prefix_keys(query, limit)
+        if len(keys) < limit and len(query) >= 3:
+            keys = keys + self.substring_keys(query, limit - len(keys), set(keys))
+        return [self.entries[key] for key in keys]
+
+
+class SuggestionIndex:
+    """Per-process typeahead index over active restaurants and districts.
+
+    Restaurants rank by match quality (name prefix, word prefix, substring),
+    then rating and review count; districts rank by match quality and name.
+    Local writes and deletes mark rows dirty and are applied on the next
+    lookup. Writes from other processes are picked up every ``sync_interval``
+    seconds from ``updated_at`` and their deletes from the sync tombstones;
+    the whole index is rebuilt every ``ttl`` seconds.
+    """
+
+    sync_skew = timedelta(seconds=5)
+
+    def __init__(self, ttl=3600, sync_interval=30):
+        self.ttl = ttl
+        self.sync_interval = sync_interval
+        self._lock = threading.RLock()
+        self._built_at = None
+        self._synced_at = None
+        self._synced_wall = None
+        self._dirty_restaurants = set()
+        self._dirty_districts = set()
+        self.restaurants = _Section()
+        self.districts = _Section()
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def mark_restaurant_dirty(self, pk):
+        with self._lock:
+            self._dirty_restaurants.add(pk)
+
+    def mark_district_dirty(self, pk):
+        with self._lock:
+            self._dirty_districts.add(pk)
+
+    def ensure_fresh(self):
+        with self._lock, primary_reads():
+            now = time.monotonic()
+            if self._built_at is None or now - self._built_at > self.ttl:
+                self.rebuild()
+                return
+            if now - self._synced_at > self.sync_interval:
+                self._sync()
+            if self._dirty_restaurants:
+                dirty = self._dirty_restaurants
+                self._load_restaurants(Restaurant.objects.filter(pk__in=dirty), dirty)
+                self._dirty_restaurants = set()
+            if self._dirty_districts:
+                self._load_districts(self._dirty_districts)
+                self._dirty_districts = set()
+
+    def rebuild(self):
+        with self._lock, primary_reads():
+            self._mark_synced()
+            self.restaurants = _Section()
+            self.districts = _Section()
+            self._load_restaurants()
+            self._load_districts()
+            self._built_at = self._synced_at
+            self._dirty_restaurants = set()
+            self._dirty_districts = set()
+
+    def _mark_synced(self):
+        self._synced_at = time.monotonic()
+        self._synced_wall = timezone.now()
+
+    def _sync(self):
+        since = self._synced_wall - self.sync_skew
+        self._mark_synced()
+        deleted = Tombstone.objects.filter(deleted_at__gte=since)
+        restaurants = deleted.filter(resource='restaurants').values_list('key', flat=True)
+        self._load_restaurants(
+            Restaurant.objects.filter(updated_at__gte=since),
+            removed={Restaurant._meta.pk.to_python(key) for key in restaurants},
+        )
+        pks = set(District.objects.filter(updated_at__gte=since).values_list('pk', flat=True))
+        # District tombstones are keyed by slug.
+        slugs = set(deleted.filter(resource='districts').values_list('key', flat=True))
+        pks.update(
+            pk for pk, entry in self.districts.entries.items() if entry.payload['slug'] in slugs
+        )
+        if pks:
+            self._load_districts(pks)
+
+    def _load_restaurants(self, changed=None, removed=()):
+        """Load every active restaurant, or re-apply the rows in ``changed``.
+
+        ``removed`` lists extra keys to drop, e.g. restaurants that were deleted.
+        """
+        queryset = Restaurant.objects.filter(is_active=True) if changed is None else changed
+        rows = queryset.order_by().values_list(
+            'pk', 'name', 'slug', 'rating', 'review_count', 'is_active'
+        )
+        pks = set(removed)
+        entries = []
+        for pk, name, slug, rating, review_count, is_active in rows:
+            pks.add(pk)
+            if is_active:
+                payload = {'id': str(pk), 'name': name, 'slug': slug}
+                entries.append(_Entry(pk, name, (-rating, -review_count, name), payload))
+        self._apply(self.restaurants, None if changed is None else pks, entries)
+
+    def _load_districts(self, pks=None):
+        queryset = District.objects.order_by()
+        if pks is not None:
+            queryset = queryset.filter(pk__in=pks)
+        entries = [
+            _Entry(pk, name, (name,), {'slug': slug, 'name': name})
+            for pk, name, slug in queryset.values_list('pk', 'name', 'slug')
+        ]
+        self._apply(self.districts, pks, entries)
+
+    def _apply(self, section, pks, entries):
+        if pks is None:
+            section.bulk_load(entries)
+            return
+        for pk in pks:
+            section.remove(pk)
+        for entry in entries:
+            section.add(entry)
+
+    def search(self, query, limit=5):
+        folded = fold(query).strip()
+        if not folded:
+            return [], []
+        self.ensure_fresh()
+        with self._lock:
+            restaurants = self.restaurants.search(folded, limit)
+            districts = self.districts.search(folded, limit)
+        return (
+            [self._with_highlight(entry, folded) for entry in restaurants],
+            [self._with_highlight(entry, folded) for entry in districts],
+        )
+
+    def _with_highlight(self, entry, folded):
+        start = _match_start(entry.folded, folded)
+        return {**entry.payload, 'highlight': [start, start + len(folded)]}
+
+
+suggestion_index = SuggestionIndex(
+    ttl=getattr(settings, 'RESTAURANT_SUGGESTION_INDEX_TTL', 3600),
+    sync_interval=getattr(settings, 'RESTAURANT_SUGGESTION_SYNC_INTERVAL', 30),
+)
+
+
+def suggestion_index_enabled() -> bool:
+    return getattr(settings, 'RESTAURANT_SUGGESTION_INDEX', False)
@@ -0,0 +1,167 @@
+"""Delta sync behind ``GET /api/sync/``: catalogue changes since an opaque token.
+
+A token marks a point in the change stream: a time and, inside a page that
+stopped mid-way through rows sharing an ``updated_at``, the last restaurant
+id sent. A sync returns the restaurants and taxonomy rows changed after it
+(detail/list payloads), the keys of rows deactivated or deleted since
+(``deleted``) and the token to pass next time. Restaurants are read in
+``(updated_at, id)`` order from ``restaurant_updated_idx`` and deletes from
+``Tombstone.deleted_at``, so the cost follows the size of the change. A district
+rename also touches its active restaurants, whose payloads embed it.
+
+Rows are only reported once they are ``SYNC_SETTLE_SECONDS`` old, so a write
+whose transaction commits slightly after its ``updated_at`` is not skipped.
+Tombstones are kept for ``SYNC_TOMBSTONE_DAYS``; older tokens are rejected
+and the client starts over with a full sync.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import AdditionalFilter, District, FeatureTag, Restaurant, Tombstone
+from .payloads import fast_payloads_enabled, payloads, rows
+from .serializers import (
+    AdditionalFilterSerializer,
+    DistrictSerializer,
+    FeatureTagSerializer,
+    RestaurantDetailSerializer,
+)
+
+RESTAURANTS = 'restaurants'
+# Taxonomy resource -> (model, serializer, the field clients key rows by).
+TAXONOMIES = {
+    'districts': (District, DistrictSerializer, 'slug'),
+    'features': (FeatureTag, FeatureTagSerializer, 'key'),
+    'additional_filters': (AdditionalFilter, AdditionalFilterSerializer, 'key'),
+}
+RESOURCES = (RESTAURANTS, *TAXONOMIES)
+TAXONOMY_RESOURCES = {model: resource for resource, (model, _, _) in TAXONOMIES.items()}
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Sync token expired; sync again without a token.'
+    default_code = 'sync_token_expired'
+
+
+def page_size():
+    return getattr(settings, 'SYNC_PAGE_SIZE', 500)
+
+
+def settle_delay():
+    return timedelta(seconds=getattr(settings, 'SYNC_SETTLE_SECONDS', 2))
+
+
+def tombstone_retention():
+    return timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_DAYS', 30))
+
+
+def encode_token(moment, after=None):
+    payload = {'t': moment.isoformat(), 'r': None if after is None else str(after)}
+    payload = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_token(token):
+    """``(time, last restaurant id or None)`` of ``token``."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        moment = datetime.fromisoformat(payload['t'])
+        after = None if payload['r'] is None else uuid.UUID(payload['r'])
+    except (TypeError, ValueError, KeyError, AttributeError):
+        raise ValidationError({'token': ['Invalid sync token.']}) from None
+    if moment.tzinfo is None:
+        raise ValidationError({'token': ['Invalid sync token.']})
+    return moment, after
+
+
+def record_tombstone(resource, key):
+    """Remember that ``resource`` row ``key`` is gone, and prune expired tombstones."""
+    now = timezone.now()
+    Tombstone.objects.filter(deleted_at__lt=now - tombstone_retention()).delete()
+    Tombstone.objects.create(resource=resource, key=str(key))
+
+
+def changes(token=None, limit=None):
+    """The sync payload for ``token`` (None for a full sync)."""
+    limit = page_size() if limit is None else limit
+    now = timezone.now()
+    until = now - settle_delay()
+    since, after = decode_token(token) if token else (None, None)
+    if since is not None and since < now - tombstone_retention():
+        raise SyncTokenExpired()
+    if since is not None and since >= until:
+        # Nothing has settled since the last sync.
+        return _payload({}, {}, token, has_more=False)
+
+    window = Q(updated_at__lte=until)
+    if since is None:
+        # A fresh mirror needs no tombstones.
+        window &= Q(is_active=True)
+    else:
+        seek = Q(updated_at__gt=since)
+        if after is not None:
+            seek |= Q(updated_at=since, pk__gt=after)
+        window &= seek
+    changed = list(
+        Restaurant.objects.filter(window)
+        .order_by('updated_at', 'pk')
+        .values_list('pk', 'updated_at', 'is_active')[: limit + 1]
+    )
+    has_more = len(changed) > limit
+    changed = changed[:limit]
+    after = None
+    if has_more:
+        # Stop the other resources where the restaurants stop, too.
+        after, until = changed[-1][0], changed[-1][1]
+
+    upserts = {RESTAURANTS: _restaurant_payloads([pk for pk, _, active in changed if active])}
+    deleted = {RESTAURANTS: [str(pk) for pk, _, active in changed if not active]}
+    for resource, (model, serializer_class, _) in TAXONOMIES.items():
+        queryset = model.objects.filter(updated_at__lte=until)
+        if since is not None:
+            queryset = queryset.filter(updated_at__gt=since)
+        upserts[resource] = serializer_class(queryset, many=True).data
+    if since is not None:
+        tombstones = Tombstone.objects.filter(deleted_at__gt=since, deleted_at__lte=until)
+        for resource, key in tombstones.order_by('deleted_at', 'pk').values_list('resource', 'key'):
+            deleted.setdefault(resource, []).append(key)
+    return _payload(upserts, deleted, encode_token(until, after), has_more=has_more)
+
+
+def _restaurant_payloads(pks):
+    if not pks:
+        return []
+    queryset = Restaurant.objects.filter(pk__in=pks)
+    if fast_payloads_enabled():
+        found = payloads(rows(queryset, detail=True), detail=True)
+    else:
+        related = queryset.select_related('district').prefetch_related(
+            'features', 'additional_filters'
+        )
+        found = RestaurantDetailSerializer(related, many=True).data
+    by_id = {str(data['id']): data for data in found}
+    return [by_id[str(pk)] for pk in pks if str(pk) in by_id]
+
+
+def key_field(resource):
+    return 'id' if resource == RESTAURANTS else TAXONOMIES[resource][2]
+
+
+def _payload(upserts, deleted, token, has_more):
+    payload = {resource: list(upserts.get(resource, ())) for resource in RESOURCES}
+    gone = {}
+    for resource in RESOURCES:
+        # A key deleted and then recreated in the same window is current again.
+        present = {str(row[key_field(resource)]) for row in payload[resource]}
+        keys = dict.fromkeys(deleted.get(resource, ()))
+        gone[resource] = [key for key in keys if key not in present]
+    return {**payload, 'deleted': gone, 'next': token, 'has_more': has_more}
@@ -0,0 +1,175 @@
+"""Reproducible synthetic catalogues behind ``generate_catalogue`` and the benchmark suite.
+
+The same ``seed`` always yields the same rows, ids included. Restaurants are
+spread over real Istanbul districts in proportion to how busy they are,
+cluster around each district's centre, and carry tags drawn with per-tag
+probabilities, so filters, facets and proximity queries see realistic
+selectivity.
+"""
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from .geo import geohash_for
+from .models import AdditionalFilter, District, FeatureTag, Restaurant
+from .scores import recompute_scores
+from .signals import refresh_restaurants
+from .suggestions import fold
+
+# (slug, name, latitude, longitude, share of restaurants)
+DISTRICTS = [
+    ('beyoglu', 'Beyoğlu', 41.0340, 28.9770, 14),
+    ('kadikoy', 'Kadıköy', 40.9900, 29.0290, 13),
+    ('besiktas', 'Beşiktaş', 41.0430, 29.0070, 10),
+    ('sisli', 'Şişli', 41.0600, 28.9870, 9),
+    ('fatih', 'Fatih', 41.0150, 28.9500, 9),
+    ('uskudar', 'Üsküdar', 41.0230, 29.0150, 7),
+    ('bakirkoy', 'Bakırköy', 40.9800, 28.8720, 6),
+    ('sariyer', 'Sarıyer', 41.1670, 29.0500, 5),
+    ('atasehir', 'Ataşehir', 40.9920, 29.1240, 5),
+    ('kartal', 'Kartal', 40.8900, 29.1900, 4),
+    ('maltepe', 'Maltepe', 40.9350, 29.1300, 4),
+    ('eyupsultan', 'Eyüpsultan', 41.0480, 28.9330, 3),
+    ('zeytinburnu', 'Zeytinburnu', 40.9940, 28.9040, 3),
+    ('beykoz', 'Beykoz', 41.1340, 29.0920, 2),
+    ('adalar', 'Adalar', 40.8760, 29.0910, 1),
+]
+# (key, label, probability that a restaurant carries it)
+FEATURES = [
+    ('meal', 'Full Meals', 0.70),
+    ('coffee', 'Coffee', 0.45),
+    ('dessert', 'Dessert', 0.35),
+    ('outdoor', 'Outdoor Seating', 0.30),
+    ('alcohol', 'Serves Alcohol', 0.25),
+    ('breakfast', 'Breakfast', 0.20),
+    ('wifi', 'Wi-Fi', 0.20),
+    ('vegan', 'Vegan Options', 0.08),
+    ('sea-view', 'Sea View', 0.06),
+    ('live-music', 'Live Music', 0.03),
+]
+# (key, label, emoji, probability)
+ADDITIONAL_FILTERS = [
+    ('group-friendly', 'Group Friendly', '👥', 0.30),
+    ('date-night', 'Date Night', '💞', 0.15),
+    ('work-friendly', 'Work Friendly', '💻', 0.10),
+    ('late-night', 'Late Night', '🌙', 0.05),
+]
+PRICE_TIER_WEIGHTS = [25, 40, 25, 10]
+NAME_PREFIXES = [
+    'Eski', 'Yeni', 'Boğaz', 'Sahil', 'Köşe', 'Usta', 'Hünkar', 'Çınar', 'Lale', 'Galata',
+    'Moda', 'Nar', 'Kuzguncuk', 'Asmalı', 'Şehir', 'Karaköy', 'Ada', 'Bahçe',
+]
+NAME_KINDS = [
+    'Köftecisi', 'Meyhanesi', 'Lokantası', 'Kahvesi', 'Pidecisi', 'Balıkçısı', 'Ocakbaşı',
+    'Fırını', 'Kebapçısı', 'Mezecisi', 'Çay Bahçesi', 'Mantıcısı', 'Büfe', 'Tatlıcısı',
+]
+STREETS = [
+    'İstiklal', 'Bağdat', 'Halaskargazi', 'Moda', 'Sakızağacı', 'Muvakkithane', 'Ortaköy',
+]
+# Roughly one kilometre, in degrees, for the spread around a district centre.
+SPREAD = 0.012
+ACTIVE_SHARE = 0.97
+
+
+@dataclass
+class GenerateStats:
+    restaurants: int = 0
+    districts: int = 0
+    features: int = 0
+    additional: int = 0
+    elapsed: float = 0.0
+
+
+def generate(restaurants, seed=7, batch_size=2000, replace=False):
+    """Write ``restaurants`` synthetic rows (plus the taxonomy) and return ``GenerateStats``."""
+    started = time.monotonic()
+    with transaction.atomic():
+        if replace:
+            Restaurant.objects.all().delete()
+        districts = _taxonomy()
+        weights = [share for *_, share in DISTRICTS]
+        # Appending to an existing catalogue continues the numbering and must not
+        # replay the ids of the rows already there.
+        offset = Restaurant.objects.count()
+        rng = random.Random(f'{seed}:{offset}')
+        pks = []
+        for start in range(0, restaurants, batch_size):
+            count = min(batch_size, restaurants - start)
+            rows = [
+                _restaurant(rng, offset + start + index, districts, weights)
+                for index in range(count)
+            ]
+            _write(rows)
+            pks.extend(row.pk for row in rows)
+        # The new rows move the catalogue mean, so every score is refreshed.
+        recompute_scores(batch_size=batch_size)
+        refresh_restaurants(pks)
+    return GenerateStats(
+        restaurants=restaurants,
+        districts=len(DISTRICTS),
+        features=len(FEATURES),
+        additional=len(ADDITIONAL_FILTERS),
+        elapsed=time.monotonic() - started,
+    )
+
+
+def _taxonomy():
+    districts = {}
+    for slug, name, latitude, longitude, _ in DISTRICTS:
+        district, _ = District.objects.update_or_create(slug=slug, defaults={'name': name})
+        districts[slug] = (district, latitude, longitude)
+    for key, label, _ in FEATURES:
+        FeatureTag.objects.update_or_create(key=key, defaults={'label': label})
+    for key, label, emoji, _ in ADDITIONAL_FILTERS:
+        AdditionalFilter.objects.update_or_create(
+            key=key, defaults={'label': label, 'emoji': emoji}
+        )
+    return [districts[slug] for slug, *_ in DISTRICTS]
+
+
+def _restaurant(rng, number, districts, weights):
+    district, latitude, longitude = rng.choices(districts, weights)[0]
+    latitude = Decimal(f'{rng.gauss(latitude, SPREAD):.6f}')
+    longitude = Decimal(f'{rng.gauss(longitude, SPREAD):.6f}')
+    name = f'{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_KINDS)}'
+    return Restaurant(
+        id=uuid.UUID(int=rng.getrandbits(128), version=4),
+        name=name,
+        slug=f'{slugify(fold(name))}-{number}',
+        district=district,
+        description=f'{name}, {district.name}.',
+        address=f'{rng.choice(STREETS)} Cd. No:{rng.randint(1, 250)}, {district.name}',
+        latitude=latitude,
+        longitude=longitude,
+        # ``bulk_create`` skips ``save()``, which normally fills this in.
+        geohash=geohash_for(latitude, longitude),
+        price_tier=rng.choices(range(1, 5), PRICE_TIER_WEIGHTS)[0],
+        rating=Decimal(f'{min(5.0, max(1.0, rng.gauss(4.1, 0.45))):.1f}'),
+        review_count=int(rng.lognormvariate(4, 1.3)),
+        feature_keys=sorted(key for key, _, share in FEATURES if rng.random() < share),
+        additional_keys=sorted(
+            key for key, _, _, share in ADDITIONAL_FILTERS if rng.random() < share
+        ),
+        is_active=rng.random() < ACTIVE_SHARE,
+    )
+
+
+def _write(rows):
+    Restaurant.objects.bulk_create(rows)
+    feature_links = Restaurant.features.through
+    feature_links.objects.bulk_create(
+        feature_links(restaurant_id=row.pk, featuretag_id=key)
+        for row in rows
+        for key in row.feature_keys
+    )
+    additional_links = Restaurant.additional_filters.through
+    additional_links.objects.bulk_create(
+        additional_links(restaurant_id=row.pk, additionalfilter_id=key)
+        for row in rows
+        for key in row.additional_keys
+    )
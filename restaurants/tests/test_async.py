@@ -0,0 +1,185 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from bff.urls import urlpatterns as sync_urlpatterns
+from restaurants import async_views
+from restaurants.async_views import async_reads
+from restaurants.models import AdditionalFilter, District, FeatureTag, Restaurant
+from restaurants.suggestions import suggestion_index
+from restaurants.tests.test_timing import server_timing
+from restaurants.views import RestaurantViewSet, TaxonomyViewSet
+
+# This module doubles as the URLconf with the async read path installed.
+urlpatterns = async_reads(sync_urlpatterns)
+
+# Headers whose values legitimately differ between two requests.
+VOLATILE = {'Server-Timing', 'Date'}
+
+
+def stable_headers(response):
+    return {key: value for key, value in response.items() if key not in VOLATILE}
+
+
+# The async handlers read from worker threads, which only see committed rows.
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncReadsTestCase(TransactionTestCase):
+    def setUp(self):
+        kadikoy = District.objects.create(name='Kadıköy', slug='kadikoy')
+        beyoglu = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        FeatureTag.objects.create(key='outdoor', label='Outdoor Seating')
+        FeatureTag.objects.create(key='coffee', label='Coffee')
+        AdditionalFilter.objects.create(key='date-night', label='Date Night', emoji='💞')
+        for index in range(12):
+            restaurant = Restaurant.objects.create(
+                name=f'Mekan {index}',
+                slug=f'mekan-{index}',
+                district=kadikoy if index % 2 else beyoglu,
+                rating=index % 5,
+                price_tier=index % 4 + 1,
+                latitude=40.99 + index / 1000,
+                longitude=29.03,
+            )
+            restaurant.features.add(*['outdoor', 'coffee'][: index % 3])
+            if index % 4 == 0:
+                restaurant.additional_filters.add('date-night')
+        self.restaurant = Restaurant.objects.get(slug='mekan-3')
+        suggestion_index.invalidate()
+        self.sync = Client()
+        self.async_client = AsyncClient()
+
+    async def assertSameResponse(self, path, params=None, headers=None):
+        with self.settings(ROOT_URLCONF='bff.urls'):
+            expected = await sync_to_async(self.sync.get)(path, params, headers=headers)
+        response = await self.async_client.get(path, params, headers=headers)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(stable_headers(response), stable_headers(expected))
+        return response
+
+    async def test_restaurant_list(self):
+        url = reverse('restaurant-list')
+        for params in (
+            {},
+            {'limit': 5, 'offset': 5},
+            {'offset': 50},
+            {'district': 'kadikoy', 'ordering': 'price_tier'},
+            {'feature': ['outdoor', 'coffee'], 'feature_match': 'all'},
+            {'additional': 'date-night'},
+            {'near': '40.995,29.03', 'radius_m': 500},
+            {'cursor': ''},
+            {'feature_match': 'sometimes'},
+            {'fields': 'id,name,features'},
+            {'exclude': 'district', 'near': '40.995,29.03'},
+            {'fields': 'secret'},
+        ):
+            with self.subTest(params=params):
+                await self.assertSameResponse(url, params)
+
+    async def test_revalidation(self):
+        url = reverse('restaurant-list')
+        first = await self.assertSameResponse(url, {'district': 'beyoglu'})
+        response = await self.assertSameResponse(
+            url, {'district': 'beyoglu'}, headers={'If-None-Match': first['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+        detail = reverse('restaurant-detail', args=['mekan-3'])
+        first = await self.assertSameResponse(detail)
+        response = await self.assertSameResponse(detail, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_restaurant_detail(self):
+        for lookup in ('mekan-3', str(self.restaurant.pk), 'missing'):
+            with self.subTest(lookup=lookup):
+                await self.assertSameResponse(reverse('restaurant-detail', args=[lookup]))
+        url = reverse('restaurant-detail', args=['mekan-3'])
+        await self.assertSameResponse(url, {'fields': 'slug,additional_filters'})
+
+    async def test_taxonomy_lists(self):
+        for name in ('district-list', 'feature-list', 'additional-filter-list'):
+            with self.subTest(name=name):
+                await self.assertSameResponse(reverse(name))
+        await self.assertSameResponse(reverse('district-list'), {'ordering': '-name', 'limit': 1})
+
+    async def test_suggestions(self):
+        url = reverse('search-suggestions')
+        with self.settings(RESTAURANT_SUGGESTION_INDEX=True):
+            await self.assertSameResponse(url, {'q': 'mekan 1'})
+        await self.assertSameResponse(url, {'q': 'kadi'})
+        await self.assertSameResponse(url, {'q': ''})
+
+    async def test_other_requests_use_the_sync_views(self):
+        url = reverse('restaurant-list')
+        with self.settings(ROOT_URLCONF='bff.urls'):
+            expected = await sync_to_async(self.sync.get)(url, {'format': 'json'})
+        response = await self.async_client.get(url, {'format': 'json'})
+        self.assertEqual(response.content, expected.content)
+        response = await self.async_client.post(url, {}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(
+            url, headers={'Authorization': 'Bearer not-a-token'}
+        )
+        self.assertEqual(response.status_code, 401)
+        with self.settings(RESPONSE_CACHE=True):
+            response = await self.async_client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    async def test_queries_are_timed_across_threads(self):
+        response = await self.async_client.get(reverse('restaurant-list'))
+        # Stamp, taxonomy stamps, count and page, then tag keys for both through tables.
+        self.assertEqual(server_timing(response)['db'][1], '6 queries')
+
+    async def test_handled_without_the_sync_views(self):
+        sync_views = [
+            mock.patch.object(RestaurantViewSet, 'list', side_effect=AssertionError),
+            mock.patch.object(RestaurantViewSet, 'retrieve', side_effect=AssertionError),
+            mock.patch.object(TaxonomyViewSet, 'list', side_effect=AssertionError),
+        ]
+        for patcher in sync_views:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for url in (
+            reverse('restaurant-list'),
+            reverse('restaurant-detail', args=['mekan-3']),
+            reverse('feature-list'),
+        ):
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    async def test_connections_are_bounded_by_the_read_threads(self):
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self.close_connections, executor)
+        opened = []
+
+        def record(sender, connection, **kwargs):  # noqa: ARG001
+            opened.append(threading.get_ident())
+
+        connection_created.connect(record)
+        self.addCleanup(connection_created.disconnect, record)
+        url = reverse('restaurant-list')
+        with mock.patch.object(async_views, '_executor', executor):
+            responses = await asyncio.gather(*(self.async_client.get(url) for _ in range(10)))
+        self.assertEqual({response.status_code for response in responses}, {200})
+        # Ten requests' queries share at most one connection per pool thread.
+        self.assertIn(len(opened), (1, 2))
+
+    def close_connections(self, executor):
+        # One call per thread: each waits until both threads have closed theirs.
+        barrier = threading.Barrier(executor._max_workers)
+
+        def close():
+            connections.close_all()
+            barrier.wait(5)
+
+        for _ in range(executor._max_workers):
+            executor.submit(close)
+        executor.shutdown()
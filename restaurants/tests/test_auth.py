@@ -0,0 +1,86 @@
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from restaurants.models import District, Restaurant
+from restaurants.roles import editor_roles
+
+
+def auth_queries(queries):
+    return [query['sql'] for query in queries if 'auth_' in query['sql']]
+
+
+class EditorClaimsTestCase(APITestCase):
+    def setUp(self):
+        district = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        self.restaurant = Restaurant.objects.create(name='Mikla', slug='mikla', district=district)
+        self.editors = Group.objects.create(name='editors')
+        self.editor = User.objects.create_user(username='editor', password='pass12345')
+        self.editor.groups.add(self.editors)
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        self.url = reverse('restaurant-detail', args=['mikla'])
+
+    def sign_in(self, username):
+        response = self.client.post(
+            reverse('token_obtain_pair'), {'username': username, 'password': 'pass12345'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def patch(self, access):
+        return self.client.patch(
+            self.url, {'price_tier': 3}, format='json', HTTP_AUTHORIZATION=f'Bearer {access}'
+        )
+
+    def test_tokens_carry_the_editor_claim(self):
+        tokens = self.sign_in('editor')
+        self.assertIs(AccessToken(tokens['access'])['editor'], True)
+        self.assertIs(RefreshToken(tokens['refresh'])['editor'], True)
+        response = self.client.post(reverse('token_refresh'), {'refresh': tokens['refresh']})
+        self.assertIs(AccessToken(response.json()['access'])['editor'], True)
+        self.assertIs(AccessToken(self.sign_in('reader')['access'])['editor'], False)
+
+    def test_editor_writes_without_user_or_group_queries(self):
+        access = self.sign_in('editor')['access']
+        self.assertEqual(self.patch(access).status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch(access)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(auth_queries(queries), [])
+
+    def test_non_editor_refused_without_queries(self):
+        access = self.sign_in('reader')['access']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch(access)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(queries.captured_queries, [])
+
+    def test_removed_editor_loses_access(self):
+        access = self.sign_in('editor')['access']
+        self.assertEqual(self.patch(access).status_code, status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.editor.groups.remove(self.editors)
+        self.assertEqual(self.patch(access).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_revocations_from_other_processes_apply_after_the_ttl(self):
+        access = self.sign_in('editor')['access']
+        self.assertEqual(self.patch(access).status_code, status.HTTP_200_OK)
+        # A queryset update fires no signals, like a change made by another worker.
+        User.objects.filter(pk=self.editor.pk).update(is_active=False)
+        self.assertEqual(self.patch(access).status_code, status.HTTP_200_OK)
+        ttl = editor_roles.ttl
+        self.addCleanup(setattr, editor_roles, 'ttl', ttl)
+        editor_roles.ttl = 0
+        self.assertEqual(self.patch(access).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_session_users_are_checked_against_the_editor_set(self):
+        self.client.force_authenticate(user=self.editor)
+        response = self.client.patch(self.url, {'price_tier': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=self.reader)
+        response = self.client.patch(self.url, {'price_tier': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
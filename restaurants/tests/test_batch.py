@@ -0,0 +1,183 @@
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from restaurants.models import AdditionalFilter, District, FeatureTag, Restaurant
+
+
+class RestaurantBatchUpdateTestCase(APITestCase):
+    def setUp(self):
+        self.beyoglu = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        self.kadikoy = District.objects.create(name='Kadıköy', slug='kadikoy')
+        FeatureTag.objects.create(key='outdoor', label='Outdoor Seating')
+        FeatureTag.objects.create(key='coffee', label='Coffee')
+        AdditionalFilter.objects.create(key='date-night', label='Date Night')
+        self.restaurants = []
+        for index in range(5):
+            restaurant = Restaurant.objects.create(
+                name=f'Mekan {index}', slug=f'mekan-{index}', district=self.beyoglu
+            )
+            restaurant.features.add('outdoor')
+            self.restaurants.append(restaurant)
+        editors = Group.objects.create(name='editors')
+        self.editor = User.objects.create_user(username='editor', password='pass12345')
+        self.editor.groups.add(editors)
+        self.url = reverse('restaurant-batch')
+
+    def _patch(self, items):
+        self.client.force_authenticate(user=self.editor)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(self.url, items, format='json')
+
+    def test_requires_editor(self):
+        response = self.client.patch(self.url, [{'lookup': 'mekan-0'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_applies_updates_and_returns_detail_payloads(self):
+        response = self._patch(
+            [
+                {'lookup': 'mekan-0', 'price_tier': 4, 'feature_keys': ['coffee']},
+                {'lookup': str(self.restaurants[1].pk), 'district': self.kadikoy.pk},
+                {
+                    'lookup': 'mekan-2',
+                    'additional_keys': ['date-night'],
+                    'latitude': '41.000000',
+                    'longitude': '29.000000',
+                },
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()['results']
+        self.assertEqual([item['status'] for item in results], [200, 200, 200])
+        self.assertEqual(results[0]['data']['features'], ['coffee'])
+        self.assertEqual(results[0]['data']['price_tier'], 4)
+        self.assertEqual(results[1]['data']['district'], 'kadikoy')
+        self.assertEqual(results[2]['data']['additional_filters'], ['date-night'])
+        # Features untouched when ``feature_keys`` is absent.
+        self.assertEqual(results[2]['data']['features'], ['outdoor'])
+        detail = self.client.get(reverse('restaurant-detail', args=['mekan-2'])).json()
+        self.assertEqual(detail, results[2]['data'])
+        self.assertNotEqual(Restaurant.objects.get(slug='mekan-2').geohash, '')
+
+    def test_reports_invalid_items_and_applies_the_rest(self):
+        response = self._patch(
+            [
+                {'lookup': 'mekan-0', 'name': 'Yeni İsim'},
+                {'lookup': 'missing', 'name': 'X'},
+                {'lookup': 'mekan-1', 'price_tier': 7},
+                {'lookup': 'mekan-2', 'feature_keys': ['nope']},
+                {'lookup': 'mekan-3', 'slug': 'mekan-4'},
+                {'lookup': 'mekan-0', 'name': 'Twice'},
+                {'name': 'No lookup'},
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        results = response.json()['results']
+        statuses = [item['status'] for item in results]
+        self.assertEqual(statuses, [200, 404, 400, 400, 400, 400, 400])
+        self.assertEqual(
+            results[2]['errors'], {'price_tier': ['price_tier must be between 1 and 4']}
+        )
+        self.assertEqual(results[3]['errors'], {'feature_keys': ['Unknown keys: nope']})
+        self.assertIn('slug', results[4]['errors'])
+        self.assertEqual(Restaurant.objects.get(slug='mekan-0').name, 'Yeni İsim')
+        self.assertEqual(Restaurant.objects.get(slug='mekan-1').price_tier, 2)
+
+    def test_rejects_bad_bodies(self):
+        for body in ({'lookup': 'mekan-0'}, []):
+            with self.subTest(body=body):
+                self.assertEqual(self._patch(body).status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(RESTAURANT_BATCH_MAX_ITEMS=2):
+            items = [{'lookup': f'mekan-{index}'} for index in range(3)]
+            self.assertEqual(self._patch(items).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        for index in range(5, 60):
+            Restaurant.objects.create(
+                name=f'Mekan {index}', slug=f'mekan-{index}', district=self.beyoglu
+            )
+
+        def run(count, tier):
+            items = [
+                {'lookup': f'mekan-{index}', 'price_tier': tier, 'feature_keys': ['coffee']}
+                for index in range(count)
+            ]
+            self.client.force_authenticate(user=self.editor)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.patch(self.url, items, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(ctx.captured_queries)
+
+        # The first write also loads the per-process editor set.
+        run(1, 2)
+        self.assertEqual(run(3, 3), run(50, 1))
+
+
+class RestaurantBatchReadTestCase(APITestCase):
+    def setUp(self):
+        district = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        FeatureTag.objects.create(key='outdoor', label='Outdoor Seating')
+        self.restaurants = []
+        for index in range(30):
+            restaurant = Restaurant.objects.create(
+                name=f'Mekan {index}', slug=f'mekan-{index}', district=district
+            )
+            restaurant.features.add('outdoor')
+            self.restaurants.append(restaurant)
+        self.url = reverse('restaurant-batch')
+
+    def _get(self, **params):
+        return self.client.get(self.url, {key: ','.join(values) for key, values in params.items()})
+
+    def test_returns_detail_payloads_in_request_order(self):
+        first, second = str(self.restaurants[7].pk), str(self.restaurants[2].pk)
+        missing = '00000000-0000-0000-0000-000000000000'
+        response = self._get(ids=[first, missing, second], slugs=['mekan-5', 'nope', 'mekan-7'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        payload = response.json()
+        self.assertEqual(
+            [item['slug'] for item in payload['results']],
+            ['mekan-7', 'mekan-2', 'mekan-5', 'mekan-7'],
+        )
+        self.assertEqual(payload['missing'], [missing, 'nope'])
+        detail = self.client.get(reverse('restaurant-detail', args=['mekan-5'])).json()
+        self.assertEqual(payload['results'][2], detail)
+
+        with self.settings(RESTAURANT_FAST_PAYLOADS=False):
+            self.assertEqual(
+                self._get(ids=[first, missing, second], slugs=['mekan-5', 'nope', 'mekan-7'])
+                .json(),
+                payload,
+            )
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def run(count):
+            slugs = [f'mekan-{index}' for index in range(count)]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self._get(slugs=slugs)
+            self.assertEqual(len(response.json()['results']), count)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(run(2), run(30))
+
+    def test_revalidation(self):
+        first = self._get(slugs=['mekan-1', 'mekan-2'])
+        response = self.client.get(
+            self.url, {'slugs': 'mekan-1,mekan-2'}, HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        other = self._get(slugs=['mekan-2', 'mekan-1'])
+        self.assertNotEqual(other['ETag'], first['ETag'])
+
+    def test_rejects_bad_lookups(self):
+        for params in ({}, {'ids': ['not-a-uuid']}, {'slugs': [' ', '']}):
+            with self.subTest(params=params):
+                self.assertEqual(self._get(**params).status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(RESTAURANT_BATCH_MAX_LOOKUPS=2):
+            response = self._get(slugs=['mekan-1', 'mekan-2', 'mekan-3'])
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            response = self._get(slugs=['mekan-1', 'mekan-2', 'mekan-1'])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
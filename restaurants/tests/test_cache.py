@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from restaurants.cache import ResponseCache, response_cache
+from restaurants.models import District, FeatureTag, Restaurant
+
+
+@override_settings(RESPONSE_CACHE=True)
+class ResponseCacheTestCase(APITestCase):
+    def setUp(self):
+        response_cache.backend.clear()
+        response_cache.clear()
+        response_cache.reset_stats()
+        self.district = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        FeatureTag.objects.create(key='outdoor', label='Outdoor Seating')
+        self.restaurant = Restaurant.objects.create(
+            name='Mikla', slug='mikla', district=self.district, rating=4.5
+        )
+
+    def test_repeated_reads_hit_without_queries(self):
+        url = reverse('restaurant-list')
+        first = self.client.get(url, {'district': 'beyoglu', 'limit': 5})
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get(url, {'limit': 5, 'district': 'beyoglu'})
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.json(), first.json())
+
+        detail = reverse('restaurant-detail', args=['mikla'])
+        self.assertEqual(self.client.get(detail)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(detail)['X-Cache'], 'HIT')
+        self.assertEqual(response_cache.stats()['hits'], 2)
+        self.assertEqual(response_cache.stats()['misses'], 2)
+
+    def test_writes_only_retire_affected_resources(self):
+        restaurants = reverse('restaurant-list')
+        features = reverse('feature-list')
+        self.client.get(restaurants)
+        self.client.get(features)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.restaurant.name = 'Mikla Yeni'
+            self.restaurant.save()
+
+        response = self.client.get(restaurants)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['results'][0]['name'], 'Mikla Yeni')
+        self.assertEqual(self.client.get(features)['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FeatureTag.objects.create(key='coffee', label='Coffee')
+        response = self.client.get(features)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertEqual(self.client.get(restaurants)['X-Cache'], 'MISS')
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = ResponseCache(alias='responses', max_entries=2)
+        cache.set('a', {'n': 1})
+        cache.set('b', {'n': 2})
+        cache.get('a')
+        cache.set('c', {'n': 3})
+        self.assertEqual(list(cache._lru), ['a', 'c'])
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_file_based_backend_shares_versions(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }
+            with override_settings(CACHES={'default': backend, 'responses': backend}):
+                writer = ResponseCache(alias='responses')
+                reader = ResponseCache(alias='responses')
+                before = reader.make_key('scope', ['restaurants'], {})
+                writer.set(before, {'cached': True})
+                self.assertEqual(reader.get(before), {'cached': True})
+                writer.bump('restaurants')
+                self.assertNotEqual(reader.make_key('scope', ['restaurants'], {}), before)
+
+
+class ResponseCacheSettingsTestCase(SimpleTestCase):
+    def load_settings(self, **env):
+        env = {**os.environ, 'DATABASE_URL': 'sqlite:///:memory:', 'RESPONSE_CACHE': '1', **env}
+        return subprocess.run(
+            [sys.executable, '-c', 'import bff.settings'],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+
+    def test_refuses_a_per_process_backend(self):
+        backend = 'django.core.cache.backends.locmem.LocMemCache'
+        result = self.load_settings(RESPONSE_CACHE_BACKEND=backend)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('RESPONSE_CACHE=1 requires a RESPONSE_CACHE_BACKEND', result.stderr)
+
+    def test_accepts_a_shared_backend(self):
+        backend = 'django.core.cache.backends.filebased.FileBasedCache'
+        result = self.load_settings(RESPONSE_CACHE_BACKEND=backend)
+        self.assertEqual(result.returncode, 0, result.stderr)
@@ -0,0 +1,166 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from restaurants.coalesce import BUILT, JOINED, STALE, Coalescer, _Flight, coalescer
+from restaurants.models import District
+from restaurants.timing import metrics
+
+
+class CoalescerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.coalescer = Coalescer(wait=5, stale_seconds=60)
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.calls = 0
+
+    def slow_build(self, payload):
+        def build():
+            self.calls += 1
+            self.started.set()
+            self.release.wait(5)
+            return Response(payload)
+
+        return build
+
+    def run_concurrently(self, leader, follower, followers=5):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(leader()))]
+        threads[0].start()
+        self.started.wait(5)
+        for _ in range(followers):
+            threads.append(threading.Thread(target=lambda: results.append(follower())))
+            threads[-1].start()
+        # Let the followers reach the flight before the leader finishes.
+        time.sleep(0.1)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_identical_requests_share_one_build(self):
+        build = self.slow_build({'count': 1})
+        respond = lambda: self.coalescer.respond('base', 'v1', build)  # noqa: E731
+        results = self.run_concurrently(respond, respond)
+        self.assertEqual(self.calls, 1)
+        outcomes = sorted(outcome for _, outcome in results)
+        self.assertEqual(outcomes, [BUILT] + [JOINED] * 5)
+        self.assertEqual({response.data['count'] for response, _ in results}, {1})
+        # Followers get their own response objects.
+        self.assertEqual(len({id(response) for response, _ in results}), 6)
+
+    def test_previous_version_is_served_while_refreshing(self):
+        self.coalescer.respond('base', 'v1', lambda: Response({'version': 1}))
+        build = self.slow_build({'version': 2})
+        respond = lambda: self.coalescer.respond('base', 'v2', build)  # noqa: E731
+        results = self.run_concurrently(respond, respond, followers=3)
+        stale = [response for response, outcome in results if outcome == STALE]
+        self.assertEqual(len(stale), 3)
+        self.assertTrue(all(response.stale for response in stale))
+        self.assertEqual({response.data['version'] for response in stale}, {1})
+        response, outcome = self.coalescer.respond('base', 'v2', build)
+        self.assertEqual((outcome, response.data['version']), (BUILT, 2))
+
+    def test_same_version_payloads_are_still_stale(self):
+        # Other processes' writes leave this process's versions alone.
+        self.coalescer.respond('base', 'v1', lambda: Response({'version': 1}))
+        build = self.slow_build({'version': 2})
+        respond = lambda: self.coalescer.respond('base', 'v1', build)  # noqa: E731
+        results = self.run_concurrently(respond, respond, followers=2)
+        stale = [response for response, outcome in results if outcome == STALE]
+        self.assertEqual(len(stale), 2)
+        self.assertTrue(all(response.stale for response in stale))
+
+        self.coalescer.stale_seconds = 0
+        time.sleep(0.01)
+        self.started.clear()
+        self.release.clear()
+        build = self.slow_build({'version': 3})
+        respond = lambda: self.coalescer.respond('base', 'v1', build)  # noqa: E731
+        results = self.run_concurrently(respond, respond, followers=2)
+        self.assertEqual(sorted(outcome for _, outcome in results), [BUILT, JOINED, JOINED])
+
+    def test_stale_payloads_expire(self):
+        self.coalescer.stale_seconds = 0
+        self.coalescer.respond('base', 'v1', lambda: Response({'version': 1}))
+        time.sleep(0.01)
+        build = self.slow_build({'version': 2})
+        respond = lambda: self.coalescer.respond('base', 'v2', build)  # noqa: E731
+        results = self.run_concurrently(respond, respond, followers=2)
+        self.assertEqual(sorted(outcome for _, outcome in results), [BUILT, JOINED, JOINED])
+
+    def test_followers_compute_when_the_leader_fails(self):
+        def failing():
+            self.started.set()
+            self.release.wait(5)
+            raise RuntimeError('database went away')
+
+        def leader():
+            try:
+                self.coalescer.share('key', failing)
+            except RuntimeError as error:
+                return error
+            return None
+
+        follower = lambda: self.coalescer.share('key', lambda: 'computed')  # noqa: E731
+        results = self.run_concurrently(leader, follower, followers=2)
+        self.assertIsInstance(results[0], RuntimeError)
+        self.assertEqual(sorted(results[1:]), [('computed', BUILT)] * 2)
+        self.assertEqual(self.coalescer._flights, {})
+
+
+class AlwaysInFlight(dict):
+    """Every key looks like it is being built by another request."""
+
+    def get(self, key, default=None):  # noqa: ARG002
+        return _Flight()
+
+
+class CoalescedViewTestCase(APITestCase):
+    url = reverse('district-list')
+
+    def setUp(self):
+        District.objects.create(name='Beyoğlu', slug='beyoglu')
+        coalescer.clear()
+        metrics.reset()
+
+    def test_stale_list_is_served_during_a_refresh(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            District.objects.create(name='Kadıköy', slug='kadikoy')
+
+        # The validators get no stale fallback; stop them waiting for a leader.
+        in_flight = mock.patch.object(coalescer, '_flights', AlwaysInFlight())
+        with in_flight, mock.patch.object(coalescer, 'wait', 0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), first.json())
+        self.assertEqual(response['X-Cache'], 'STALE')
+        self.assertFalse(response.has_header('ETag'))
+        self.assertIn(
+            'bff_coalesced_requests_total{route="district-list",outcome="stale"} 1',
+            metrics.render(),
+        )
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['count'], 2)
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_authenticated_reads_are_not_coalesced(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            District.objects.create(name='Kadıköy', slug='kadikoy')
+        access = AccessToken.for_user(User.objects.create_user(username='reader'))
+        with mock.patch.object(coalescer, '_flights', AlwaysInFlight()):
+            response = self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['count'], 2)
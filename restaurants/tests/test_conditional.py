@@ -0,0 +1,85 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from restaurants.models import District, FeatureTag, Restaurant
+from restaurants.suggestions import suggestion_index
+
+
+class ConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        self.district = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        FeatureTag.objects.create(key='outdoor', label='Outdoor Seating')
+        self.restaurant = Restaurant.objects.create(
+            name='Mikla', slug='mikla', district=self.district, rating=4.5
+        )
+        suggestion_index.invalidate()
+
+    def _revalidate(self, url, params=None, **headers):
+        first = self.client.get(url, params)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertTrue(first['ETag'].startswith('"'))
+        return first, self.client.get(url, params, HTTP_IF_NONE_MATCH=first['ETag'], **headers)
+
+    def test_list_short_circuits_before_serialization(self):
+        url = reverse('restaurant-list')
+        first = self.client.get(url, {'district': 'beyoglu'})
+        self.assertIn('Last-Modified', first)
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                url, {'district': 'beyoglu'}, HTTP_IF_NONE_MATCH=first['ETag']
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+        other = self.client.get(url, {'district': 'kadikoy'})
+        self.assertNotEqual(other['ETag'], first['ETag'])
+
+        self.restaurant.rating = 4.9
+        self.restaurant.save()
+        response = self.client.get(url, {'district': 'beyoglu'}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_notices_rows_leaving_the_filtered_set(self):
+        url = reverse('restaurant-list')
+        Restaurant.objects.create(name='Nicole', slug='nicole', district=self.district)
+        first = self.client.get(url)
+        Restaurant.objects.filter(slug='nicole').delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_by_slug_and_uuid(self):
+        for lookup in ('mikla', str(self.restaurant.pk)):
+            url = reverse('restaurant-detail', args=[lookup])
+            first, response = self._revalidate(url)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        missing = reverse('restaurant-detail', args=['missing'])
+        response = self.client.get(missing, HTTP_IF_NONE_MATCH='"anything"')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_taxonomy_validators_follow_renames(self):
+        url = reverse('district-list')
+        first, response = self._revalidate(url)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.district.name = 'Pera'
+        self.district.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # District names are part of the restaurant payload too.
+        restaurants = self.client.get(reverse('restaurant-list'))
+        self.assertEqual(restaurants.json()['results'][0]['district_name'], 'Pera')
+
+    def test_other_read_endpoints(self):
+        for url, params in [
+            (reverse('feature-list'), None),
+            (reverse('restaurant-facets'), {'district': 'beyoglu'}),
+            (reverse('search-suggestions'), {'q': 'mik'}),
+        ]:
+            with self.subTest(url=url):
+                _, response = self._revalidate(url, params)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,81 @@
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from restaurants.exports import ndjson_lines
+from restaurants.models import AdditionalFilter, District, FeatureTag, Restaurant
+
+
+class RestaurantExportTestCase(APITestCase):
+    def setUp(self):
+        district = District.objects.create(name='Kadıköy', slug='kadikoy')
+        FeatureTag.objects.create(key='outdoor', label='Outdoor Seating')
+        AdditionalFilter.objects.create(key='date-night', label='Date Night', emoji='💞')
+        for index in range(7):
+            restaurant = Restaurant.objects.create(
+                name=f'Mekan {index}',
+                slug=f'mekan-{index}',
+                district=district,
+                rating=4 + index / 10,
+                latitude='41.0' if index % 2 else None,
+                longitude='29.0' if index % 2 else None,
+            )
+            if index % 3 == 0:
+                restaurant.features.add('outdoor')
+                restaurant.additional_filters.add('date-night')
+        Restaurant.objects.create(name='Kapalı', slug='kapali', district=district, is_active=False)
+        self.url = reverse('restaurant-export')
+
+    def _expected(self):
+        return b''.join(
+            self.client.get(reverse('restaurant-detail', args=[f'mekan-{index}'])).content + b'\n'
+            for index in range(7)
+        )
+
+    def test_streams_active_restaurants_as_detail_payloads(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(body, self._expected())
+        self.assertEqual(json.loads(body.splitlines()[0])['features'], ['outdoor'])
+
+    def test_gzip_when_accepted(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self._expected())
+
+        identity = self.client.get(self.url)
+        self.assertNotEqual(response['ETag'], identity['ETag'])
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_queries_per_chunk(self):
+        # One cursor plus one tag-key query per through table for each chunk.
+        with self.assertNumQueries(1 + 2 * 4):
+            lines = b''.join(ndjson_lines(chunk_size=2)).splitlines()
+        self.assertEqual(len(lines), 7)
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            plain, packed = Path(tmp) / 'catalogue.ndjson', Path(tmp) / 'catalogue.ndjson.gz'
+            call_command('export_restaurants', str(plain), stdout=StringIO())
+            out = StringIO()
+            call_command(
+                'export_restaurants', str(packed), '--gzip', '--chunk-size', '3', stdout=out
+            )
+            self.assertIn('Wrote', out.getvalue())
+            self.assertEqual(plain.read_bytes(), self._expected())
+            self.assertEqual(gzip.decompress(packed.read_bytes()), self._expected())
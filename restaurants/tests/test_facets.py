@@ -0,0 +1,174 @@
+from django.contrib.auth.models import Group, User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from restaurants.facets import MATCH_ALL, facet_index
+from restaurants.models import AdditionalFilter, District, FeatureTag, Restaurant
+
+
+class FacetTestBase(APITestCase):
+    def setUp(self):
+        self.beyoglu = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        self.kadikoy = District.objects.create(name='Kadıköy', slug='kadikoy')
+        self.outdoor = FeatureTag.objects.create(key='outdoor', label='Outdoor Seating')
+        self.coffee = FeatureTag.objects.create(key='coffee', label='Coffee')
+        self.date_night = AdditionalFilter.objects.create(key='date-night', label='Date Night')
+
+        self.mikla = self._restaurant('Mikla', self.beyoglu, 4.5, ['outdoor', 'coffee'])
+        self.ciya = self._restaurant('Çiya', self.kadikoy, 4.8, ['outdoor'])
+        self.moda = self._restaurant('Moda Kahve', self.kadikoy, 4.1, ['coffee'])
+        self.moda.additional_filters.add(self.date_night)
+        self._restaurant('Kapalı', self.beyoglu, 3.0, ['outdoor'], is_active=False)
+        facet_index.rebuild()
+
+    def _restaurant(self, name, district, rating, feature_keys, is_active=True):
+        restaurant = Restaurant.objects.create(
+            name=name,
+            slug=name.lower().replace(' ', '-'),
+            district=district,
+            rating=rating,
+            is_active=is_active,
+        )
+        restaurant.features.set(feature_keys)
+        return restaurant
+
+
+class FacetIndexTestCase(FacetTestBase):
+    def _slugs(self, bits):
+        return [Restaurant.objects.get(pk=pk).slug for pk in facet_index.page(bits)]
+
+    def test_any_and_all_semantics(self):
+        bits = facet_index.match(features=['outdoor', 'coffee'])
+        self.assertEqual(self._slugs(bits), ['çiya', 'mikla', 'moda-kahve'])
+
+        bits = facet_index.match(features=['outdoor', 'coffee'], feature_match=MATCH_ALL)
+        self.assertEqual(self._slugs(bits), ['mikla'])
+
+        bits = facet_index.match(district='kadikoy', additional=['date-night'])
+        self.assertEqual(self._slugs(bits), ['moda-kahve'])
+
+        self.assertEqual(facet_index.match(features=['unknown']), 0)
+
+    def test_page_respects_offset_and_limit(self):
+        bits = facet_index.match()
+        pks = facet_index.page(bits, '-rating', offset=1, limit=1)
+        self.assertEqual(pks, [self.mikla.pk])
+
+    @override_settings(RESTAURANT_FACET_INDEX=True)
+    def test_list_matches_database_path(self):
+        url = reverse('restaurant-list')
+        params = {'feature': ['outdoor', 'coffee'], 'feature_match': 'all', 'limit': 10}
+        indexed = self.client.get(url, params).json()
+        with override_settings(RESTAURANT_FACET_INDEX=False):
+            plain = self.client.get(url, params).json()
+        self.assertEqual(indexed, plain)
+        self.assertEqual(indexed['count'], 1)
+
+        params = {'district': 'kadikoy', 'ordering': 'rating'}
+        indexed = self.client.get(url, params).json()
+        self.assertEqual([row['slug'] for row in indexed['results']], ['moda-kahve', 'çiya'])
+
+    @override_settings(RESTAURANT_FACET_INDEX=True)
+    def test_index_refreshes_after_serializer_write(self):
+        editors = Group.objects.create(name='editors')
+        user = User.objects.create_user(username='editor', password='pass12345')
+        user.groups.add(editors)
+        self.client.force_authenticate(user=user)
+
+        url = reverse('restaurant-detail', args=[self.ciya.slug])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url, {'feature_keys': ['coffee']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse('restaurant-list'), {'feature': 'outdoor'})
+        self.assertEqual([row['slug'] for row in response.json()['results']], ['mikla'])
+
+    @override_settings(RESTAURANT_FACET_INDEX=True)
+    def test_ties_follow_the_database_order(self):
+        # Same rating as Mikla; two share a name, so only the id breaks their tie.
+        for index, name in enumerate(('zeytin', 'Ada', 'Çınar', 'ada', 'Ada')):
+            Restaurant.objects.create(
+                name=name, slug=f'tie-{index}', district=self.beyoglu, rating=4.5
+            )
+        facet_index.rebuild()
+        url = reverse('restaurant-list')
+
+        def both_paths(params):
+            indexed = self.client.get(url, params).json()['results']
+            with override_settings(RESTAURANT_FACET_INDEX=False):
+                plain = self.client.get(url, params).json()['results']
+            self.assertEqual(indexed, plain)
+            return [row['name'] for row in indexed]
+
+        expected = list(
+            Restaurant.objects.filter(is_active=True, rating=4.5)
+            .order_by('name', 'id')
+            .values_list('name', flat=True)
+        )
+        self.assertEqual(both_paths({'district': 'beyoglu'}), expected)
+        both_paths({'ordering': 'price_tier'})
+        both_paths({'ordering': '-price_tier'})
+
+        restaurant = Restaurant.objects.get(name='zeytin')
+        with self.captureOnCommitCallbacks(execute=True):
+            restaurant.name = 'Aaa'
+            restaurant.save()
+        self.assertEqual(both_paths({'district': 'beyoglu'})[0], 'Aaa')
+
+    def test_invalid_match_mode_is_rejected(self):
+        response = self.client.get(reverse('restaurant-list'), {'feature_match': 'some'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FacetCountsTestCase(FacetTestBase):
+    url = reverse('restaurant-facets')
+
+    def _brute_force(self, params, extra):
+        merged = {**params}
+        for key, value in extra.items():
+            merged[key] = value if key == 'district' else [*params.get(key, []), value]
+        return self.client.get(reverse('restaurant-list'), merged).json()['count']
+
+    def _counts(self, payload, section, field):
+        return {row[field]: row['count'] for row in payload[section]}
+
+    def _assert_matches_brute_force(self, params):
+        payload = self.client.get(self.url, params).json()
+        for slug, count in self._counts(payload, 'districts', 'slug').items():
+            self.assertEqual(count, self._brute_force(params, {'district': slug}), slug)
+        for key, count in self._counts(payload, 'features', 'key').items():
+            self.assertEqual(count, self._brute_force(params, {'feature': key}), key)
+        for key, count in self._counts(payload, 'additional_filters', 'key').items():
+            self.assertEqual(count, self._brute_force(params, {'additional': key}), key)
+        return payload
+
+    def test_counts_match_one_query_per_option(self):
+        cases = [
+            {},
+            {'district': 'kadikoy'},
+            {'feature': ['coffee']},
+            {'feature': ['coffee', 'outdoor'], 'feature_match': 'all'},
+            {'additional': ['date-night'], 'feature': ['outdoor']},
+        ]
+        for params in cases:
+            for enabled in (False, True):
+                with self.subTest(params=params, index=enabled), override_settings(
+                    RESTAURANT_FACET_INDEX=enabled
+                ):
+                    self._assert_matches_brute_force(params)
+
+    def test_query_count_is_independent_of_taxonomy_size(self):
+        with self.assertNumQueries(9):
+            self.client.get(self.url, {'feature': 'coffee'})
+        FeatureTag.objects.bulk_create(
+            FeatureTag(key=f'tag-{i}', label=f'Tag {i}') for i in range(20)
+        )
+        District.objects.bulk_create(
+            District(name=f'District {i}', slug=f'district-{i}') for i in range(20)
+        )
+        with self.assertNumQueries(9):
+            payload = self.client.get(self.url, {'feature': 'coffee'}).json()
+        self.assertEqual(len(payload['features']), 22)
+        self.assertEqual(self._counts(payload, 'features', 'key')['tag-0'], 2)
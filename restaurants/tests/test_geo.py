@@ -0,0 +1,153 @@
+import math
+import random
+from decimal import Decimal
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from restaurants import geo
+from restaurants.facets import facet_index
+from restaurants.models import District, FeatureTag, Restaurant
+
+TAKSIM = (41.0370, 28.9850)
+
+
+class GeohashTestCase(SimpleTestCase):
+    def test_encode_known_point(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+
+    def test_covering_cells_contain_every_point_in_the_box(self):
+        rng = random.Random(3)
+        for radius in (50, 800, 5000, 40000):
+            box = geo.bounding_box(*TAKSIM, radius)
+            cells = geo.covering_cells(box)
+            self.assertLessEqual(len(cells), geo.MAX_COVERING_CELLS)
+            south, north, west, east = box
+            for _ in range(200):
+                point = geo.encode(rng.uniform(south, north), rng.uniform(west, east))
+                self.assertTrue(any(point.startswith(cell) for cell in cells), (radius, point))
+
+    def test_bounding_box_contains_the_circle(self):
+        south, north, west, east = geo.bounding_box(*TAKSIM, 20000)
+        for bearing in range(0, 360, 5):
+            lat, lng = _destination(*TAKSIM, 20000, bearing)
+            epsilon = 1e-9
+            self.assertTrue(south - epsilon <= lat <= north + epsilon, bearing)
+            self.assertTrue(west - epsilon <= lng <= east + epsilon, bearing)
+
+
+def _destination(latitude, longitude, distance_m, bearing):
+    """Point ``distance_m`` from the origin along ``bearing`` (degrees)."""
+    angle = distance_m / geo.EARTH_RADIUS_M
+    phi1, lmb1, theta = map(math.radians, (latitude, longitude, bearing))
+    phi2 = math.asin(
+        math.sin(phi1) * math.cos(angle) + math.cos(phi1) * math.sin(angle) * math.cos(theta)
+    )
+    lmb2 = lmb1 + math.atan2(
+        math.sin(theta) * math.sin(angle) * math.cos(phi1),
+        math.cos(angle) - math.sin(phi1) * math.sin(phi2),
+    )
+    return math.degrees(phi2), math.degrees(lmb2)
+
+
+class NearbyApiTestCase(APITestCase):
+    def setUp(self):
+        self.beyoglu = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        self.kadikoy = District.objects.create(name='Kadıköy', slug='kadikoy')
+        FeatureTag.objects.create(key='outdoor', label='Outdoor Seating')
+        rng = random.Random(11)
+        self.rows = []
+        for index in range(300):
+            latitude = Decimal(f'{rng.uniform(40.95, 41.12):.6f}')
+            longitude = Decimal(f'{rng.uniform(28.85, 29.12):.6f}')
+            restaurant = Restaurant.objects.create(
+                name=f'Mekan {index}',
+                slug=f'mekan-{index}',
+                district=self.beyoglu if index % 2 else self.kadikoy,
+                rating=round(rng.uniform(3, 5), 1),
+                latitude=latitude,
+                longitude=longitude,
+            )
+            if index % 3 == 0:
+                restaurant.features.add('outdoor')
+            self.rows.append(restaurant)
+        Restaurant.objects.create(name='Nowhere', slug='nowhere', district=self.beyoglu)
+        self.url = reverse('restaurant-list')
+        facet_index.rebuild()
+
+    def _expected(self, radius, predicate=lambda row: True):
+        distances = {
+            row.slug: geo.haversine_m(*TAKSIM, float(row.latitude), float(row.longitude))
+            for row in self.rows
+            if predicate(row)
+        }
+        return sorted((slug for slug, d in distances.items() if d <= radius), key=distances.get)
+
+    def _get(self, **params):
+        response = self.client.get(self.url, {'near': '%s,%s' % TAKSIM, 'limit': 500, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return response.json()
+
+    def test_matches_brute_force_sorted_by_distance(self):
+        for radius in (500, 3000, 8000):
+            with self.subTest(radius=radius):
+                payload = self._get(radius_m=radius)
+                slugs = [row['slug'] for row in payload['results']]
+                self.assertEqual(slugs, self._expected(radius))
+                distances = [row['distance_m'] for row in payload['results']]
+                self.assertEqual(distances, sorted(distances))
+
+    def test_combines_with_other_filters_and_ordering(self):
+        outdoor_in_beyoglu = self._expected(
+            5000,
+            lambda row: row.district_id == self.beyoglu.pk
+            and row.features.filter(key='outdoor').exists(),
+        )
+        payload = self._get(radius_m=5000, district='beyoglu', feature='outdoor')
+        self.assertEqual([row['slug'] for row in payload['results']], outdoor_in_beyoglu)
+
+        payload = self._get(radius_m=5000, ordering='-rating')
+        ratings = [row['rating'] for row in payload['results']]
+        self.assertEqual(ratings, sorted(ratings, reverse=True))
+
+    @override_settings(RESTAURANT_FACET_INDEX=True)
+    def test_facet_index_defers_to_database(self):
+        payload = self._get(radius_m=3000)
+        self.assertEqual([row['slug'] for row in payload['results']], self._expected(3000))
+        facets = self.client.get(
+            reverse('restaurant-facets'), {'near': '%s,%s' % TAKSIM, 'radius_m': 3000}
+        ).json()
+        self.assertEqual(facets['count'], len(self._expected(3000)))
+
+    def test_cursor_pages_by_distance(self):
+        slugs = []
+        response = self.client.get(
+            self.url, {'near': '%s,%s' % TAKSIM, 'radius_m': 6000, 'limit': 7, 'cursor': ''}
+        )
+        while True:
+            payload = response.json()
+            slugs.extend(row['slug'] for row in payload['results'])
+            if not payload['next']:
+                break
+            response = self.client.get(payload['next'])
+        self.assertEqual(slugs, self._expected(6000))
+
+    def test_distance_ordering_ignored_without_near(self):
+        response = self.client.get(self.url, {'ordering': 'distance'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('distance_m', response.json()['results'][0])
+
+    def test_rejects_invalid_coordinates(self):
+        for params in ({'near': 'abc'}, {'near': '95,10'}, {'near': '41,29', 'radius_m': 10**6}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_geohash_follows_coordinates(self):
+        restaurant = self.rows[0]
+        restaurant.latitude, restaurant.longitude = Decimal('41.0'), Decimal('29.0')
+        restaurant.save(update_fields=['latitude', 'longitude'])
+        restaurant.refresh_from_db()
+        self.assertEqual(restaurant.geohash, geo.encode(41.0, 29.0))
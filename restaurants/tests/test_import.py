@@ -0,0 +1,155 @@
+import json
+from collections import Counter
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from restaurants import geo
+from restaurants.models import AdditionalFilter, District, FeatureTag, Restaurant
+
+
+class ImportRestaurantsTestCase(TestCase):
+    def setUp(self):
+        self.beyoglu = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        self.kadikoy = District.objects.create(name='Kadıköy', slug='kadikoy')
+        FeatureTag.objects.create(key='outdoor', label='Outdoor Seating')
+        FeatureTag.objects.create(key='coffee', label='Coffee')
+        AdditionalFilter.objects.create(key='date-night', label='Date Night')
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _write(self, name, content):
+        path = Path(self.tmp.name) / name
+        path.write_text(content, encoding='utf-8')
+        return str(path)
+
+    def _ndjson(self, rows):
+        return self._write('catalogue.ndjson', '\n'.join(json.dumps(row) for row in rows) + '\n')
+
+    def _import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_restaurants', path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_ndjson_creates_and_upserts_on_slug(self):
+        Restaurant.objects.create(
+            name='Mikla (old)', slug='mikla', district=self.kadikoy, price_tier=1, rating=4
+        )
+        path = self._ndjson(
+            [
+                {
+                    'name': 'Mikla',
+                    'slug': 'mikla',
+                    'district': 'beyoglu',
+                    'price_tier': 4,
+                    'latitude': '41.031600',
+                    'longitude': '28.975500',
+                    'feature_keys': ['outdoor', 'coffee'],
+                    'additional_keys': ['date-night'],
+                },
+                {'name': 'Çiya', 'slug': 'ciya', 'district': str(self.kadikoy.pk)},
+            ]
+        )
+        out, err = self._import(path)
+        self.assertIn('1 created, 1 updated, 0 rejected', out)
+        self.assertEqual(err, '')
+
+        mikla = Restaurant.objects.get(slug='mikla')
+        self.assertEqual((mikla.name, mikla.district, mikla.price_tier), ('Mikla', self.beyoglu, 4))
+        # Fields missing from the row keep their stored values.
+        self.assertEqual(mikla.rating, Decimal('4.0'))
+        self.assertEqual(mikla.geohash, geo.encode(41.0316, 28.9755))
+        features = mikla.features.values_list('key', flat=True)
+        self.assertEqual(sorted(features), ['coffee', 'outdoor'])
+        self.assertEqual([tag.key for tag in mikla.additional_filters.all()], ['date-night'])
+        ciya = Restaurant.objects.get(slug='ciya')
+        self.assertEqual((ciya.district, ciya.price_tier, ciya.geohash), (self.kadikoy, 2, ''))
+
+        row = {'name': 'Mikla', 'slug': 'mikla', 'district': 'beyoglu', 'feature_keys': ['coffee']}
+        self._import(self._ndjson([row]))
+        self.assertEqual(list(mikla.features.values_list('key', flat=True)), ['coffee'])
+        self.assertEqual(mikla.additional_filters.count(), 1)
+
+    def test_csv_with_tag_columns(self):
+        path = self._write(
+            'catalogue.csv',
+            'name,slug,district,price_tier,feature_keys,additional_keys,is_active\n'
+            'Moda Kahve,moda-kahve,kadikoy,1,coffee|outdoor,,false\n'
+            'Karaköy Lokantası,karakoy,beyoglu,,,date-night,\n',
+        )
+        out, _ = self._import(path)
+        self.assertIn('2 created', out)
+        moda = Restaurant.objects.get(slug='moda-kahve')
+        self.assertFalse(moda.is_active)
+        self.assertEqual(moda.features.count(), 2)
+        karakoy = Restaurant.objects.get(slug='karakoy')
+        self.assertEqual((karakoy.price_tier, karakoy.is_active), (2, True))
+        self.assertEqual(karakoy.features.count(), 0)
+
+    def test_rejects_invalid_rows_and_keeps_going(self):
+        unknown_tag = {'name': 'X', 'slug': 'x', 'district': 'kadikoy', 'feature_keys': ['x']}
+        path = self._write(
+            'catalogue.ndjson',
+            '\n'.join(
+                [
+                    json.dumps({'name': 'Ok', 'slug': 'ok', 'district': 'beyoglu'}),
+                    json.dumps({'name': 'T', 'slug': 't', 'district': 'kadikoy', 'price_tier': 9}),
+                    json.dumps({'name': 'Where', 'slug': 'where', 'district': 'moon'}),
+                    json.dumps(unknown_tag),
+                    '{not json',
+                    json.dumps({'slug': 'nameless', 'district': 'beyoglu'}),
+                ]
+            ),
+        )
+        rejects = str(Path(self.tmp.name) / 'rejects.ndjson')
+        out, err = self._import(path, '--rejects', rejects)
+        self.assertIn('1 created, 0 updated, 5 rejected', out)
+        self.assertEqual(list(Restaurant.objects.values_list('slug', flat=True)), ['ok'])
+
+        rejected = [json.loads(line) for line in Path(rejects).read_text().splitlines()]
+        self.assertEqual([item['line'] for item in rejected], [2, 3, 4, 5, 6])
+        self.assertEqual(
+            rejected[0]['errors'], {'price_tier': ['price_tier must be between 1 and 4']}
+        )
+        self.assertEqual(rejected[1]['errors'], {'district': ['Unknown district "moon".']})
+        self.assertEqual(rejected[2]['errors'], {'feature_keys': ['Unknown keys: x']})
+        self.assertIn('name', rejected[4]['errors'])
+        self.assertIn('Line 2:', err)
+
+    def test_reads_and_link_writes_are_fixed_per_batch(self):
+        def run(prefix, count, batch_size):
+            rows = [
+                {
+                    'name': f'Mekan {index}',
+                    'slug': f'{prefix}-{index}',
+                    'district': 'beyoglu',
+                    'feature_keys': ['outdoor'],
+                    'additional_keys': ['date-night'],
+                }
+                for index in range(count)
+            ]
+            path = self._ndjson(rows)
+            with CaptureQueriesContext(connection) as ctx:
+                self._import(path, '--batch-size', str(batch_size))
+            # Row INSERTs are chunked by the backend's parameter limit; everything
+            # else must not depend on the number of rows.
+            return Counter(
+                query['sql'].split(' ', 1)[0]
+                for query in ctx.captured_queries
+                if not query['sql'].startswith('INSERT INTO "restaurants_restaurant" ')
+            )
+
+        small, large = run('small', 10, 500), run('large', 400, 500)
+        self.assertEqual(small, large)
+        # Three taxonomy maps, then one slug lookup and one link lookup per tag field.
+        self.assertEqual(large['SELECT'], 3 + 3)
+        self.assertEqual(run('large', 400, 200)['SELECT'], 3 + 3 * 2)
+        self.assertEqual(Restaurant.objects.count(), 410)
+        self.assertEqual(Restaurant.features.through.objects.count(), 410)
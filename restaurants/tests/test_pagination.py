@@ -0,0 +1,74 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from restaurants.models import District, Restaurant
+
+
+class RestaurantCursorPaginationTestCase(APITestCase):
+    def setUp(self):
+        district = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        ratings = [4.5, 4.5, 4.5, 4.0, 3.5, 3.5, 5.0]
+        for index, rating in enumerate(ratings):
+            Restaurant.objects.create(
+                name=f'Mekan {index % 3}',
+                slug=f'mekan-{index}',
+                district=district,
+                rating=rating,
+                price_tier=index % 4 + 1,
+            )
+        self.url = reverse('restaurant-list')
+
+    def _walk(self, params):
+        slugs = []
+        response = self.client.get(self.url, {**params, 'cursor': ''})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            payload = response.json()
+            self.assertNotIn('count', payload)
+            slugs.extend(row['slug'] for row in payload['results'])
+            if not payload['next']:
+                return slugs
+            response = self.client.get(payload['next'])
+
+    def _offset_slugs(self, ordering):
+        qs = Restaurant.objects.order_by(*ordering)
+        return list(qs.values_list('slug', flat=True))
+
+    def test_walks_every_row_once_for_each_ordering(self):
+        cases = {
+            None: ['-rating', 'name', 'id'],
+            'rating': ['rating', 'name', 'id'],
+            '-price_tier': ['-price_tier', 'name', 'id'],
+            '-score': ['-score', 'name', 'id'],
+        }
+        for ordering, expected in cases.items():
+            params = {'limit': 2}
+            if ordering:
+                params['ordering'] = ordering
+            with self.subTest(ordering=ordering):
+                self.assertEqual(self._walk(params), self._offset_slugs(expected))
+            with self.subTest(ordering=ordering, fields='slug'):
+                # The cursor columns are read even when the payload leaves them out.
+                walked = self._walk({**params, 'fields': 'slug'})
+                self.assertEqual(walked, self._offset_slugs(expected))
+
+    def test_count_only_when_requested(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'cursor': '', 'limit': 3})
+        self.assertFalse(any('__count' in q['sql'] for q in ctx.captured_queries))
+        self.assertNotIn('count', response.json())
+
+        response = self.client.get(self.url, {'cursor': '', 'limit': 3, 'count': 1})
+        self.assertEqual(response.json()['count'], 7)
+        self.assertNotIn('count=', response.json()['next'])
+
+    def test_cursor_from_other_ordering_is_rejected(self):
+        next_url = self.client.get(self.url, {'cursor': '', 'limit': 2}).json()['next']
+        response = self.client.get(f'{next_url}&ordering=price_tier')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,182 @@
+import datetime
+import decimal
+import uuid
+from collections import OrderedDict
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from restaurants import renderers
+from restaurants.facets import facet_index
+from restaurants.models import AdditionalFilter, District, FeatureTag, Restaurant
+from restaurants.renderers import FastJSONRenderer
+
+JSON_ONLY = {'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer']}
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+    def assertSameBytes(self, data):
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_matches_json_renderer(self):
+        self.assertSameBytes(
+            OrderedDict(
+                id=uuid.UUID('1b4e28ba-2fa1-11d2-883f-0016d3cca427'),
+                name='Çiya Sofrası     "quoted" \\ </script> \x00\x1f\x7f 🍽',
+                rating=decimal.Decimal('4.5'),
+                when=datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.UTC),
+                day=datetime.date(2024, 5, 1),
+                nested=[None, True, False, 0, -3, 2**63 - 1, 0.1, 123.456, (1, 2)],
+                empty={},
+            )
+        )
+
+    def test_falls_back_for_values_orjson_rejects(self):
+        self.assertSameBytes({'big': 2**70})
+        self.assertSameBytes({1: 'non-string key'})
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_indent_requests_use_json_renderer(self):
+        data = {'a': [1, 2]}
+        media_type = 'application/json; indent=2'
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type), JSONRenderer().render(data, media_type)
+        )
+
+    def test_works_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render({'a': 1}), b'{"a":1}')
+
+
+class FastPayloadsTestCase(APITestCase):
+    """The fast read path must be indistinguishable from the serializers."""
+
+    def setUp(self):
+        beyoglu = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        kadikoy = District.objects.create(name='Kadıköy', slug='kadikoy')
+        for key, label in (('outdoor', 'Outdoor'), ('coffee', 'Coffee'), ('wifi', 'Wi-Fi')):
+            FeatureTag.objects.create(key=key, label=label)
+        AdditionalFilter.objects.create(key='date-night', label='Date Night', emoji='💘')
+        AdditionalFilter.objects.create(key='brunch', label='Brunch')
+        specs = [
+            ('Mikla', beyoglu, '4.5', ['wifi', 'outdoor', 'coffee'], ['date-night', 'brunch']),
+            ('Çiya Sofrası', kadikoy, '4.8', ['outdoor'], []),
+            ('Moda  Kahve', kadikoy, '4.5', [], ['brunch']),
+            ('Karaköy Lokantası', beyoglu, '3.9', ['coffee'], []),
+        ]
+        for index, (name, district, rating, features, additional) in enumerate(specs):
+            restaurant = Restaurant.objects.create(
+                name=name,
+                slug=f'restaurant-{index}',
+                district=district,
+                rating=decimal.Decimal(rating),
+                price_tier=index % 4 + 1,
+                review_count=index * 17,
+                description='“Ev yemekleri”\n' * index,
+                latitude=decimal.Decimal('41.03') + index if index % 2 else None,
+                longitude=decimal.Decimal('28.98') + index if index % 2 else None,
+            )
+            restaurant.features.set(features)
+            restaurant.additional_filters.set(additional)
+        Restaurant.objects.create(name='Kapalı', slug='kapali', district=beyoglu, is_active=False)
+        facet_index.rebuild()
+
+    def _both(self, url, params=None):
+        with override_settings(RESTAURANT_FAST_PAYLOADS=False, REST_FRAMEWORK=JSON_ONLY):
+            slow = self.client.get(url, params)
+        with override_settings(RESTAURANT_FAST_PAYLOADS=True):
+            fast = self.client.get(url, params)
+        return slow, fast
+
+    def assertSameResponse(self, url, params=None):
+        slow, fast = self._both(url, params)
+        self.assertEqual(slow.status_code, fast.status_code)
+        self.assertEqual(slow.content, fast.content)
+        return fast
+
+    def test_list_matches_serializers(self):
+        url = reverse('restaurant-list')
+        for params in (
+            {},
+            {'ordering': 'price_tier'},
+            {'district': 'kadikoy'},
+            {'feature': ['coffee', 'outdoor'], 'feature_match': 'all'},
+            {'limit': 2, 'offset': 1},
+            {'cursor': '', 'limit': 2},
+            {'near': '42.03,29.98', 'radius_m': 50000},
+        ):
+            with self.subTest(params=params):
+                self.assertSameResponse(url, params)
+
+    @override_settings(RESTAURANT_FACET_INDEX=True)
+    def test_facet_index_list_matches_serializers(self):
+        self.assertSameResponse(reverse('restaurant-list'), {'feature': 'outdoor', 'limit': 2})
+
+    def test_detail_matches_serializers(self):
+        for restaurant in Restaurant.objects.all():
+            for lookup in (restaurant.slug, str(restaurant.pk)):
+                with self.subTest(lookup=lookup):
+                    self.assertSameResponse(reverse('restaurant-detail', args=[lookup]))
+        response = self.assertSameResponse(reverse('restaurant-detail', args=['missing']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_list_skips_model_instances(self):
+        url = reverse('restaurant-list')
+        with self.assertNumQueries(6):
+            # validators (2), count, page, feature keys, additional keys
+            self.client.get(url)
+
+    def test_sparse_fields_match_serializers(self):
+        list_url = reverse('restaurant-list')
+        detail_url = reverse('restaurant-detail', args=['restaurant-1'])
+        for url, params, keys in (
+            (list_url, {'fields': 'id,name,slug,rating'}, ['id', 'name', 'slug', 'rating']),
+            (list_url, {'fields': ['features', 'name']}, ['name', 'features']),
+            (list_url, {'exclude': 'features,additional_filters,district_name'}, None),
+            (list_url, {'fields': 'slug,distance_m', 'near': '42.03,29.98'}, None),
+            (list_url, {'fields': 'slug', 'near': '42.03,29.98'}, ['slug']),
+            (detail_url, {'fields': 'name,description,district'}, None),
+            (detail_url, {'fields': 'name,updated_at', 'exclude': 'updated_at'}, ['name']),
+        ):
+            with self.subTest(url=url, params=params):
+                data = self.assertSameResponse(url, params).json()
+                item = data['results'][0] if 'results' in data else data
+                if keys is not None:
+                    self.assertEqual(list(item), keys)
+
+    @override_settings(RESTAURANT_FACET_INDEX=True)
+    def test_sparse_fields_from_facet_index(self):
+        self.assertSameResponse(
+            reverse('restaurant-list'), {'feature': 'outdoor', 'fields': 'slug,features'}
+        )
+
+    def test_sparse_fields_trim_queries(self):
+        url = reverse('restaurant-list')
+        params = {'fields': 'id,name,slug,rating'}
+        with self.assertNumQueries(4) as queries:
+            # validators (2), count, page; no tag key queries.
+            self.client.get(url, params)
+        self.assertNotIn('restaurants_district', queries.captured_queries[-1]['sql'])
+        with override_settings(RESTAURANT_FAST_PAYLOADS=False):
+            with self.assertNumQueries(4) as queries:
+                # validators (2), count, page; no prefetches.
+                self.client.get(url, params)
+            page = queries.captured_queries[-1]['sql']
+            self.assertNotIn('restaurants_district', page)
+            self.assertNotIn('description', page)
+            with self.assertNumQueries(5):
+                # One prefetch for the only tag field asked for.
+                self.client.get(url, {'fields': 'district,features'})
+
+    def test_unknown_fields_are_rejected(self):
+        url = reverse('restaurant-list')
+        response = self.client.get(url, {'fields': 'name,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'fields': ['Unknown fields: secret.']})
+        detail = reverse('restaurant-detail', args=['restaurant-1'])
+        self.assertEqual(self.client.get(url, {'exclude': 'description'}).status_code, 400)
+        self.assertEqual(self.client.get(detail, {'exclude': 'description'}).status_code, 200)
+
@@ -0,0 +1,170 @@
+import os
+import re
+import sqlite3
+import tempfile
+
+from django.contrib.auth.models import Group, User
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from restaurants.facets import facet_index
+from restaurants.models import District, Restaurant
+from restaurants.routers import PIN_COOKIE, ReplicaRouter, read_replica
+from restaurants.search import search_index
+from restaurants.suggestions import suggestion_index
+from restaurants.timing import metrics
+
+REPLICA = 'replica_1'
+
+
+def alias_queries(alias):
+    match = re.search(rf'bff_db_alias_queries_total{{alias="{alias}"}} (\d+)', metrics.render())
+    return int(match.group(1)) if match else 0
+
+
+# A second SQLite file, copied from the primary, stands in for a lagging replica.
+@override_settings(DATABASE_REPLICAS=[REPLICA], RESTAURANT_SUGGESTION_INDEX=False)
+class ReplicaRoutingTestCase(TransactionTestCase):
+    def setUp(self):
+        self.district = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        Restaurant.objects.create(name='Mikla', slug='mikla', district=self.district)
+        editors = Group.objects.create(name='editors')
+        self.editor = User.objects.create_user(username='editor', password='pass12345')
+        self.editor.groups.add(editors)
+        self.snapshot()
+        # Replication has not caught up with these yet.
+        Restaurant.objects.create(name='Mikla Yeni', slug='mikla-yeni', district=self.district)
+        District.objects.create(name='Kadıköy', slug='kadikoy')
+        suggestion_index.invalidate()
+        self.client = APIClient()
+
+    def snapshot(self):
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.addCleanup(os.unlink, path)
+        connection.ensure_connection()
+        replica = sqlite3.connect(path)
+        connection.connection.backup(replica)
+        replica.close()
+        connections.settings[REPLICA] = {**connection.settings_dict, 'NAME': path}
+        self.addCleanup(self.drop_replica)
+
+    def drop_replica(self):
+        for replica in connections.all(initialized_only=True):
+            if replica.alias == REPLICA:
+                replica.close()
+                del connections[REPLICA]
+        connections.settings.pop(REPLICA)
+
+    def slugs(self, **headers):
+        response = self.client.get(reverse('restaurant-list'), headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['slug'] for row in response.json()['results']]
+
+    def sign_in(self):
+        response = self.client.post(
+            reverse('token_obtain_pair'), {'username': 'editor', 'password': 'pass12345'}
+        )
+        return {'Authorization': f'Bearer {response.json()["access"]}'}
+
+    def test_public_reads_use_the_replica(self):
+        before = alias_queries(REPLICA)
+        self.assertEqual(self.slugs(), ['mikla'])
+        self.assertGreater(alias_queries(REPLICA), before)
+        detail = self.client.get(reverse('restaurant-detail', args=['mikla-yeni']))
+        self.assertEqual(detail.status_code, status.HTTP_404_NOT_FOUND)
+        batch = self.client.get(reverse('restaurant-batch'), {'slugs': 'mikla,mikla-yeni'})
+        self.assertEqual(batch.json()['missing'], ['mikla-yeni'])
+        districts = self.client.get(reverse('district-list')).json()['results']
+        self.assertEqual([district['slug'] for district in districts], ['beyoglu'])
+        suggestions = self.client.get(reverse('search-suggestions'), {'q': 'mikla'}).json()
+        self.assertEqual([row['slug'] for row in suggestions['restaurants']], ['mikla'])
+
+    def test_without_replicas_everything_uses_the_primary(self):
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.slugs(), ['mikla', 'mikla-yeni'])
+
+    def test_editors_read_their_own_writes(self):
+        headers = self.sign_in()
+        response = self.client.patch(
+            reverse('restaurant-detail', args=['mikla']),
+            {'name': 'Mikla Restoran'},
+            format='json',
+            headers=headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = {alias: Restaurant.objects.using(alias).get(slug='mikla').name for alias in
+                 ('default', REPLICA)}
+        self.assertEqual(names, {'default': 'Mikla Restoran', REPLICA: 'Mikla'})
+
+        detail = reverse('restaurant-detail', args=['mikla'])
+        pinned = self.client.get(detail, headers=headers).json()
+        self.assertEqual(pinned['name'], 'Mikla Restoran')
+        self.assertEqual(self.slugs(**headers), ['mikla', 'mikla-yeni'])
+        # Everyone else keeps reading the replica.
+        self.assertEqual(self.client.get(detail).json()['name'], 'Mikla')
+
+    def test_pin_travels_with_the_client(self):
+        headers = self.sign_in()
+        response = self.client.patch(
+            reverse('restaurant-detail', args=['mikla']),
+            {'price_tier': 3},
+            format='json',
+            headers=headers,
+        )
+        pin = response.cookies[PIN_COOKIE]
+        self.assertTrue(pin['httponly'])
+        # Nothing is kept server-side: the same token without the cookie reads the replica.
+        self.client.cookies.clear()
+        self.assertEqual(self.slugs(**headers), ['mikla'])
+        self.client.cookies[PIN_COOKIE] = pin.value
+        self.assertEqual(self.slugs(**headers), ['mikla', 'mikla-yeni'])
+        # Bound to the editor who wrote.
+        User.objects.create_user(username='other', password='pass12345')
+        response = self.client.post(
+            reverse('token_obtain_pair'), {'username': 'other', 'password': 'pass12345'}
+        )
+        other = {'Authorization': f'Bearer {response.json()["access"]}'}
+        self.assertEqual(self.slugs(**other), ['mikla'])
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_pins_expire(self):
+        headers = self.sign_in()
+        self.client.patch(
+            reverse('restaurant-detail', args=['mikla']),
+            {'price_tier': 3},
+            format='json',
+            headers=headers,
+        )
+        self.assertEqual(self.slugs(**headers), ['mikla'])
+
+    def test_indexes_are_built_from_the_primary(self):
+        # They outlive the request, so replica lag would stick until the next rebuild.
+        request = self.client.get(reverse('restaurant-list')).wsgi_request
+        before = alias_queries(REPLICA)
+        with read_replica(request):
+            for index in (facet_index, suggestion_index, search_index):
+                index.invalidate()
+                index.ensure_fresh()
+            suggestions, districts = suggestion_index.search('mik')
+        self.assertEqual(alias_queries(REPLICA), before)
+        self.assertEqual(facet_index.match().bit_count(), 2)
+        self.assertEqual([row['slug'] for row in suggestions], ['mikla', 'mikla-yeni'])
+        self.assertEqual(len(search_index.search('mikla')), 2)
+
+    def test_router(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Restaurant))
+        request = self.client.get(reverse('restaurant-list')).wsgi_request
+        with read_replica(request):
+            self.assertEqual(router.db_for_read(Restaurant), REPLICA)
+            restaurant = Restaurant.objects.get(slug='mikla')
+            self.assertEqual(restaurant._state.db, REPLICA)
+            # Instances read from a replica are still saved to the primary.
+            self.assertEqual(router.db_for_write(Restaurant, instance=restaurant), 'default')
+        self.assertIsNone(router.db_for_read(Restaurant))
+        self.assertFalse(router.allow_migrate(REPLICA, 'restaurants'))
+        self.assertIsNone(router.allow_migrate('default', 'restaurants'))
@@ -4,6 +4,7 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 
 from restaurants.models import AdditionalFilter, District, FeatureTag, Restaurant
+from restaurants.suggestions import suggestion_index
 
 
 class RestaurantAPITestCase(APITestCase):
@@ -23,6 +24,7 @@ class RestaurantAPITestCase(APITestCase):
         )
         self.restaurant.features.add(self.feature)
         self.restaurant.additional_filters.add(self.additional)
+        suggestion_index.invalidate()
 
     def test_list_restaurants_anonymous(self):
         url = reverse('restaurant-list')
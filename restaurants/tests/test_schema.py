@@ -0,0 +1,189 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.http import QueryDict
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from restaurants.filters import RestaurantFilter
+from restaurants.models import AdditionalFilter, District, FeatureTag, Restaurant
+from restaurants.sync import encode_token
+
+
+class TagKeyColumnsTestCase(APITestCase):
+    def setUp(self):
+        self.district = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        self.outdoor = FeatureTag.objects.create(key='outdoor', label='Outdoor Seating')
+        self.coffee = FeatureTag.objects.create(key='coffee', label='Coffee')
+        self.wifi = FeatureTag.objects.create(key='wifi', label='Wi-Fi')
+        self.date_night = AdditionalFilter.objects.create(key='date-night', label='Date Night')
+
+    def _restaurant(self, slug, features=(), additional=()):
+        restaurant = Restaurant.objects.create(name=slug, slug=slug, district=self.district)
+        restaurant.features.add(*features)
+        restaurant.additional_filters.add(*additional)
+        return restaurant
+
+    def _columns(self, restaurant):
+        restaurant.refresh_from_db()
+        return restaurant.feature_keys, restaurant.additional_keys
+
+    def test_write_serializer_fills_columns(self):
+        editor = User.objects.create_user(username='editor', password='pass12345')
+        editor.groups.add(Group.objects.create(name='editors'))
+        self.client.force_authenticate(user=editor)
+        payload = {
+            'name': 'Mikla',
+            'slug': 'mikla',
+            'district': self.district.pk,
+            'feature_keys': ['wifi', 'outdoor', 'wifi'],
+            'additional_keys': ['date-night'],
+        }
+        response = self.client.post(reverse('restaurant-list'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        mikla = Restaurant.objects.get(slug='mikla')
+        self.assertEqual(self._columns(mikla), (['outdoor', 'wifi'], ['date-night']))
+
+        url = reverse('restaurant-detail', args=['mikla'])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch(url, {'feature_keys': ['coffee']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._columns(mikla), (['coffee'], ['date-night']))
+        # The columns ride along with the row UPDATE; linking adds no second one.
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+
+        response = self.client.patch(url, {'feature_keys': ['nope']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._columns(mikla), (['coffee'], ['date-night']))
+
+    def test_link_changes_keep_columns_in_sync(self):
+        mikla = self._restaurant('mikla', [self.wifi, self.outdoor], [self.date_night])
+        ciya = self._restaurant('ciya')
+        self.assertEqual(self._columns(mikla), (['outdoor', 'wifi'], ['date-night']))
+
+        mikla.features.remove(self.wifi)
+        self.assertEqual(self._columns(mikla)[0], ['outdoor'])
+        mikla.additional_filters.clear()
+        self.assertEqual(self._columns(mikla)[1], [])
+
+        # From the tag side.
+        self.coffee.restaurants.add(mikla, ciya)
+        self.assertEqual(self._columns(mikla)[0], ['coffee', 'outdoor'])
+        self.assertEqual(self._columns(ciya)[0], ['coffee'])
+        self.coffee.restaurants.remove(ciya)
+        self.assertEqual(self._columns(ciya)[0], [])
+        self.outdoor.restaurants.clear()
+        self.assertEqual(self._columns(mikla)[0], ['coffee'])
+
+        # Deleting a tag cascades its links away, and the key with them.
+        self.coffee.delete()
+        self.assertEqual(self._columns(mikla)[0], [])
+
+    def test_filters_agree_with_links(self):
+        tags = [self.outdoor, self.coffee, self.wifi]
+        for index in range(8):
+            self._restaurant(f'r{index}', [tag for bit, tag in enumerate(tags) if index >> bit & 1])
+        queryset = Restaurant.objects.all()
+        for mode in ('any', 'all'):
+            for keys in (['outdoor'], ['outdoor', 'wifi'], ['coffee', 'wifi', 'outdoor']):
+                with self.subTest(mode=mode, keys=keys):
+                    data = QueryDict(mutable=True)
+                    data.setlist('feature', keys)
+                    data['feature_match'] = mode
+                    filterset = RestaurantFilter(data, queryset=queryset)
+                    expected = {
+                        restaurant.slug
+                        for restaurant in queryset.prefetch_related('features')
+                        if (any if mode == 'any' else all)(
+                            key in {tag.key for tag in restaurant.features.all()} for key in keys
+                        )
+                    }
+                    self.assertEqual({r.slug for r in filterset.qs}, expected)
+                    sql = str(filterset.qs.query)
+                    self.assertNotIn('restaurants_restaurant_features', sql)
+                    self.assertNotIn('DISTINCT', sql)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Plan assertions are written against SQLite.')
+class RestaurantQueryPlanTestCase(APITestCase):
+    """The list endpoint's page and validator queries must stay index-backed."""
+
+    def setUp(self):
+        districts = [
+            District.objects.create(name=f'District {index}', slug=f'district-{index}')
+            for index in range(3)
+        ]
+        FeatureTag.objects.create(key='outdoor', label='Outdoor Seating')
+        FeatureTag.objects.create(key='coffee', label='Coffee')
+        for index in range(30):
+            restaurant = Restaurant.objects.create(
+                name=f'Mekan {index}',
+                slug=f'mekan-{index}',
+                district=districts[index % 3],
+                price_tier=index % 4 + 1,
+                rating=index % 5,
+                is_active=index % 7 != 0,
+            )
+            restaurant.features.add(*['outdoor', 'coffee'][: index % 3])
+
+    def _plans(self, params, url_name='restaurant-list'):
+        """``{sql: plan}`` for every restaurant query the list request runs."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                if 'FROM "restaurants_restaurant"' not in query['sql']:
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+                plans[query['sql']] = '\n'.join(row[-1] for row in cursor.fetchall())
+        return plans
+
+    def _page_plan(self, params):
+        plans = self._plans(params)
+        return next(plan for sql, plan in plans.items() if ' LIMIT ' in sql)
+
+    def assertUsesIndex(self, plan, index):
+        self.assertIn(f'USING INDEX {index}', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_default_list(self):
+        plans = self._plans({})
+        page = next(plan for sql, plan in plans.items() if ' LIMIT ' in sql)
+        self.assertUsesIndex(page, 'restaurant_active_rating_idx')
+        stamp = next(plan for sql, plan in plans.items() if 'MAX(' in sql)
+        self.assertIn('restaurant_active_updated_idx', stamp)
+
+    def test_keyset_pages(self):
+        self.assertUsesIndex(self._page_plan({'cursor': ''}), 'restaurant_active_rating_idx')
+        plan = self._page_plan({'cursor': '', 'ordering': 'price_tier'})
+        self.assertUsesIndex(plan, 'restaurant_active_price_idx')
+        plan = self._page_plan({'cursor': '', 'ordering': '-score'})
+        self.assertUsesIndex(plan, 'restaurant_active_score_idx')
+
+    def test_sync_changes(self):
+        token = encode_token(timezone.now() - timedelta(hours=1))
+        plans = self._plans({'token': token}, url_name='sync')
+        changed = next(plan for sql, plan in plans.items() if ' LIMIT ' in sql)
+        self.assertUsesIndex(changed, 'restaurant_updated_idx')
+
+    def test_district_filter(self):
+        plan = self._page_plan({'district': 'district-1', 'cursor': ''})
+        self.assertUsesIndex(plan, 'restaurant_district_rating_idx')
+
+    def test_tag_filters_skip_link_tables(self):
+        for mode in ('any', 'all'):
+            with self.subTest(mode=mode):
+                plans = self._plans({'feature': ['outdoor', 'coffee'], 'feature_match': mode})
+                for sql, plan in plans.items():
+                    self.assertNotIn('restaurants_restaurant_features', sql)
+                    self.assertNotIn('DISTINCT', sql)
+                page = next(plan for sql, plan in plans.items() if ' LIMIT ' in sql)
+                self.assertUsesIndex(page, 'restaurant_active_rating_idx')
@@ -0,0 +1,102 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from restaurants.models import District, Restaurant
+from restaurants.scores import bayesian_score, score_prior
+
+
+class BayesianScoreTestCase(TestCase):
+    def test_many_reviews_outrank_a_few_perfect_ones(self):
+        few = bayesian_score(Decimal('5.0'), 2, 4.2, 25)
+        many = bayesian_score(Decimal('4.7'), 3000, 4.2, 25)
+        self.assertGreater(many, few)
+        self.assertAlmostEqual(few, (25 * 4.2 + 10) / 27, places=4)
+
+    def test_without_prior_or_reviews(self):
+        self.assertEqual(bayesian_score(Decimal('3.5'), 0, 4.2, 0), 3.5)
+        self.assertEqual(bayesian_score(Decimal('0'), 0, 4.2, 25), 4.2)
+
+
+@override_settings(RESTAURANT_SCORE_PRIOR_WEIGHT=10)
+class RestaurantScoreTestCase(APITestCase):
+    def setUp(self):
+        self.district = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        specs = [('perfect', '5.0', 2), ('popular', '4.7', 3000), ('average', '4.0', 40)]
+        for slug, rating, reviews in specs:
+            Restaurant.objects.create(
+                name=slug.title(),
+                slug=slug,
+                district=self.district,
+                rating=Decimal(rating),
+                review_count=reviews,
+            )
+        call_command('recompute_scores', stdout=StringIO())
+
+    def scores(self):
+        return dict(Restaurant.objects.values_list('slug', 'score'))
+
+    def test_score_ordering(self):
+        response = self.client.get(reverse('restaurant-list'), {'ordering': '-score'})
+        slugs = [row['slug'] for row in response.json()['results']]
+        self.assertEqual(slugs, ['popular', 'perfect', 'average'])
+        response = self.client.get(reverse('restaurant-list'))
+        self.assertEqual(response.json()['results'][0]['slug'], 'perfect')
+
+    def test_recompute_writes_only_changed_rows(self):
+        out = StringIO()
+        call_command('recompute_scores', stdout=out)
+        self.assertIn('Scored 3 restaurants (0 changed)', out.getvalue())
+
+        # A queryset update bypasses ``save()``, leaving the stored scores stale.
+        Restaurant.objects.filter(slug='average').update(rating=Decimal('2.0'))
+        stale = self.scores()
+        before = dict(Restaurant.objects.values_list('slug', 'updated_at'))
+        url = reverse('restaurant-list')
+        etag = self.client.get(url, {'ordering': '-score'})['ETag']
+        out = StringIO()
+        # Its commit hooks never run: the command is another process to the web workers.
+        call_command('recompute_scores', '--batch-size', '2', stdout=out)
+        self.assertIn('Scored 3 restaurants (3 changed)', out.getvalue())
+        after = self.scores()
+        # The lower rating drags the mean, and with it every score, down.
+        self.assertLess(after['average'], stale['average'])
+        self.assertLess(after['perfect'], stale['perfect'])
+        # Scores are not in any payload: sync and snapshots see no change, but
+        # the score-ordered list gets a new ETag from ``scored_at``.
+        self.assertEqual(dict(Restaurant.objects.values_list('slug', 'updated_at')), before)
+        response = self.client.get(url, {'ordering': '-score'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_saves_update_their_own_score(self):
+        restaurant = Restaurant.objects.get(slug='average')
+        restaurant.review_count = 400
+        restaurant.save(update_fields=['review_count'])
+        mean = score_prior.mean()
+        expected = bayesian_score(Decimal('4.0'), 400, mean, 10)
+        self.assertEqual(Restaurant.objects.get(slug='average').score, expected)
+
+    def test_writes_through_the_api_are_scored(self):
+        editors = Group.objects.create(name='editors')
+        user = User.objects.create_user(username='editor', password='pass12345')
+        user.groups.add(editors)
+        self.client.force_authenticate(user=user)
+        payload = {
+            'name': 'Yeni',
+            'slug': 'yeni',
+            'district': self.district.pk,
+            'rating': '5.0',
+            'review_count': 99,
+        }
+        response = self.client.post(reverse('restaurant-list'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Ratings are not writable; an unrated restaurant scores the catalogue mean.
+        self.assertEqual(response.json()['rating'], '0.0')
+        self.assertEqual(self.scores()['yeni'], round(score_prior.mean(), 4))
@@ -0,0 +1,128 @@
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from restaurants.models import District, FeatureTag, Restaurant
+from restaurants.search import search_index, stem, terms
+
+
+class TermsTestCase(SimpleTestCase):
+    def test_stems_fold_turkish_inflections(self):
+        self.assertEqual(terms('Meyhanesi'), terms('meyhaneler'))
+        self.assertEqual(terms('MEYHANE'), terms('meyhanelerde'))
+        self.assertEqual(terms('Kadıköy'), ['kadikoy'])
+        self.assertEqual(stem('balikcisi'), stem('balikci'))
+
+    def test_stopwords_and_numbers_are_dropped(self):
+        self.assertEqual(terms('Köfte ve Piyaz 42'), [stem('kofte'), stem('piyaz')])
+
+
+@override_settings(RESTAURANT_SEARCH_INDEX=True)
+class SearchTestCase(APITestCase):
+    url = reverse('search')
+
+    def setUp(self):
+        self.kadikoy = District.objects.create(name='Kadıköy', slug='kadikoy')
+        self.beyoglu = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        FeatureTag.objects.create(key='sea-view', label='Sea View')
+        self.moda = Restaurant.objects.create(
+            name='Moda Meyhanesi', slug='moda', district=self.kadikoy, rating=4.5,
+            review_count=300, latitude=40.9833, longitude=29.0255,
+        )
+        self.asmali = Restaurant.objects.create(
+            name='Asmalı Meyhane', slug='asmali', district=self.beyoglu, rating=4.8,
+            review_count=900,
+        )
+        self.sahil = Restaurant.objects.create(
+            name='Sahil Balıkçısı', slug='sahil', district=self.kadikoy, rating=3.9,
+            review_count=50, description='Meyhane usulü meze ve balık.',
+        )
+        self.sahil.features.add('sea-view')
+        Restaurant.objects.create(
+            name='Kapalı Meyhane', slug='kapali', district=self.kadikoy, is_active=False
+        )
+        search_index.invalidate()
+
+    def search(self, q, **params):
+        response = self.client.get(self.url, {'q': q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def slugs(self, q, **params):
+        return [row['slug'] for row in self.search(q, **params)['results']]
+
+    def test_stemmed_folded_words_all_match(self):
+        self.assertEqual(self.slugs('meyhaneler kadıköy '), ['moda', 'sahil'])
+        self.assertEqual(self.slugs('KADIKOY'), ['moda', 'sahil'])
+
+    def test_name_matches_outrank_description_matches(self):
+        # The better rated of the two name matches comes first.
+        self.assertEqual(self.slugs('meyhane '), ['asmali', 'moda', 'sahil'])
+
+    def test_typos_and_prefixes(self):
+        self.assertEqual(self.slugs('kadikoi '), ['moda', 'sahil'])
+        self.assertEqual(self.slugs('balıkç'), ['sahil'])
+        self.assertEqual(self.slugs('zzzz'), [])
+
+    def test_list_filters_apply(self):
+        self.assertEqual(self.slugs('meyhane', district='kadikoy'), ['moda', 'sahil'])
+        self.assertEqual(self.slugs('meyhane', feature='sea-view'), ['sahil'])
+        self.assertEqual(
+            self.slugs('meyhane', near='40.9833,29.0255', radius_m=500), ['moda']
+        )
+
+    def test_paginated_list_payloads(self):
+        page = self.search('meyhane ', limit=2)
+        self.assertEqual(page['count'], 3)
+        self.assertIsNotNone(page['next'])
+        listed = self.client.get(reverse('restaurant-list'), {'district': 'beyoglu'}).json()
+        self.assertEqual(page['results'][0], listed['results'][0])
+        self.assertEqual(self.slugs('meyhane ', offset=2), ['sahil'])
+
+    def test_requires_query_and_valid_filters(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('q', response.json())
+        response = self.client.get(self.url, {'q': 'meyhane', 'near': 'nowhere'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_follows_writes(self):
+        self.assertEqual(self.slugs('meyhane '), ['asmali', 'moda', 'sahil'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.asmali.is_active = False
+            self.asmali.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.moda.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kadikoy.name = 'Kadıköy Moda'
+            self.kadikoy.save()
+        self.assertEqual(self.slugs('meyhane '), ['sahil'])
+        self.assertEqual(self.slugs('moda '), ['sahil'])
+        with self.captureOnCommitCallbacks(execute=True):
+            FeatureTag.objects.get(key='sea-view').delete()
+        self.assertEqual(self.slugs('meyhane', feature='sea-view'), [])
+
+    def test_sync_picks_up_writes_from_other_processes(self):
+        self.search('meyhane')
+        Restaurant.objects.filter(slug='asmali').update(is_active=False, updated_at=timezone.now())
+        Restaurant.objects.bulk_create(
+            [Restaurant(name='Yeni Meyhane', slug='yeni', district=self.beyoglu)]
+        )
+        search_index._synced_at -= search_index.sync_interval + 1
+        self.assertEqual(self.slugs('meyhane '), ['moda', 'yeni', 'sahil'])
+
+    def test_sync_picks_up_rescores_from_other_processes(self):
+        self.search('meyhane')
+        slot = search_index.slots[self.sahil.pk]
+        before = search_index.boosts[slot]
+        Restaurant.objects.filter(slug='sahil').update(score=4.9, scored_at=timezone.now())
+        search_index._synced_at -= search_index.sync_interval + 1
+        self.search('meyhane')
+        self.assertGreater(search_index.boosts[search_index.slots[self.sahil.pk]], before)
+
+    @override_settings(RESTAURANT_SEARCH_INDEX=False)
+    def test_database_fallback(self):
+        self.assertEqual(self.slugs('Meyhane'), ['asmali', 'moda', 'sahil'])
+        self.assertEqual(self.slugs('meyhane Kadıköy', feature='sea-view'), ['sahil'])
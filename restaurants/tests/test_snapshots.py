@@ -0,0 +1,158 @@
+import errno
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from restaurants.models import District, FeatureTag, Restaurant
+from restaurants.snapshots import render, snapshot_publisher
+
+
+class InlineExecutor:
+    """Runs the publishing job at once, inside the test's transaction."""
+
+    def submit(self, job):
+        job()
+
+
+@override_settings(SNAPSHOT_BASE_URL='http://testserver', STATIC_URL='/static/')
+class SnapshotTestCase(APITestCase):
+    def setUp(self):
+        self.root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(STATIC_ROOT=self.root))
+        self.beyoglu = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        self.kadikoy = District.objects.create(name='Kadıköy', slug='kadikoy')
+        FeatureTag.objects.create(key='outdoor', label='Outdoor Seating')
+        self.mikla = Restaurant.objects.create(name='Mikla', slug='mikla', district=self.beyoglu)
+        Restaurant.objects.create(name='Çiya', slug='ciya', district=self.kadikoy)
+        self.enterContext(mock.patch.object(snapshot_publisher, '_executor', InlineExecutor()))
+
+    def publish(self):
+        call_command('publish_snapshots', stdout=StringIO())
+        return snapshot_publisher.manifest()['snapshots']
+
+    def read(self, url):
+        return (self.root / url.removeprefix('/static/')).read_bytes()
+
+    def test_publish_writes_hashed_precompressed_files(self):
+        snapshots = self.publish()
+        self.assertEqual(
+            set(snapshots),
+            {
+                '/api/districts/',
+                '/api/features/',
+                '/api/additional-filters/',
+                '/api/restaurants/',
+                '/api/restaurants/?district=beyoglu',
+                '/api/restaurants/?district=kadikoy',
+            },
+        )
+        for path, url in snapshots.items():
+            with self.subTest(path=path):
+                self.assertRegex(url, r'^/static/snapshots/[\w.-]+\.[0-9a-f]{12}\.json$')
+                body = self.client.get(path).content
+                self.assertEqual(self.read(url), body)
+                self.assertEqual(gzip.decompress(self.read(f'{url}.gz')), body)
+        page = json.loads(self.read(snapshots['/api/restaurants/?district=kadikoy']))
+        self.assertEqual([row['slug'] for row in page['results']], ['ciya'])
+        # Unchanged content keeps its name.
+        self.assertEqual(self.publish(), snapshots)
+
+    @override_settings(SNAPSHOTS=True)
+    def test_writes_republish_what_they_touch(self):
+        before = self.publish()
+        self.mikla.district = self.kadikoy
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mikla.save()
+        after = snapshot_publisher.manifest()['snapshots']
+        changed = {path for path in after if after[path] != before[path]}
+        self.assertEqual(
+            changed,
+            {
+                '/api/restaurants/',
+                '/api/restaurants/?district=beyoglu',
+                '/api/restaurants/?district=kadikoy',
+            },
+        )
+        page = json.loads(self.read(after['/api/restaurants/?district=kadikoy']))
+        self.assertEqual({row['slug'] for row in page['results']}, {'ciya', 'mikla'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.beyoglu.delete()
+        snapshots = snapshot_publisher.manifest()['snapshots']
+        self.assertNotIn('/api/restaurants/?district=beyoglu', snapshots)
+
+    def test_manifest_endpoint(self):
+        url = reverse('snapshot-manifest')
+        self.assertEqual(self.client.get(url).json(), {'published_at': None, 'snapshots': {}})
+        snapshots = self.publish()
+        response = self.client.get(url)
+        self.assertEqual(response.json()['snapshots'], snapshots)
+        self.assertIn('max-age=60', response['Cache-Control'])
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(SNAPSHOTS=True, SNAPSHOT_KEEP_SECONDS=0)
+    def test_served_by_whitenoise_after_startup(self):
+        # The middleware is loaded, and scans STATIC_ROOT, before anything is published.
+        self.client.get(reverse('district-list'))
+        url = self.publish()['/api/districts/']
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(body, self.client.get('/api/districts/').content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            District.objects.create(name='Beşiktaş', slug='besiktas')
+        self.assertNotEqual(snapshot_publisher.manifest()['snapshots']['/api/districts/'], url)
+        # Pruned: nothing is kept past SNAPSHOT_KEEP_SECONDS.
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(SNAPSHOTS=True)
+    def test_failed_republish_does_not_fail_the_write(self):
+        self.mikla.name = 'Mikla Restoran'
+        read_only = OSError(errno.EROFS, 'Read-only file system')
+        with mock.patch('restaurants.snapshots._write', side_effect=read_only):
+            with self.assertLogs('restaurants.snapshots', 'ERROR') as logs:
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.mikla.save()
+        self.assertIn('Republishing snapshots failed.', logs.output[0])
+        self.assertIn('Read-only file system', logs.output[0])
+        self.assertEqual(Restaurant.objects.get(slug='mikla').name, 'Mikla Restoran')
+
+    @override_settings(SNAPSHOTS=True)
+    def test_writes_only_queue_the_republish(self):
+        queued = mock.Mock()
+        with mock.patch.object(snapshot_publisher, '_executor', queued):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.mikla.save()
+                self.beyoglu.save()
+        queued.submit.assert_called_once()
+        self.assertFalse((self.root / 'snapshots').exists())
+        queued.submit.call_args.args[0]()
+        self.assertEqual(len(snapshot_publisher.manifest()['snapshots']), 6)
+
+    @override_settings(RESPONSE_CACHE=True)
+    def test_renders_bypass_cached_and_coalesced_payloads(self):
+        self.client.get(reverse('district-list'))
+        # Written elsewhere: this process's cache versions do not move.
+        District.objects.create(name='Beşiktaş', slug='besiktas')
+        self.assertEqual(self.client.get(reverse('district-list'))['X-Cache'], 'HIT')
+        page = json.loads(self.read(self.publish()['/api/districts/']))
+        self.assertEqual(page['count'], 3)
+
+    @override_settings(SNAPSHOT_BASE_URL='')
+    def test_requires_a_base_url(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'SNAPSHOT_BASE_URL'):
+            render(reverse('district-list'))
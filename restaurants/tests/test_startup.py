@@ -0,0 +1,91 @@
+import json
+import os
+import subprocess
+import sys
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# Modules a cold API start must not import before its first request is routed.
+FULL_ONLY_MODULES = [
+    'django.contrib.admin',
+    'django.contrib.messages',
+    'django.contrib.sessions',
+    'django.contrib.staticfiles',
+    'django_filters',
+    'whitenoise',
+]
+# Wall-clock budget for a cold API start, e.g. 500 (about 1.5x a measured
+# ~340 ms). Opt-in: timings depend on the machine, so unset it is not checked.
+BUDGET_MS = os.getenv('COLD_START_BUDGET_MS')
+
+CHILD = """
+import json, sys, time
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+start = time.perf_counter()
+from api.index import app
+imported = time.perf_counter()
+loaded = sorted(sys.modules)
+environ = {
+    'PATH_INFO': '/metrics',
+    'HTTP_HOST': 'localhost',
+    'HTTP_AUTHORIZATION': 'Bearer cold-start',
+    'wsgi.input': BytesIO(),
+}
+setup_testing_defaults(environ)
+statuses = []
+b''.join(app(environ, lambda status, headers: statuses.append(status)))
+print(json.dumps({
+    'status': statuses[0],
+    'elapsed_ms': (time.perf_counter() - start) * 1000,
+    'import_ms': (imported - start) * 1000,
+    'imported': loaded,
+    'served': sorted(sys.modules),
+}))
+"""
+
+
+class ColdStartTestCase(SimpleTestCase):
+    """``api/index.py`` boots the slim API profile in a fresh interpreter."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        env = {
+            key: value
+            for key, value in os.environ.items()
+            if key not in {'BFF_RUNTIME', 'DJANGO_SETTINGS_MODULE'}
+        }
+        env.update(DATABASE_URL='sqlite:///:memory:', DJANGO_DEBUG='0', METRICS_TOKEN='cold-start')
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        cls.result = json.loads(output.strip().splitlines()[-1])
+
+    def loaded(self, modules, prefix):
+        return [name for name in modules if name == prefix or name.startswith(f'{prefix}.')]
+
+    def test_full_profile_modules_stay_unloaded(self):
+        self.assertTrue(self.result['status'].startswith('200'))
+        for prefix in FULL_ONLY_MODULES:
+            with self.subTest(module=prefix):
+                self.assertEqual(self.loaded(self.result['imported'], prefix), [])
+
+    def test_jwt_stack_waits_for_a_token(self):
+        self.assertEqual(self.loaded(self.result['served'], 'rest_framework_simplejwt'), [])
+
+    @skipUnless(BUDGET_MS, 'Set COLD_START_BUDGET_MS to check the cold start time.')
+    def test_within_budget(self):
+        self.assertLess(self.result['elapsed_ms'], float(BUDGET_MS))
+
+    def test_manage_py_keeps_full_profile(self):
+        self.assertFalse(settings.API_RUNTIME)
+        self.assertIn('django.contrib.admin', settings.INSTALLED_APPS)
@@ -0,0 +1,134 @@
+import time
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from restaurants.models import District, Restaurant
+from restaurants.suggestions import SuggestionIndex, _Entry, fold, highlight, suggestion_index
+
+
+class TurkishFoldingTestCase(SimpleTestCase):
+    def test_fold_collapses_turkish_letters(self):
+        self.assertEqual(fold('KADIKÖY'), 'kadikoy')
+        self.assertEqual(fold('Kadıköy'), 'kadikoy')
+        self.assertEqual(fold('İstiklal Şişli Ağaç Üsküdar'), 'istiklal sisli agac uskudar')
+
+    def test_fold_preserves_offsets(self):
+        for text in ['İIıi', 'Çiya Sofrası', 'Beyoğlu']:
+            self.assertEqual(len(fold(text)), len(text))
+
+    def test_highlight_prefers_word_start(self):
+        self.assertEqual(highlight('Akasya Kahve', 'ka'), [7, 9])
+        self.assertEqual(highlight('Çiya Sofrası', 'CIYA'), [0, 4])
+        self.assertIsNone(highlight('Mikla', 'zz'))
+
+
+@override_settings(RESTAURANT_SUGGESTION_INDEX=True)
+class SuggestionIndexTestCase(APITestCase):
+    url = reverse('search-suggestions')
+
+    def setUp(self):
+        self.kadikoy = District.objects.create(name='Kadıköy', slug='kadikoy')
+        self.sisli = District.objects.create(name='Şişli', slug='sisli')
+        self.ciya = Restaurant.objects.create(
+            name='Çiya Sofrası', slug='ciya', district=self.kadikoy, rating=4.8, review_count=900
+        )
+        Restaurant.objects.create(
+            name='Kadıköy Çiya Kebap', slug='ciya-kebap', district=self.kadikoy, rating=4.2
+        )
+        Restaurant.objects.create(
+            name='Lokanta Çiya', slug='lokanta', district=self.kadikoy, rating=4.9
+        )
+        Restaurant.objects.create(
+            name='Çiya Kapalı', slug='kapali', district=self.kadikoy, is_active=False
+        )
+        suggestion_index.invalidate()
+
+    def test_folded_prefix_lookup_ranks_by_match_then_rating(self):
+        response = self.client.get(self.url, {'q': 'CIYA'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        payload = response.json()
+        slugs = [r['slug'] for r in payload['restaurants']]
+        self.assertEqual(slugs, ['ciya', 'lokanta', 'ciya-kebap'])
+        self.assertEqual(payload['restaurants'][0]['highlight'], [0, 4])
+        self.assertEqual(payload['restaurants'][2]['highlight'], [8, 12])
+
+        payload = self.client.get(self.url, {'q': 'şiş'}).json()
+        self.assertEqual(
+            payload['districts'], [{'slug': 'sisli', 'name': 'Şişli', 'highlight': [0, 3]}]
+        )
+
+    def test_substring_match_falls_back_to_trigrams(self):
+        payload = self.client.get(self.url, {'q': 'frası'}).json()
+        self.assertEqual([r['slug'] for r in payload['restaurants']], ['ciya'])
+        self.assertEqual(payload['restaurants'][0]['highlight'], [7, 12])
+
+    def test_sync_picks_up_writes_from_other_processes(self):
+        self.client.get(self.url, {'q': 'ciya'})
+        Restaurant.objects.filter(slug='lokanta').update(is_active=False, updated_at=timezone.now())
+        Restaurant.objects.create(name='Çiya Yeni', slug='ciya-yeni', district=self.kadikoy)
+        suggestion_index._synced_at -= suggestion_index.sync_interval + 1
+        payload = self.client.get(self.url, {'q': 'ciya'}).json()
+        self.assertEqual(
+            [r['slug'] for r in payload['restaurants']], ['ciya', 'ciya-yeni', 'ciya-kebap']
+        )
+
+    def test_sync_picks_up_deletes_and_districts_from_other_processes(self):
+        self.client.get(self.url, {'q': 'ciya'})
+        # Signals fire here, but the local dirty marks are what another process lacks.
+        self.ciya.delete()
+        District.objects.create(name='Şile', slug='sile')
+        District.objects.filter(pk=self.sisli.pk).delete()
+        suggestion_index._dirty_restaurants.clear()
+        suggestion_index._dirty_districts.clear()
+        suggestion_index._synced_at -= suggestion_index.sync_interval + 1
+        payload = self.client.get(self.url, {'q': 'ciya'}).json()
+        self.assertEqual([r['slug'] for r in payload['restaurants']], ['lokanta', 'ciya-kebap'])
+        payload = self.client.get(self.url, {'q': 'si'}).json()
+        self.assertEqual([d['slug'] for d in payload['districts']], ['sile'])
+
+    def test_index_follows_writes(self):
+        self.client.get(self.url, {'q': 'ciya'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ciya.is_active = False
+            self.ciya.save()
+            District.objects.filter(pk=self.sisli.pk).update(name='Sisli')
+            self.sisli.name = 'Nişantaşı'
+            self.sisli.save()
+        payload = self.client.get(self.url, {'q': 'ciya'}).json()
+        self.assertNotIn('ciya', [r['slug'] for r in payload['restaurants']])
+        payload = self.client.get(self.url, {'q': 'nisan'}).json()
+        self.assertEqual([d['slug'] for d in payload['districts']], ['sisli'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Restaurant.objects.get(slug='lokanta').delete()
+        payload = self.client.get(self.url, {'q': 'ciya'}).json()
+        self.assertEqual([r['slug'] for r in payload['restaurants']], ['ciya-kebap'])
+
+    @override_settings(RESTAURANT_SUGGESTION_INDEX=False)
+    def test_database_fallback_keeps_shape(self):
+        payload = self.client.get(self.url, {'q': 'Sofra'}).json()
+        self.assertEqual(payload['restaurants'][0]['highlight'], [5, 10])
+
+
+class SuggestionIndexScaleTestCase(SimpleTestCase):
+    def test_lookup_is_sub_millisecond_at_scale(self):
+        index = SuggestionIndex()
+        words = ['Kebap', 'Meyhane', 'Lokanta', 'Kahve', 'Balık', 'Çiğköfte', 'Pide', 'Sofra']
+        index.restaurants.bulk_load(
+            _Entry(i, f'{words[i % 8]} {words[i // 8 % 8]} {i}', (-(i % 50), -i, ''), {'id': i})
+            for i in range(100_000)
+        )
+        index._built_at = index._synced_at = time.monotonic()
+        queries = ['k', 'ke', 'kebap', 'meyhane lok', 'cigk', 'ofra', '4242']
+        for query in queries:
+            index.search(query)
+        start = time.perf_counter()
+        rounds = 50
+        for _ in range(rounds):
+            for query in queries:
+                index.search(query)
+        per_lookup = (time.perf_counter() - start) / (rounds * len(queries))
+        self.assertLess(per_lookup, 0.001)
@@ -0,0 +1,151 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from restaurants.models import AdditionalFilter, District, FeatureTag, Restaurant, Tombstone
+from restaurants.sync import encode_token
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class CatalogueSyncTestCase(APITestCase):
+    def setUp(self):
+        self.district = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        FeatureTag.objects.create(key='outdoor', label='Outdoor Seating')
+        AdditionalFilter.objects.create(key='date-night', label='Date Night', emoji='💞')
+        for index in range(4):
+            Restaurant.objects.create(
+                name=f'Mekan {index}', slug=f'mekan-{index}', district=self.district
+            )
+        Restaurant.objects.create(
+            name='Kapalı', slug='kapali', district=self.district, is_active=False
+        )
+        self.url = reverse('sync')
+
+    def sync(self, token=None):
+        params = {} if token is None else {'token': token}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_full_sync_then_nothing_changed(self):
+        data = self.sync()
+        slugs = sorted(row['slug'] for row in data['restaurants'])
+        self.assertEqual(slugs, [f'mekan-{index}' for index in range(4)])
+        detail = self.client.get(reverse('restaurant-detail', args=['mekan-0'])).json()
+        self.assertIn(detail, data['restaurants'])
+        self.assertEqual(data['districts'], [{'slug': 'beyoglu', 'name': 'Beyoğlu'}])
+        self.assertEqual(data['features'], [{'key': 'outdoor', 'label': 'Outdoor Seating'}])
+        self.assertEqual(len(data['additional_filters']), 1)
+        self.assertEqual(data['deleted'], {resource: [] for resource in data['deleted']})
+        self.assertFalse(data['has_more'])
+
+        again = self.sync(data['next'])
+        for resource in ('restaurants', 'districts', 'features', 'additional_filters'):
+            self.assertEqual(again[resource], [])
+
+    def test_changes_and_tombstones(self):
+        token = self.sync()['next']
+        updated = Restaurant.objects.get(slug='mekan-0')
+        updated.name = 'Mekan Sıfır'
+        updated.save()
+        deactivated = Restaurant.objects.get(slug='mekan-1')
+        deactivated.is_active = False
+        deactivated.save()
+        deleted = Restaurant.objects.get(slug='mekan-2').pk
+        Restaurant.objects.filter(pk=deleted).delete()
+        # A link change alone is a change to the restaurant.
+        Restaurant.objects.get(slug='mekan-3').additional_filters.add('date-night')
+        FeatureTag.objects.get(key='outdoor').delete()
+        self.district.slug = 'beyoglu-merkez'
+        self.district.save()
+
+        data = self.sync(token)
+        # The district rename resends both, so they arrive in id order.
+        by_slug = {row['slug']: row for row in data['restaurants']}
+        self.assertEqual(sorted(by_slug), ['mekan-0', 'mekan-3'])
+        self.assertEqual(by_slug['mekan-0']['name'], 'Mekan Sıfır')
+        self.assertEqual(by_slug['mekan-3']['additional_filters'], ['date-night'])
+        self.assertEqual(
+            sorted(data['deleted']['restaurants']), sorted([str(deactivated.pk), str(deleted)])
+        )
+        self.assertEqual(data['deleted']['features'], ['outdoor'])
+        self.assertEqual(data['districts'], [{'slug': 'beyoglu-merkez', 'name': 'Beyoğlu'}])
+        self.assertEqual(data['deleted']['districts'], ['beyoglu'])
+        self.assertEqual(data['features'], [])
+
+    def test_deleted_additional_filters_are_tombstoned(self):
+        token = self.sync()['next']
+        AdditionalFilter.objects.get(key='date-night').delete()
+        data = self.sync(token)
+        self.assertEqual(data['deleted']['additional_filters'], ['date-night'])
+        self.assertEqual(data['additional_filters'], [])
+
+    def test_district_renames_resend_its_restaurants(self):
+        token = self.sync()['next']
+        self.district.name = 'Beyoğlu Merkez'
+        self.district.save()
+        data = self.sync(token)
+        self.assertEqual(len(data['restaurants']), 4)
+        self.assertEqual(
+            {row['district_name'] for row in data['restaurants']}, {'Beyoğlu Merkez'}
+        )
+        self.assertEqual(data['deleted']['districts'], [])
+
+        self.district.slug = 'beyoglu-merkez'
+        self.district.save()
+        data = self.sync(data['next'])
+        self.assertEqual({row['district'] for row in data['restaurants']}, {'beyoglu-merkez'})
+        self.assertEqual(data['deleted']['districts'], ['beyoglu'])
+
+    def test_recreated_keys_are_not_reported_deleted(self):
+        token = self.sync()['next']
+        FeatureTag.objects.get(key='outdoor').delete()
+        FeatureTag.objects.create(key='outdoor', label='Terrace')
+        data = self.sync(token)
+        self.assertEqual(data['features'], [{'key': 'outdoor', 'label': 'Terrace'}])
+        self.assertEqual(data['deleted']['features'], [])
+
+    @override_settings(SYNC_PAGE_SIZE=2)
+    def test_pages_through_rows_sharing_a_timestamp(self):
+        token = self.sync()['next']
+        restaurants = list(Restaurant.objects.all())
+        now = timezone.now()
+        for restaurant in restaurants:
+            restaurant.updated_at = now
+        Restaurant.objects.bulk_update(restaurants, ['updated_at'])
+
+        seen, pages = [], 0
+        while True:
+            data = self.sync(token)
+            pages += 1
+            seen += [row['id'] for row in data['restaurants']] + data['deleted']['restaurants']
+            token = data['next']
+            if not data['has_more']:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(sorted(seen), sorted(str(restaurant.pk) for restaurant in restaurants))
+
+    @override_settings(SYNC_SETTLE_SECONDS=60)
+    def test_recent_changes_wait_to_settle(self):
+        self.assertEqual(self.sync()['restaurants'], [])
+        token = encode_token(timezone.now() - timedelta(seconds=30))
+        self.assertEqual(self.sync(token)['next'], token)
+
+    def test_invalid_and_expired_tokens(self):
+        response = self.client.get(self.url, {'token': 'not-a-token'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('token', response.json())
+        expired = encode_token(timezone.now() - timedelta(days=31))
+        response = self.client.get(self.url, {'token': expired})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    @override_settings(SYNC_TOMBSTONE_DAYS=1)
+    def test_expired_tombstones_are_pruned(self):
+        Restaurant.objects.get(slug='mekan-0').delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=2))
+        Restaurant.objects.get(slug='mekan-1').delete()
+        self.assertEqual(Tombstone.objects.count(), 1)
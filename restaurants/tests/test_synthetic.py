@@ -0,0 +1,52 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from restaurants.models import District, Restaurant
+from restaurants.synthetic import DISTRICTS, generate
+
+
+class GenerateCatalogueTestCase(TestCase):
+    def _snapshot(self):
+        return list(
+            Restaurant.objects.order_by('slug').values_list(
+                'id', 'slug', 'district__slug', 'rating', 'feature_keys', 'additional_keys'
+            )
+        )
+
+    def test_same_seed_same_catalogue(self):
+        generate(200, seed=3)
+        first = self._snapshot()
+        generate(200, seed=3, replace=True)
+        self.assertEqual(self._snapshot(), first)
+        generate(200, seed=4, replace=True)
+        self.assertNotEqual(self._snapshot(), first)
+
+    def test_rows_are_consistent(self):
+        generate(300, seed=1)
+        self.assertEqual(District.objects.count(), len(DISTRICTS))
+        for restaurant in Restaurant.objects.prefetch_related('features', 'additional_filters'):
+            self.assertEqual(
+                restaurant.feature_keys, sorted(tag.key for tag in restaurant.features.all())
+            )
+            self.assertEqual(
+                restaurant.additional_keys,
+                sorted(tag.key for tag in restaurant.additional_filters.all()),
+            )
+            self.assertTrue(restaurant.geohash)
+            self.assertTrue(1 <= restaurant.price_tier <= 4)
+        # Busier districts get more restaurants.
+        self.assertGreater(
+            Restaurant.objects.filter(district__slug='beyoglu').count(),
+            Restaurant.objects.filter(district__slug='adalar').count(),
+        )
+
+    def test_command_appends_without_clashing(self):
+        out = StringIO()
+        call_command('generate_catalogue', '--restaurants', '50', stdout=out)
+        call_command('generate_catalogue', '--restaurants', '50', stdout=out)
+        self.assertEqual(Restaurant.objects.count(), 100)
+        self.assertIn('Generated 50 restaurants across', out.getvalue())
+        call_command('generate_catalogue', '--restaurants', '20', '--replace', stdout=out)
+        self.assertEqual(Restaurant.objects.count(), 20)
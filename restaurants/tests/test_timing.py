@@ -0,0 +1,99 @@
+import re
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from restaurants.models import District, FeatureTag, Restaurant
+from restaurants.timing import metrics
+
+ENTRY = re.compile(r'(?P<name>[a-z]+);dur=(?P<dur>[0-9.]+)(?:;desc="(?P<desc>[^"]*)")?')
+
+
+def server_timing(response):
+    return {
+        match['name']: (float(match['dur']), match['desc'])
+        for match in ENTRY.finditer(response['Server-Timing'])
+    }
+
+
+class ServerTimingTestCase(APITestCase):
+    def setUp(self):
+        metrics.reset()
+        district = District.objects.create(name='Beyoğlu', slug='beyoglu')
+        FeatureTag.objects.create(key='outdoor', label='Outdoor Seating')
+        for index in range(3):
+            restaurant = Restaurant.objects.create(
+                name=f'Mekan {index}', slug=f'mekan-{index}', district=district
+            )
+            restaurant.features.add('outdoor')
+
+    def test_header_breaks_request_into_phases(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('restaurant-list'), {'feature': 'outdoor'})
+        self.assertEqual(response.status_code, 200)
+        entries = server_timing(response)
+        for name in ('auth', 'perm', 'filter', 'serialize', 'view', 'render', 'db', 'total'):
+            self.assertIn(name, entries)
+        self.assertEqual(entries['db'][1], f'{len(ctx.captured_queries)} queries')
+        parts = sum(dur for name, (dur, _) in entries.items() if name != 'total')
+        self.assertLessEqual(parts, entries['total'][0] + 0.05)
+
+    def test_serializer_path_is_timed(self):
+        with override_settings(RESTAURANT_FAST_PAYLOADS=False):
+            response = self.client.get(reverse('restaurant-detail', args=['mekan-1']))
+        self.assertIn('serialize', server_timing(response))
+        self.assertIn('serialize', server_timing(self.client.get(reverse('district-list'))))
+
+    @override_settings(REQUEST_TIMING=False, DEBUG=True)
+    def test_disabled(self):
+        response = self.client.get(reverse('restaurant-list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertNotIn('restaurant-list', self.client.get('/metrics').content.decode())
+
+
+@override_settings(DEBUG=True)
+class MetricsEndpointTestCase(APITestCase):
+    def setUp(self):
+        metrics.reset()
+        District.objects.create(name='Beyoğlu', slug='beyoglu')
+
+    def test_histograms_and_counters_per_route(self):
+        for _ in range(3):
+            self.client.get(reverse('restaurant-list'))
+        self.client.get(reverse('restaurant-detail', args=['missing']))
+        self.client.get('/nowhere/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        route = 'route="restaurant-list",method="GET"'
+        self.assertIn(f'bff_request_duration_seconds_bucket{{{route},le="+Inf"}} 3', body)
+        self.assertIn(f'bff_request_duration_seconds_count{{{route}}} 3', body)
+        self.assertIn(f'bff_requests_total{{{route},status="200"}} 3', body)
+        self.assertIn(
+            'bff_requests_total{route="restaurant-detail",method="GET",status="404"} 1', body
+        )
+        self.assertIn('bff_requests_total{route="unmatched",method="GET",status="404"} 1', body)
+        queries = re.search(rf'bff_db_queries_total{{{route}}} (\d+)', body)
+        self.assertGreater(int(queries[1]), 0)
+        bucket = rf'bff_request_duration_seconds_bucket{{{route},le="[^"]+"}} (\d+)'
+        buckets = [int(count) for count in re.findall(bucket, body)]
+        self.assertEqual(buckets, sorted(buckets))
+        self.assertIn(f'bff_request_phase_seconds_total{{{route},phase="serialize"}}', body)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DEBUG=False, METRICS_TOKEN='')
+    def test_hidden_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ')
+        self.assertEqual(response.status_code, 404)
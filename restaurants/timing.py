@@ -0,0 +1,338 @@
+"""Per-request phase timings (``Server-Timing``) and in-process Prometheus metrics.
+
+``ServerTimingMiddleware`` tracks one ``RequestTiming`` per request in a
+context variable. Every connection carries an execute wrapper that times SQL
+statements for the request in context, whichever thread runs them (sync views
+under ASGI and the async read path query from worker threads), and code
+paths mark their own phases with ``phase()``. Phase
+durations exclude SQL and nested phases, so ``auth``, ``perm``, ``filter``,
+``serialize``, ``view``, ``render`` and ``db`` add up to the request's ``total`` minus
+middleware and URL routing. Each finished request is also folded into
+``metrics``, which ``/metrics`` renders in the Prometheus text format.
+Metrics are per process; scrape every worker.
+"""
+import bisect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Upper bounds, in seconds, of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PHASES = ('auth', 'perm', 'filter', 'serialize', 'view', 'render')
+UNMATCHED_ROUTE = 'unmatched'
+
+_current = ContextVar('request_timing', default=None)
+
+
+def timing_enabled() -> bool:
+    return getattr(settings, 'REQUEST_TIMING', True)
+
+
+class RequestTiming:
+    """Phase durations and SQL totals for one request; also its execute wrapper."""
+
+    __slots__ = ('phases', 'queries', 'aliases', 'db', 'nested', '_lock')
+
+    def __init__(self):
+        self.phases = {}
+        self.queries = 0
+        # Statements per database alias, e.g. ``default`` and read replicas.
+        self.aliases = {}
+        self.db = 0.0
+        # Non-SQL time of phases nested inside the phase currently running.
+        self.nested = 0.0
+        # The async read path runs one request's queries on several threads.
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            alias = context['connection'].alias
+            with self._lock:
+                self.db += elapsed
+                self.queries += 1
+                self.aliases[alias] = self.aliases.get(alias, 0) + 1
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + max(seconds, 0.0)
+
+    def header(self, total):
+        parts = [
+            f'{name};dur={self.phases[name] * 1000:.2f}' for name in PHASES if name in self.phases
+        ]
+        parts.append(f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"')
+        parts.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(parts)
+
+
+def current_timing():
+    return _current.get()
+
+
+def _time_query(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    return timing(execute, sql, params, many, context)
+
+
+def instrument(connection, **kwargs):  # noqa: ARG001
+    """Install the timing wrapper on ``connection`` (once)."""
+    if _time_query not in connection.execute_wrappers:
+        # First, so ``execute_wrapper()`` blocks around us still pop their own.
+        connection.execute_wrappers.insert(0, _time_query)
+
+
+connection_created.connect(instrument)
+
+
+@contextmanager
+def phase(name):
+    """Attribute the enclosed code's own (non-SQL, non-nested) time to ``name``."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    outer, timing.nested = timing.nested, 0.0
+    db = timing.db
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = perf_counter() - start - (timing.db - db)
+        timing.add(name, elapsed - timing.nested)
+        timing.nested = outer + elapsed
+
+
+class TimedViewMixin:
+    """Splits DRF request handling into ``auth``/``perm``/``filter``/``serialize``/``view``.
+
+    The stock ``list``/``retrieve`` handlers are mostly serializer work once their
+    SQL and filtering are taken out; ``view`` is whatever the handler does besides.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with phase('view'):
+            return super().dispatch(request, *args, **kwargs)
+
+    def perform_authentication(self, request):
+        with phase('auth'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with phase('perm'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with phase('perm'):
+            super().check_object_permissions(request, obj)
+
+    def filter_queryset(self, queryset):
+        with phase('filter'):
+            return super().filter_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        with phase('serialize'):
+            return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        with phase('serialize'):
+            return super().retrieve(request, *args, **kwargs)
+
+
+class _RouteStats:
+    __slots__ = ('buckets', 'count', 'sum', 'statuses', 'queries', 'db', 'phases')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.statuses = {}
+        self.queries = 0
+        self.db = 0.0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+
+
+class Metrics:
+    """Per-route latency histograms and counters, rendered as Prometheus text."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._aliases = {}
+        self._coalesced = {}
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+            self._aliases = {}
+            self._coalesced = {}
+
+    def coalesced(self, route, outcome):
+        """Count a request answered from another request's flight (see ``coalesce``)."""
+        with self._lock:
+            self._coalesced[(route, outcome)] = self._coalesced.get((route, outcome), 0) + 1
+
+    def observe(self, route, method, status, seconds, timing):
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            stats = self._routes.get((route, method))
+            if stats is None:
+                stats = self._routes[(route, method)] = _RouteStats()
+            stats.buckets[bucket] += 1
+            stats.count += 1
+            stats.sum += seconds
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.queries += timing.queries
+            stats.db += timing.db
+            for name, value in timing.phases.items():
+                stats.phases[name] += value
+            for alias, count in timing.aliases.items():
+                self._aliases[alias] = self._aliases.get(alias, 0) + count
+
+    def render(self):
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                '# HELP bff_request_duration_seconds Request latency by route.',
+                '# TYPE bff_request_duration_seconds histogram',
+            ]
+            for (route, method), stats in routes:
+                labels = _labels(route=route, method=method)
+                cumulative = 0
+                for bound, count in zip((*LATENCY_BUCKETS, '+Inf'), stats.buckets):
+                    cumulative += count
+                    lines.append(
+                        f'bff_request_duration_seconds_bucket{{{labels},le="{bound}"}} '
+                        f'{cumulative}'
+                    )
+                lines.append(f'bff_request_duration_seconds_sum{{{labels}}} {stats.sum!r}')
+                lines.append(f'bff_request_duration_seconds_count{{{labels}}} {stats.count}')
+            lines += [
+                '# HELP bff_requests_total Requests by route and status code.',
+                '# TYPE bff_requests_total counter',
+            ]
+            for (route, method), stats in routes:
+                for status, count in sorted(stats.statuses.items()):
+                    labels = _labels(route=route, method=method, status=status)
+                    lines.append(f'bff_requests_total{{{labels}}} {count}')
+            lines += [
+                '# HELP bff_db_queries_total SQL statements run by route.',
+                '# TYPE bff_db_queries_total counter',
+            ]
+            for (route, method), stats in routes:
+                labels = _labels(route=route, method=method)
+                lines.append(f'bff_db_queries_total{{{labels}}} {stats.queries}')
+            lines += [
+                '# HELP bff_db_alias_queries_total SQL statements by database alias.',
+                '# TYPE bff_db_alias_queries_total counter',
+            ]
+            for alias, count in sorted(self._aliases.items()):
+                lines.append(f'bff_db_alias_queries_total{{{_labels(alias=alias)}}} {count}')
+            lines += [
+                '# HELP bff_coalesced_requests_total Requests served by another request\'s build.',
+                '# TYPE bff_coalesced_requests_total counter',
+            ]
+            for (route, outcome), count in sorted(self._coalesced.items()):
+                labels = _labels(route=route, outcome=outcome)
+                lines.append(f'bff_coalesced_requests_total{{{labels}}} {count}')
+            lines += [
+                '# HELP bff_db_query_seconds_total Time spent in SQL by route.',
+                '# TYPE bff_db_query_seconds_total counter',
+            ]
+            for (route, method), stats in routes:
+                labels = _labels(route=route, method=method)
+                lines.append(f'bff_db_query_seconds_total{{{labels}}} {stats.db!r}')
+            lines += [
+                '# HELP bff_request_phase_seconds_total Time outside SQL by route and phase.',
+                '# TYPE bff_request_phase_seconds_total counter',
+            ]
+            for (route, method), stats in routes:
+                for name, seconds in stats.phases.items():
+                    labels = _labels(route=route, method=method, phase=name)
+                    lines.append(f'bff_request_phase_seconds_total{{{labels}}} {seconds!r}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metrics = Metrics()
+
+
+class ServerTimingMiddleware:
+    """Adds ``Server-Timing`` to every response and records it in ``metrics``."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not timing_enabled():
+            return self.get_response(request)
+        # Connections opened before this module was imported never saw the signal.
+        for connection in connections.all(initialized_only=True):
+            instrument(connection)
+        timing = RequestTiming()
+        token = _current.set(timing)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timing, perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not timing_enabled():
+            return await self.get_response(request)
+        timing = RequestTiming()
+        token = _current.set(timing)
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timing, perf_counter() - start)
+
+    def finish(self, request, response, timing, total):
+        response['Server-Timing'] = timing.header(total)
+        match = request.resolver_match
+        route = match.view_name if match is not None else UNMATCHED_ROUTE
+        metrics.observe(route, request.method, response.status_code, total, timing)
+        return response
+
+    def process_template_response(self, request, response):  # noqa: ARG002
+        # DRF responses are rendered by the handler right after this hook.
+        timing = _current.get()
+        if timing is not None:
+            response.add_post_render_callback(_render_timer(timing))
+        return response
+
+
+def _render_timer(timing):
+    start, db = perf_counter(), timing.db
+
+    def stop(response):  # noqa: ARG001
+        timing.add('render', perf_counter() - start - (timing.db - db))
+
+    return stop
@@ -0,0 +1,18 @@
+"""Token serializers for /api/auth/token/, imported with the JWT stack on first use."""
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from .roles import EDITOR_CLAIM, EDITOR_GROUP
+
+
+class EditorTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair carrying the user's editor role, so permission checks need no group query.
+
+    Refreshed access tokens copy the claim from the refresh token; a user who
+    joins the editor group signs in again to receive it.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[EDITOR_CLAIM] = user.groups.filter(name=EDITOR_GROUP).exists()
+        return token
@@ -1,12 +1,16 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import async_reads, async_reads_enabled
 from .views import (
     AdditionalFilterViewSet,
     DistrictViewSet,
     FeatureTagViewSet,
     RestaurantViewSet,
+    catalogue_sync,
+    search_restaurants,
     search_suggestions,
+    snapshot_manifest,
 )
 
 router = DefaultRouter()
@@ -17,5 +21,11 @@ router.register('districts', DistrictViewSet, basename='district')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('search/', search_restaurants, name='search'),
     path('search/suggestions/', search_suggestions, name='search-suggestions'),
+    path('sync/', catalogue_sync, name='sync'),
+    path('snapshots/', snapshot_manifest, name='snapshot-manifest'),
 ]
+
+if async_reads_enabled():
+    urlpatterns = async_reads(urlpatterns)
@@ -1,14 +1,46 @@
 import uuid
 
+from django.conf import settings
 from django.db.models import Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
 from django.shortcuts import get_object_or_404
+from django.utils.crypto import constant_time_compare
+from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
 from rest_framework import mixins, status, viewsets
-from rest_framework.decorators import api_view
+from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
 
-from .filters import RestaurantFilter
+from .bulk import BatchUpdate
+from .cache import (
+    ADDITIONAL_FILTERS,
+    DISTRICTS,
+    FEATURES,
+    RESTAURANTS,
+    SCORES,
+    CachedResponseMixin,
+)
+from .conditional import (
+    Validators,
+    conditional_response,
+    row_stamp,
+    scored_stamp,
+    stamp,
+    taxonomy_stamps,
+)
+from .exports import CONTENT_TYPE, export_queryset, gzipped, ndjson_lines
+from .facets import facet_counts, facet_index, facet_index_enabled
+from .filters import RestaurantFilter, RestaurantOrderingFilter
 from .models import AdditionalFilter, District, FeatureTag, Restaurant
+from .pagination import RestaurantPagination
+from .payloads import fast_payloads_enabled, field_selection, payloads, project, rows
 from .permissions import IsRestaurantEditor
+from .routers import ReplicaReadsMixin, read_replica
+from .search import search_index, search_index_enabled
 from .serializers import (
     AdditionalFilterSerializer,
     DistrictSerializer,
@@ -17,23 +49,38 @@ from .serializers import (
     RestaurantListSerializer,
     RestaurantWriteSerializer,
 )
+from .snapshots import snapshot_publisher
+from .suggestions import highlight, suggestion_index, suggestion_index_enabled
+from .sync import changes
+from .timing import TimedViewMixin, metrics
+
+accepts_gzip = _lazy_re_compile(r'\bgzip\b')
 
 
-class RestaurantViewSet(viewsets.ModelViewSet):
+class RestaurantViewSet(
+    TimedViewMixin, ReplicaReadsMixin, CachedResponseMixin, viewsets.ModelViewSet
+):
     queryset = (
         Restaurant.objects.filter(is_active=True)
         .select_related('district')
         .prefetch_related('features', 'additional_filters')
     )
     filterset_class = RestaurantFilter
+    filter_backends = [DjangoFilterBackend, RestaurantOrderingFilter]
+    pagination_class = RestaurantPagination
     permission_classes = [IsRestaurantEditor]
-    ordering_fields = ['rating', 'price_tier']
+    ordering_fields = ['rating', 'score', 'price_tier', 'distance']
     ordering = ['-rating']
+    replica_actions = frozenset({'list', 'retrieve', 'batch_read'})
+    cache_resources = {
+        'list': (RESTAURANTS, DISTRICTS, FEATURES, ADDITIONAL_FILTERS, SCORES),
+        'retrieve': (RESTAURANTS, DISTRICTS, FEATURES, ADDITIONAL_FILTERS),
+    }
 
     def get_serializer_class(self):
         if self.action == 'list':
             return RestaurantListSerializer
-        if self.action == 'retrieve':
+        if self.action in {'retrieve', 'batch_read'}:
             return RestaurantDetailSerializer
         return RestaurantWriteSerializer
 
@@ -45,6 +92,31 @@ class RestaurantViewSet(viewsets.ModelViewSet):
             )
         return qs
 
+    def filter_queryset(self, queryset):
+        # Projected after ordering, so that the ordering columns stay loaded.
+        queryset = super().filter_queryset(queryset)
+        return project(queryset, self.selected_fields(), detail=self.action == 'retrieve')
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in {'list', 'retrieve'}:
+            kwargs.setdefault('fields', self.selected_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def selected_fields(self):
+        """The ``?fields=``/``?exclude=`` payload keys of a list or retrieve, or None."""
+        if self.action not in {'list', 'retrieve'}:
+            return None
+        return field_selection(self.request.query_params, detail=self.action == 'retrieve')
+
+    def get_lookup(self):
+        """Filter kwargs for the slug or UUID in the URL."""
+        lookup_value = self.kwargs.get(self.lookup_field, '')
+        try:
+            uuid.UUID(str(lookup_value))
+        except (ValueError, TypeError):
+            return {'slug': lookup_value}
+        return {'pk': lookup_value}
+
     def get_object(self):
         lookup_value = self.kwargs.get(self.lookup_field, '')
         if not lookup_value:
@@ -52,15 +124,212 @@ class RestaurantViewSet(viewsets.ModelViewSet):
         base_qs = Restaurant.objects.select_related('district').prefetch_related(
             'features', 'additional_filters'
         )
-        try:
-            uuid.UUID(str(lookup_value))
-        except (ValueError, TypeError):
-            obj = get_object_or_404(base_qs, slug=lookup_value)
-        else:
-            obj = get_object_or_404(base_qs, pk=lookup_value)
+        if self.action == 'retrieve':
+            base_qs = project(base_qs, self.selected_fields(), detail=True)
+        obj = get_object_or_404(base_qs, **self.get_lookup())
         self.check_object_permissions(self.request, obj)
         return obj
 
+    def get_validators(self):
+        """Cheap validators for the current read action, without serializing anything."""
+        cache_key = self.get_cache_key(self.request)
+        if cache_key is not None:
+            # The versioned cache key already identifies the payload we would serve.
+            return Validators(self.request, content=cache_key)
+        taxonomy = taxonomy_stamps().values()
+        if self.action == 'list' and not self.paginator.is_cursor_request(self.request):
+            queryset = self.filter_queryset(self.get_queryset())
+            return Validators(self.request, scored_stamp(queryset), *taxonomy)
+        # Keyset pages deliberately skip the filtered COUNT, so they (and the
+        # facets) are validated against the whole restaurant table instead.
+        if self.action == 'retrieve':
+            row = row_stamp(Restaurant.objects.filter(**self.get_lookup()))
+            return None if row is None else Validators(self.request, row, *taxonomy)
+        return Validators(self.request, scored_stamp(Restaurant.objects.all()), *taxonomy)
+
+    def list(self, request, *args, **kwargs):
+        def build():
+            return self.cached_response(request, lambda: self._list(request, *args, **kwargs))
+
+        return conditional_response(request, self.shared_validators, build)
+
+    def _list(self, request, *args, **kwargs):
+        if facet_index_enabled():
+            response = self._list_from_facet_index(request)
+            if response is not None:
+                return response
+        if not fast_payloads_enabled():
+            return super().list(request, *args, **kwargs)
+        fields = self.selected_fields()
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(rows(queryset, fields=fields))
+        return self.get_paginated_response(payloads(page, fields=fields))
+
+    def retrieve(self, request, *args, **kwargs):
+        def build():
+            return self.cached_response(request, lambda: self._retrieve(request, *args, **kwargs))
+
+        return conditional_response(request, self.shared_validators, build)
+
+    def _retrieve(self, request, *args, **kwargs):
+        if not fast_payloads_enabled() or not self.kwargs.get(self.lookup_field):
+            return super().retrieve(request, *args, **kwargs)
+        fields = self.selected_fields()
+        queryset = rows(Restaurant.objects.filter(**self.get_lookup()), detail=True, fields=fields)
+        found = payloads(queryset[:1], detail=True, fields=fields)
+        if not found:
+            # Same message as ``get_object_or_404`` in ``get_object``.
+            raise Http404(f'No {Restaurant._meta.object_name} matches the given query.')
+        return Response(found[0])
+
+    def _list_from_facet_index(self, request):
+        """Answer the list from the in-memory facet index, or return None to fall back."""
+        paginator = self.paginator
+        if paginator.is_cursor_request(request):
+            return None
+        ordering = request.query_params.get('ordering') or '-rating'
+        if ordering not in facet_index.ORDERINGS:
+            return None
+        filterset = RestaurantFilter(
+            request.query_params, queryset=self.get_queryset(), request=request
+        )
+        if not filterset.is_valid() or not filterset.index_answerable():
+            return None
+
+        bits = facet_index.match(**filterset.facet_params())
+        paginator.request = request
+        paginator.limit = paginator.get_limit(request)
+        paginator.offset = paginator.get_offset(request)
+        paginator.count = bits.bit_count()
+        pks = facet_index.page(bits, ordering, paginator.offset, paginator.limit)
+        if fast_payloads_enabled():
+            fields = self.selected_fields()
+            queryset = rows(self.get_queryset().filter(pk__in=pks), fields=fields)
+            found = {row.id: row for row in queryset}
+            page = [found[pk] for pk in pks if pk in found]
+            return paginator.get_paginated_response(payloads(page, fields=fields))
+        found = self.get_queryset().filter(pk__in=pks).in_bulk()
+        page = [found[pk] for pk in pks if pk in found]
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        filterset = RestaurantFilter(
+            request.query_params, queryset=self.get_queryset(), request=request
+        )
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return conditional_response(
+            request, self.get_validators, lambda: Response(facet_counts(filterset))
+        )
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream every active restaurant as NDJSON, gzipped when the client accepts it."""
+        compress = bool(accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+
+        def validators():
+            stamps = [stamp(export_queryset()), *taxonomy_stamps().values()]
+            return Validators(request, *stamps, content='gzip' if compress else None)
+
+        def build():
+            chunks = ndjson_lines()
+            response = StreamingHttpResponse(
+                gzipped(chunks) if compress else chunks, content_type=CONTENT_TYPE
+            )
+            if compress:
+                response['Content-Encoding'] = 'gzip'
+            patch_vary_headers(response, ('Accept-Encoding',))
+            return response
+
+        return conditional_response(request, validators, build)
+
+    @action(detail=False, methods=['patch'])
+    def batch(self, request):
+        """Apply a list of partial updates in one transaction and report a result per item."""
+        items = request.data
+        max_items = getattr(settings, 'RESTAURANT_BATCH_MAX_ITEMS', 500)
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'non_field_errors': ['Expected a non-empty list of updates.']})
+        if len(items) > max_items:
+            raise ValidationError(
+                {'non_field_errors': [f'Ensure this list has at most {max_items} items.']}
+            )
+        batch = BatchUpdate(items)
+        results = batch.run()
+        if batch.updated:
+            queryset = Restaurant.objects.filter(pk__in=list(batch.updated))
+            if fast_payloads_enabled():
+                for data in payloads(rows(queryset, detail=True), detail=True):
+                    results[batch.updated[uuid.UUID(data['id'])]]['data'] = data
+            else:
+                queryset = queryset.prefetch_related('features', 'additional_filters')
+                context = self.get_serializer_context()
+                for restaurant in queryset.select_related('district'):
+                    data = RestaurantDetailSerializer(restaurant, context=context).data
+                    results[batch.updated[restaurant.pk]]['data'] = data
+        ok = len(batch.updated) == len(items)
+        return Response(
+            {'results': results}, status=status.HTTP_200_OK if ok else status.HTTP_207_MULTI_STATUS
+        )
+
+    @batch.mapping.get
+    def batch_read(self, request):
+        """Detail payloads for up to ``RESTAURANT_BATCH_MAX_LOOKUPS`` ``ids`` and ``slugs``.
+
+        Results follow the request order, ``ids`` first, and keys that match
+        no restaurant are listed under ``missing``.
+        """
+        keys = self._batch_keys(request)
+        ids = [key for param, key in keys if param == 'ids']
+        slugs = [key for param, key in keys if param == 'slugs']
+        queryset = Restaurant.objects.filter(Q(pk__in=ids) | Q(slug__in=slugs))
+
+        def validators():
+            return Validators(request, stamp(queryset), *taxonomy_stamps().values())
+
+        def build():
+            if fast_payloads_enabled():
+                found = payloads(rows(queryset, detail=True), detail=True)
+            else:
+                related = queryset.select_related('district').prefetch_related(
+                    'features', 'additional_filters'
+                )
+                found = self.get_serializer(related, many=True).data
+            by_key = {}
+            for data in found:
+                by_key['ids', str(data['id'])] = data
+                by_key['slugs', data['slug']] = data
+            results = [by_key[key] for key in keys if key in by_key]
+            missing = [key for param, key in keys if (param, key) not in by_key]
+            return Response({'results': results, 'missing': missing})
+
+        return conditional_response(request, validators, build)
+
+    def _batch_keys(self, request):
+        """``[('ids', uuid), ('slugs', slug), ...]`` from the query string, without repeats."""
+        keys = {}
+        for param in ('ids', 'slugs'):
+            for value in request.query_params.getlist(param):
+                for key in filter(None, (part.strip() for part in value.split(','))):
+                    if param == 'ids':
+                        try:
+                            key = str(uuid.UUID(key))
+                        except ValueError:
+                            raise ValidationError(
+                                {param: [f'"{key}" is not a valid UUID.']}
+                            ) from None
+                    keys[param, key] = None
+        max_lookups = getattr(settings, 'RESTAURANT_BATCH_MAX_LOOKUPS', 100)
+        if not keys:
+            raise ValidationError({'non_field_errors': ['Pass at least one id or slug.']})
+        if len(keys) > max_lookups:
+            raise ValidationError(
+                {'non_field_errors': [f'Ensure at most {max_lookups} ids and slugs are given.']}
+            )
+        return list(keys)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -93,41 +362,200 @@ class RestaurantViewSet(viewsets.ModelViewSet):
         return Response(read_serializer.data)
 
 
-class FeatureTagViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class TaxonomyViewSet(
+    TimedViewMixin,
+    ReplicaReadsMixin,
+    CachedResponseMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    def get_validators(self):
+        cache_key = self.get_cache_key(self.request)
+        if cache_key is not None:
+            return Validators(self.request, content=cache_key)
+        model = self.queryset.model
+        return Validators(self.request, taxonomy_stamps((model,))[model])
+
+    def list(self, request, *args, **kwargs):
+        parent = super()
+
+        def build():
+            return self.cached_response(request, lambda: parent.list(request, *args, **kwargs))
+
+        return conditional_response(request, self.shared_validators, build)
+
+
+class FeatureTagViewSet(TaxonomyViewSet):
     queryset = FeatureTag.objects.all()
     serializer_class = FeatureTagSerializer
+    cache_resources = {'list': (FEATURES,)}
 
 
-class AdditionalFilterViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class AdditionalFilterViewSet(TaxonomyViewSet):
     queryset = AdditionalFilter.objects.all()
     serializer_class = AdditionalFilterSerializer
+    cache_resources = {'list': (ADDITIONAL_FILTERS,)}
 
 
-class DistrictViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class DistrictViewSet(TaxonomyViewSet):
     queryset = District.objects.all()
     serializer_class = DistrictSerializer
+    cache_resources = {'list': (DISTRICTS,)}
 
 
 @api_view(['GET'])
 def search_suggestions(request):
+    with read_replica(request):
+        return _search_suggestions(request)
+
+
+def _search_suggestions(request):
     query = request.query_params.get('q', '').strip()
-    restaurants = []
-    districts = []
-    if query:
-        restaurants = (
-            Restaurant.objects.filter(Q(name__icontains=query), is_active=True)
-            .order_by('name')[:5]
+    if suggestion_index_enabled():
+        restaurants, districts = suggestion_index.search(query)
+        payload = {'query': query, 'restaurants': restaurants, 'districts': districts}
+        # The index answers without touching the database, so the payload
+        # itself is the cheapest validator.
+        return conditional_response(
+            request, lambda: Validators(request, content=payload), lambda: Response(payload)
         )
-        districts = District.objects.filter(name__icontains=query).order_by('name')[:5]
-    payload = {
+
+    restaurant_stamp = stamp(Restaurant.objects.all())
+    district_stamp = taxonomy_stamps((District,))[District]
+    validators = Validators(request, restaurant_stamp, district_stamp)
+    return conditional_response(request, lambda: validators, lambda: _database_suggestions(query))
+
+
+def _database_suggestions(query):
+    restaurants, districts = suggestion_querysets(query)
+    return Response(suggestion_payload(query, restaurants, districts))
+
+
+def suggestion_querysets(query):
+    """Restaurant and district matches for ``query`` when no suggestion index is used."""
+    if not query:
+        return Restaurant.objects.none(), District.objects.none()
+    restaurants = (
+        Restaurant.objects.filter(Q(name__icontains=query), is_active=True)
+        .order_by('name')[:5]
+    )
+    districts = District.objects.filter(name__icontains=query).order_by('name')[:5]
+    return restaurants, districts
+
+
+def suggestion_payload(query, restaurants, districts):
+    return {
         'query': query,
         'restaurants': [
-            {'id': str(restaurant.id), 'name': restaurant.name, 'slug': restaurant.slug}
+            {
+                'id': str(restaurant.id),
+                'name': restaurant.name,
+                'slug': restaurant.slug,
+                'highlight': highlight(restaurant.name, query),
+            }
             for restaurant in restaurants
         ],
         'districts': [
-            {'slug': district.slug, 'name': district.name}
+            {
+                'slug': district.slug,
+                'name': district.name,
+                'highlight': highlight(district.name, query),
+            }
             for district in districts
         ],
     }
-    return Response(payload)
+
+
+@api_view(['GET'])
+def search_restaurants(request):
+    """Active restaurants matching ``?q=``, best first, narrowed by the list filters."""
+    with read_replica(request):
+        return _search_restaurants(request)
+
+
+def _search_restaurants(request):
+    # Not stripped: a trailing space tells the index the last word is complete.
+    query = request.query_params.get('q', '')
+    if not query.strip():
+        raise ValidationError({'q': ['This field is required.']})
+    filterset = RestaurantFilter(
+        request.query_params, queryset=Restaurant.objects.filter(is_active=True), request=request
+    )
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+    if search_index_enabled():
+        pks = search_index.search(query, filters=filterset.facet_params())
+        if not filterset.index_answerable():
+            # ``near`` is answered by the database.
+            nearby = set(filterset.qs.values_list('pk', flat=True))
+            pks = [pk for pk in pks if pk in nearby]
+    else:
+        pks = database_search(query, filterset.qs)
+
+    paginator = LimitOffsetPagination()
+    page = paginator.paginate_queryset(pks, request)
+    queryset = Restaurant.objects.filter(pk__in=page)
+    if fast_payloads_enabled():
+        found = {row.id: row for row in rows(queryset)}
+        results = payloads([found[pk] for pk in page if pk in found])
+    else:
+        related = queryset.select_related('district').prefetch_related(
+            'features', 'additional_filters'
+        )
+        found = related.in_bulk()
+        page = [found[pk] for pk in page if pk in found]
+        results = RestaurantListSerializer(page, many=True).data
+    return paginator.get_paginated_response(results)
+
+
+def database_search(query, queryset):
+    """Pks of ``queryset`` rows containing every word of ``query``, best rated first.
+
+    Used when the search index is disabled: no stemming, folding or typo
+    tolerance, and a scan of the table per request.
+    """
+    for word in query.split():
+        queryset = queryset.filter(
+            Q(name__icontains=word)
+            | Q(district__name__icontains=word)
+            | Q(address__icontains=word)
+            | Q(description__icontains=word)
+        )
+    return list(queryset.order_by('-score', 'name', 'pk').values_list('pk', flat=True))
+
+
+@api_view(['GET'])
+def catalogue_sync(request):
+    """Restaurants and taxonomy rows changed or deleted since ``?token=``.
+
+    Served from the primary: a lagging replica could hide rows older than
+    the returned token for good.
+    """
+    return Response(changes(request.query_params.get('token') or None))
+
+
+@api_view(['GET'])
+def snapshot_manifest(request):
+    """API URLs mapped to the static snapshot files currently holding their responses."""
+    manifest = snapshot_publisher.manifest()
+    response = conditional_response(
+        request, lambda: Validators(request, content=manifest), lambda: Response(manifest)
+    )
+    patch_cache_control(
+        response, public=True, max_age=getattr(settings, 'SNAPSHOT_MANIFEST_MAX_AGE', 60)
+    )
+    return response
+
+
+def metrics_view(request):
+    """Prometheus text exposition of this process's request metrics."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        # Fail closed: without a token, only development servers expose metrics.
+        if not settings.DEBUG:
+            return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+    else:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '')
+        if not constant_time_compare(supplied, f'Bearer {token}'):
+            return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')